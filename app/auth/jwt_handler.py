@@ -5,6 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 from app.config.settings import settings
 from app.services.session_service import SessionService
 from app.services.user_service import UserService  # Importer UserService
+from app.config.container import get_session_service, get_user_service
 from app.utils.time_utils import get_local_time
 import logging
 
@@ -23,7 +24,11 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session_service: SessionService = Depends(get_session_service),
+    user_service: UserService = Depends(get_user_service)
+) -> dict:
     """Vérifier et décoder le JWT, valider la session, et récupérer l'utilisateur depuis MongoDB"""
     credentials_exception = HTTPException(
         status_code=401,
@@ -39,7 +44,6 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
             raise credentials_exception
 
         # Vérifier la session dans MongoDB
-        session_service = SessionService()
         session = await session_service.get_by_session_id(session_id)
         if not session or session.user_id != user_id or not session.is_active:
             raise credentials_exception
@@ -51,7 +55,6 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
             raise HTTPException(status_code=401, detail="Session inactive, veuillez vous reconnecter")
 
         # Récupérer l'utilisateur depuis MongoDB
-        user_service = UserService()
         user = await user_service.get_by_id(user_id)
         if not user:
             raise credentials_exception
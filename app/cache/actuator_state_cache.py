@@ -0,0 +1,98 @@
+from typing import Any, Dict, List, Optional, Tuple
+from app.monitoring.metrics import metrics
+import time
+
+class ActuatorStateCache:
+    """État des actionneurs par serre, gardé en mémoire dans chaque processus.
+
+    ActuatorService le met à jour à chaque écriture (write-through). Une serre est rechargée depuis
+    MongoDB au plus tard ttl secondes après son chargement, pour voir les écritures des autres processus.
+    Les écritures faites pendant un rechargement sont notées (begin_load) et réappliquées à l'état lu,
+    qui peut les précéder.
+    """
+
+    def __init__(self, ttl: float, max_greenhouses: int):
+        self.ttl = ttl
+        self.max_greenhouses = max_greenhouses
+        self._states: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        # Écritures (ID -> document, None si supprimé) survenues pendant chaque rechargement en cours
+        self._journals: Dict[str, List[Dict[str, Optional[Dict[str, Any]]]]] = {}
+
+    def get(self, greenhouse_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Actionneurs de la serre triés par ID (None si la serre n'est pas chargée ou a expiré)"""
+        loaded_at = self._loaded_at.get(greenhouse_id)
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            metrics.increment("cache.actuator_state.misses")
+            return None
+        metrics.increment("cache.actuator_state.hits")
+        return self._sorted(greenhouse_id)
+
+    def _sorted(self, greenhouse_id: str) -> List[Dict[str, Any]]:
+        states = self._states[greenhouse_id]
+        return [states[id] for id in sorted(states)]
+
+    def begin_load(self, greenhouse_id: str) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Commencer à noter les écritures d'une serre avant de la relire ; passer le journal à load ou end_load"""
+        journal: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._journals.setdefault(greenhouse_id, []).append(journal)
+        return journal
+
+    def end_load(self, greenhouse_id: str, journal: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        """Arrêter de noter les écritures (lecture terminée ou en échec)"""
+        journals = self._journals.get(greenhouse_id, [])
+        if journal in journals:
+            journals.remove(journal)
+        if not journals:
+            self._journals.pop(greenhouse_id, None)
+
+    def _record(self, greenhouse_id: str, id: str, document: Optional[Dict[str, Any]]) -> None:
+        for journal in self._journals.get(greenhouse_id, []):
+            journal[id] = document
+
+    def load(
+        self,
+        greenhouse_id: str,
+        documents: List[Dict[str, Any]],
+        journal: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Remplacer l'état d'une serre ; retourne l'état trié et True s'il diffère de l'état précédemment chargé.
+
+        Les écritures notées dans journal depuis begin_load, plus récentes que documents, sont réappliquées.
+        Sans état précédent (premier chargement ou serre évincée), l'état est considéré comme modifié :
+        une écriture d'un autre processus a pu avoir lieu depuis le dernier ETag servi.
+        """
+        if journal is not None:
+            self.end_load(greenhouse_id, journal)
+        previous = self._states.pop(greenhouse_id, None)
+        self._loaded_at.pop(greenhouse_id, None)
+        if len(self._states) >= self.max_greenhouses:
+            # Évincer la serre chargée le plus anciennement
+            oldest = next(iter(self._loaded_at))
+            del self._states[oldest], self._loaded_at[oldest]
+        states = self._states[greenhouse_id] = {document["id"]: document for document in documents}
+        for id, document in (journal or {}).items():
+            if document is None:
+                states.pop(id, None)
+            else:
+                states[id] = document
+        self._loaded_at[greenhouse_id] = time.monotonic()
+        return self._sorted(greenhouse_id), previous is None or previous != states
+
+    def put(self, document: Dict[str, Any]) -> None:
+        """Enregistrer l'état d'un actionneur créé ou modifié (sans effet si sa serre n'est pas chargée)"""
+        self._record(document["greenhouse_id"], document["id"], document)
+        states = self._states.get(document["greenhouse_id"])
+        if states is not None:
+            states[document["id"]] = document
+
+    def remove(self, greenhouse_id: str, id: str) -> None:
+        self._record(greenhouse_id, id, None)
+        states = self._states.get(greenhouse_id)
+        if states is not None:
+            states.pop(id, None)
+
+    def invalidate(self, greenhouse_id: str) -> None:
+        """Marquer une serre comme expirée (rechargée à la prochaine lecture, comparée à l'état gardé)"""
+        if greenhouse_id in self._loaded_at:
+            self._loaded_at[greenhouse_id] = float("-inf")
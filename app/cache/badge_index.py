@@ -0,0 +1,47 @@
+from typing import Any, Dict, List, Optional
+from app.monitoring.metrics import metrics
+import time
+
+class BadgeIndex:
+    """Serre de chaque badge, gardée en mémoire dans chaque processus pour décider l'ouverture des portes.
+
+    Le contrôle d'accès est une simple lecture de dictionnaire : il ne dépend pas de MongoDB. BadgeService
+    met l'index à jour à chaque écriture (write-through) et le recharge en entier quand la version des
+    badges change (écriture d'un autre processus). En cas d'échec du rechargement, l'index précédent
+    continue de servir.
+    """
+
+    def __init__(self):
+        self._greenhouses: Dict[str, str] = {}
+        self.version: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def age(self) -> Optional[float]:
+        """Secondes depuis le dernier chargement complet (None si jamais chargé)"""
+        return time.monotonic() - self.loaded_at if self.loaded_at is not None else None
+
+    def load(self, documents: List[Dict[str, Any]], version: Optional[int]) -> None:
+        """Remplacer tout l'index (nouveau dictionnaire, échangé en une seule affectation)"""
+        self._greenhouses = {document["id"]: document["greenhouse_id"] for document in documents}
+        self.version = version
+        self.loaded_at = time.monotonic()
+        metrics.set_gauge("badges.index.size", len(self._greenhouses))
+
+    def put(self, badge: Dict[str, Any]) -> None:
+        self._greenhouses[badge["id"]] = badge["greenhouse_id"]
+
+    def remove(self, badge_id: str) -> None:
+        self._greenhouses.pop(badge_id, None)
+
+    def check(self, badge_id: str, greenhouse_id: str) -> Optional[str]:
+        """Motif de refus (None si le badge ouvre cette serre)"""
+        badge_greenhouse = self._greenhouses.get(badge_id)
+        if badge_greenhouse is None:
+            return "unknown_badge"
+        if badge_greenhouse != greenhouse_id:
+            return "wrong_greenhouse"
+        return None
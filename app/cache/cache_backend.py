@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import time
+import bson
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Backend partagé optionnel
+    aioredis = None
+
+class CacheBackend(ABC):
+    """Interface commune des backends de cache"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Récupérer plusieurs clés (seules les clés présentes sont retournées)"""
+        values = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+class LRUCacheBackend(CacheBackend):
+    """Cache LRU en mémoire du processus, avec expiration par entrée"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return copy.copy(value)
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, copy.copy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+class RedisCacheBackend(CacheBackend):
+    """Cache partagé entre workers (Redis ou serveur compatible), documents sérialisés en BSON"""
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise RuntimeError("Le paquet 'redis' est requis pour utiliser le cache partagé")
+        self.client = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return bson.decode(raw) if raw else None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self.client.set(key, bson.encode(value), ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        raws = await self.client.mget(keys)
+        return {key: bson.decode(raw) for key, raw in zip(keys, raws) if raw}
@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Optional
+from app.config.settings import settings
+from app.cache.cache_backend import CacheBackend, LRUCacheBackend, RedisCacheBackend
+from app.monitoring.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RepositoryCache:
+    """Cache read-through des documents d'une collection, indexé par collection et ID"""
+
+    def __init__(self, collection_name: str, backend: CacheBackend, ttl: int):
+        self.collection_name = collection_name
+        self.backend = backend
+        self.ttl = ttl
+
+    def _key(self, id: str) -> str:
+        return f"{self.collection_name}:{id}"
+
+    async def get(self, id: str) -> Optional[Dict[str, Any]]:
+        """Lire un document en cache (None si absent ou si le backend est indisponible)"""
+        try:
+            doc = await self.backend.get(self._key(id))
+        except Exception as e:
+            logger.warning(f"Cache indisponible pour {self.collection_name}: {str(e)}")
+            doc = None
+        metrics.increment(f"cache.{self.collection_name}.{'hits' if doc is not None else 'misses'}")
+        return doc
+
+    async def get_many(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Lire plusieurs documents en cache, indexés par ID"""
+        try:
+            found = await self.backend.get_many([self._key(id) for id in ids])
+        except Exception as e:
+            logger.warning(f"Cache indisponible pour {self.collection_name}: {str(e)}")
+            found = {}
+        docs = {doc["id"]: doc for doc in found.values()}
+        misses = len(set(ids)) - len(docs)
+        if docs:
+            metrics.increment(f"cache.{self.collection_name}.hits", len(docs))
+        if misses:
+            metrics.increment(f"cache.{self.collection_name}.misses", misses)
+        return docs
+
+    async def set(self, id: str, doc: Dict[str, Any]) -> None:
+        try:
+            await self.backend.set(self._key(id), doc, self.ttl)
+        except Exception as e:
+            logger.warning(f"Impossible d'écrire dans le cache {self.collection_name}: {str(e)}")
+
+    async def invalidate(self, id: str) -> None:
+        """Supprimer un document du cache après une écriture"""
+        try:
+            await self.backend.delete(self._key(id))
+            metrics.increment(f"cache.{self.collection_name}.invalidations")
+        except Exception as e:
+            logger.error(f"Impossible d'invalider le cache {self.collection_name}:{id}: {str(e)}")
+
+_backend: Optional[CacheBackend] = None
+_caches: Dict[str, RepositoryCache] = {}
+
+def get_cache_backend() -> CacheBackend:
+    """Retourner le backend de cache configuré (partagé par toutes les collections)"""
+    global _backend
+    if _backend is None:
+        if settings.CACHE_BACKEND == "redis":
+            _backend = RedisCacheBackend(settings.CACHE_REDIS_URL)
+        else:
+            _backend = LRUCacheBackend(settings.CACHE_MAX_ENTRIES)
+    return _backend
+
+def get_repository_cache(collection_name: str) -> Optional[RepositoryCache]:
+    """Retourner le cache d'une collection, ou None si le cache n'est pas activé pour elle"""
+    if collection_name not in settings.CACHE_ENABLED_COLLECTIONS:
+        return None
+    cache = _caches.get(collection_name)
+    if cache is None:
+        ttl = settings.CACHE_TTL_SECONDS.get(collection_name, settings.CACHE_DEFAULT_TTL_SECONDS)
+        cache = _caches[collection_name] = RepositoryCache(collection_name, get_cache_backend(), ttl)
+    return cache
+
+def get_count_cache(collection_name: str) -> RepositoryCache:
+    """Cache à TTL court des comptages agrégés d'une collection"""
+    namespace = f"counts.{collection_name}"
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches[namespace] = RepositoryCache(namespace, get_cache_backend(), settings.COUNT_CACHE_TTL_SECONDS)
+    return cache
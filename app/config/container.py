@@ -0,0 +1,137 @@
+from typing import Optional
+from app.services.user_service import UserService
+from app.services.session_service import SessionService
+from app.services.greenhouse_service import GreenhouseService
+from app.services.alert_service import AlertService
+from app.services.history_service import HistoryService
+from app.services.settings_service import SettingsService
+from app.services.badge_service import BadgeService
+from app.services.actuator_service import ActuatorService
+from app.services.dashboard_service import DashboardService
+from app.services.actuator_usage_service import ActuatorUsageService
+from app.services.cascade_delete_service import CascadeDeleteService
+from app.services.rule_engine import RuleEngine
+from app.services.email_service import EmailOutboxService
+from app.services.alert_digest_service import AlertDigestService
+from app.repositories.slow_query_repository import SlowQueryRepository
+from app.config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """Services et repositories partagés par toute l'application, créés une seule fois après la connexion MongoDB"""
+    user_service: Optional[UserService] = None
+    session_service: Optional[SessionService] = None
+    email_outbox_service: Optional[EmailOutboxService] = None
+    alert_digest_service: Optional[AlertDigestService] = None
+    cascade_delete_service: Optional[CascadeDeleteService] = None
+    rule_engine: Optional[RuleEngine] = None
+    greenhouse_service: Optional[GreenhouseService] = None
+    alert_service: Optional[AlertService] = None
+    history_service: Optional[HistoryService] = None
+    settings_service: Optional[SettingsService] = None
+    badge_service: Optional[BadgeService] = None
+    actuator_service: Optional[ActuatorService] = None
+    dashboard_service: Optional[DashboardService] = None
+    actuator_usage_service: Optional[ActuatorUsageService] = None
+    slow_query_repository: Optional[SlowQueryRepository] = None
+
+    @classmethod
+    def init(cls):
+        """Construire le graphe de services (une seule instance de chaque service et repository)"""
+        cls.user_service = UserService()
+        cls.session_service = SessionService()
+        cls.email_outbox_service = EmailOutboxService()
+        cls.cascade_delete_service = CascadeDeleteService()
+        cls.greenhouse_service = GreenhouseService(
+            user_service=cls.user_service,
+            cascade_delete_service=cls.cascade_delete_service
+        )
+        cls.alert_digest_service = AlertDigestService(outbox=cls.email_outbox_service)
+        cls.alert_service = AlertService(
+            greenhouse_service=cls.greenhouse_service,
+            alert_digest=cls.alert_digest_service if settings.ALERT_DIGEST_ENABLED else None
+        )
+        cls.settings_service = SettingsService(user_service=cls.user_service, greenhouse_service=cls.greenhouse_service)
+        cls.badge_service = BadgeService()
+        cls.actuator_service = ActuatorService()
+        cls.rule_engine = RuleEngine(settings_service=cls.settings_service, actuator_service=cls.actuator_service)
+        cls.history_service = HistoryService(
+            greenhouse_service=cls.greenhouse_service,
+            rule_engine=cls.rule_engine if settings.RULE_ENGINE_ENABLED else None
+        )
+        cls.dashboard_service = DashboardService(
+            history_service=cls.history_service,
+            alert_service=cls.alert_service,
+            actuator_service=cls.actuator_service,
+            settings_service=cls.settings_service
+        )
+        cls.actuator_usage_service = ActuatorUsageService(audit_repository=cls.actuator_service.audit_repository)
+        cls.slow_query_repository = SlowQueryRepository()
+        logger.info("Services initialisés")
+
+    @classmethod
+    def ensure_initialized(cls):
+        if cls.user_service is None:
+            cls.init()
+
+    @classmethod
+    def reset(cls):
+        """Oublier les instances (ex. après une reconnexion à MongoDB)"""
+        for name in cls.__annotations__:
+            setattr(cls, name, None)
+
+# Dépendances FastAPI (Depends)
+
+def get_user_service() -> UserService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.user_service
+
+def get_session_service() -> SessionService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.session_service
+
+def get_email_outbox_service() -> EmailOutboxService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.email_outbox_service
+
+def get_cascade_delete_service() -> CascadeDeleteService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.cascade_delete_service
+
+def get_greenhouse_service() -> GreenhouseService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.greenhouse_service
+
+def get_alert_service() -> AlertService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.alert_service
+
+def get_history_service() -> HistoryService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.history_service
+
+def get_settings_service() -> SettingsService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.settings_service
+
+def get_badge_service() -> BadgeService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.badge_service
+
+def get_actuator_service() -> ActuatorService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.actuator_service
+
+def get_dashboard_service() -> DashboardService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.dashboard_service
+
+def get_actuator_usage_service() -> ActuatorUsageService:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.actuator_usage_service
+
+def get_slow_query_repository() -> SlowQueryRepository:
+    ServiceContainer.ensure_initialized()
+    return ServiceContainer.slow_query_repository
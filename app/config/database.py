@@ -1,5 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config.settings import settings
+from app.monitoring.mongo_listeners import PoolMetricsListener, CommandMetricsListener
+from app.monitoring.slow_query_log import get_slow_query_listener
 import logging
 from typing import Optional
 
@@ -13,29 +15,41 @@ class Database:
     async def connect_to_database(cls):
         try:
             logger.info("Connexion à MongoDB...")
-            cls.client = AsyncIOMotorClient(
-                settings.MONGODB_URL,
-                serverSelectionTimeoutMS=15000,
-                connectTimeoutMS=30000,
-                socketTimeoutMS=60000,
-            )
+            cls.client = AsyncIOMotorClient(settings.MONGODB_URL, **cls.client_options())
             cls.smart_greenhouse_db = cls.client[settings.MONGODB_DB_NAME]
             await cls.smart_greenhouse_db.command("ping")
-            # Créer des index
-            await cls.smart_greenhouse_db["users"].create_index("email", unique=True)
-            await cls.smart_greenhouse_db["greenhouses"].create_index("user_id")
-            await cls.smart_greenhouse_db["alerts"].create_index("greenhouse_id")
-            await cls.smart_greenhouse_db["history"].create_index("greenhouse_id")
-            await cls.smart_greenhouse_db["history"].create_index("recorded_at")
-            await cls.smart_greenhouse_db["badges"].create_index("greenhouse_id")
-            await cls.smart_greenhouse_db["actuators"].create_index("greenhouse_id")
-            await cls.smart_greenhouse_db["settings"].create_index([ "user_id", "greenhouse_id" ], unique=True)
-            await cls.smart_greenhouse_db["sessions"].create_index("session_id", unique=True)
+            # Les index sont créés en arrière-plan par app.repositories.index_reconciler
             logger.info("Connecté à la base de données SmartGreenhouse")
         except Exception as e:
             logger.error(f"Erreur de connexion à MongoDB: {str(e)}")
             raise
 
+    @staticmethod
+    def client_options() -> dict:
+        """Options du client Motor : timeouts, pool de connexions et listeners de monitoring"""
+        options = {
+            "serverSelectionTimeoutMS": 15000,
+            "connectTimeoutMS": 30000,
+            "socketTimeoutMS": 60000,
+            "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        }
+        if settings.MONGODB_MAX_IDLE_TIME_MS is not None:
+            options["maxIdleTimeMS"] = settings.MONGODB_MAX_IDLE_TIME_MS
+        if settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS is not None:
+            options["waitQueueTimeoutMS"] = settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+        if settings.MONGODB_COMPRESSORS:
+            options["compressors"] = settings.MONGODB_COMPRESSORS
+        listeners = []
+        if settings.MONGODB_MONITORING_ENABLED:
+            listeners += [PoolMetricsListener(), CommandMetricsListener()]
+        slow_query_listener = get_slow_query_listener()
+        if slow_query_listener:
+            listeners.append(slow_query_listener)
+        if listeners:
+            options["event_listeners"] = listeners
+        return options
+
     @classmethod
     async def close_database_connection(cls):
         logger.info("Fermeture de la connexion à MongoDB...")
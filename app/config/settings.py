@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict, Optional
 import json
 import os
 
@@ -13,6 +13,92 @@ class Settings(BaseSettings):
     MONGODB_DB_NAME: str = os.getenv("MONGODB_DB_NAME")
     MONGODB_AUTH_ENABLED: bool = False
 
+    # Pool de connexions MongoDB
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGODB_COMPRESSORS: Optional[str] = None  # ex. "zstd,zlib" (zstd nécessite le paquet zstandard)
+    MONGODB_MONITORING_ENABLED: bool = True  # Métriques du pool et des commandes
+
+    # Index MongoDB (réconciliés en arrière-plan au démarrage)
+    INDEX_RECONCILE_ENABLED: bool = True
+    INDEX_RECONCILE_DRY_RUN: bool = False  # Journaliser le diff sans créer d'index
+    INDEX_RECONCILE_RETRY_SECONDS: int = 30
+
+    # Journal des requêtes lentes (collection plafonnée + logger app.monitoring.slow_query_log)
+    SLOW_QUERY_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 100
+    SLOW_QUERY_COLLECTION: str = "slow_queries"
+    SLOW_QUERY_COLLECTION_SIZE_BYTES: int = 16 * 1024 * 1024
+
+    # Suppression en cascade des dépendants d'une serre (tâche de fond, lots delete_many espacés)
+    CASCADE_DELETE_BATCH_SIZE: int = 1000
+    CASCADE_DELETE_BATCH_PAUSE_SECONDS: float = 0.1
+    CASCADE_DELETE_POLL_SECONDS: float = 5
+    CASCADE_DELETE_LEASE_SECONDS: float = 300  # Tâche reprise par un autre worker sans progression pendant ce délai
+    CASCADE_DELETE_MAX_ATTEMPTS: int = 6
+    CASCADE_DELETE_RETRY_BASE_SECONDS: float = 30
+    CASCADE_DELETE_RETRY_MAX_SECONDS: float = 3600
+
+    # Long-poll des appareils sur l'état des actionneurs
+    ACTUATOR_LONG_POLL_TIMEOUT_SECONDS: float = 30
+    ACTUATOR_LONG_POLL_MAX_TIMEOUT_SECONDS: float = 60
+    ACTUATOR_LONG_POLL_RECHECK_SECONDS: float = 10  # Vérification en base (écritures faites par un autre processus)
+
+    # État des actionneurs en mémoire par serre (rechargé depuis MongoDB après ce délai)
+    ACTUATOR_STATE_TTL_SECONDS: float = 30
+    ACTUATOR_STATE_MAX_GREENHOUSES: int = 10000
+
+    # Règles d'automatisation (mesures -> actionneurs), évaluées par lots ; désactivées par défaut tant que
+    # les règles ne sont pas configurables par serre
+    RULE_ENGINE_ENABLED: bool = False
+    RULE_ENGINE_INTERVAL_SECONDS: float = 1.0
+    RULE_ENGINE_COOLDOWN_SECONDS: float = 300  # Délai avant qu'une même règle agisse à nouveau sur une serre
+    RULE_ENGINE_MAX_PENDING: int = 100000
+    RULE_ENGINE_MAX_COOLDOWNS: int = 100000
+
+    # Journal des commandes d'actionneurs (collection plafonnée, écrite par lots en arrière-plan)
+    ACTUATOR_AUDIT_ENABLED: bool = True
+    ACTUATOR_AUDIT_COLLECTION: str = "actuator_audit"
+    ACTUATOR_AUDIT_COLLECTION_SIZE_BYTES: int = 64 * 1024 * 1024
+
+    # Utilisation des actionneurs par jour (jours clos mis en cache dans actuator_usage)
+    ACTUATOR_USAGE_MAX_DAYS: int = 92
+    ACTUATOR_USAGE_CLOSE_DELAY_SECONDS: int = 300
+
+    # Contrôle d'accès des portes par badge (index en mémoire, clé partagée des lecteurs RFID)
+    BADGE_ACCESS_API_KEY: Optional[str] = os.getenv("BADGE_ACCESS_API_KEY")
+    BADGE_INDEX_CHECK_SECONDS: float = 5.0
+    BADGE_INDEX_MAX_AGE_SECONDS: float = 300.0
+    BADGE_ACCESS_LOG_ENABLED: bool = True
+    BADGE_ACCESS_RETENTION_DAYS: int = 365
+
+    # Envoi des e-mails (SMTP) et file d'envoi email_outbox
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_USERNAME: Optional[str] = os.getenv("SMTP_USERNAME")
+    SMTP_PASSWORD: Optional[str] = os.getenv("SMTP_PASSWORD")
+    SMTP_STARTTLS: bool = True
+    SMTP_SENDER: str = os.getenv("SMTP_SENDER", "no-reply@smartgreenhouse.local")
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_WORKERS: int = 2
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 300
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: float = 30
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: float = 3600
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 30
+
+    # Récapitulatif des alertes par e-mail (utilisateurs notify_by_email)
+    ALERT_DIGEST_ENABLED: bool = True
+    ALERT_DIGEST_WINDOW_SECONDS: float = 300
+    ALERT_DIGEST_MAX_PENDING: int = 100000
+    ALERT_DIGEST_MAX_ALERTS_PER_GREENHOUSE: int = 20
+    ALERT_DIGEST_ENQUEUE_BATCH_SIZE: int = 500
+
     # Application Settings
     APP_NAME: str = os.getenv("APP_NAME")
     APP_VERSION: str = os.getenv("APP_VERSION")
@@ -26,6 +112,26 @@ class Settings(BaseSettings):
     # CORS Settings
     ALLOWED_ORIGINS: List[str]
 
+    # Lectures de confiance : modèles construits sans revalidation des documents relus en base
+    TRUSTED_DB_READS: bool = True
+
+    # Cache des repositories (lectures par ID)
+    CACHE_BACKEND: str = "memory"  # "memory" (LRU par processus) ou "redis" (partagé)
+    CACHE_REDIS_URL: Optional[str] = None
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_ENABLED_COLLECTIONS: List[str] = ["greenhouses", "settings", "users", "actuators"]
+    CACHE_DEFAULT_TTL_SECONDS: int = 60
+    CACHE_TTL_SECONDS: Dict[str, int] = {"greenhouses": 300, "settings": 300, "users": 60, "actuators": 30}
+    COUNT_CACHE_TTL_SECONDS: int = 30  # Comptages agrégés (/users/count, /settings/count, /alerts/count)
+    HISTORY_COUNTER_RESYNC_SECONDS: int = 3600  # Recalcul périodique des compteurs d'historique par serre
+
+    # Paramètres effectifs : délai maximal avant qu'un worker voie la modification faite par un autre
+    SETTINGS_VERSION_CHECK_SECONDS: float = 5
+    SETTINGS_EFFECTIVE_MAX_ENTRIES: int = 10000
+
+    # Pagination : au-delà de ce nombre de documents, le total des pages est estimé
+    PAGE_TOTAL_CAP: int = 10000
+
     @classmethod
     def parse_allowed_origins(cls, value: str) -> List[str]:
         try:
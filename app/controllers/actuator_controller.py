@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Header, Response
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 from app.services.actuator_service import ActuatorService
-from app.schemas.actuator_schema import ActuatorCreate, ActuatorUpdate, ActuatorResponse
+from app.services.greenhouse_service import GreenhouseService
+from app.services.actuator_usage_service import ActuatorUsageService
+from app.schemas.actuator_schema import ActuatorCreate, ActuatorUpdate, ActuatorResponse, ActuatorPartialResponse, ActuatorCommand, ActuatorChanges, ActuatorAuditPage, ActuatorUsageDay
 from app.auth.jwt_handler import get_current_user
+from app.config.container import get_actuator_service, get_greenhouse_service, get_actuator_usage_service
+from app.config.settings import settings
+from app.services.base_service import build_model
+from app.utils.time_utils import get_local_time
+from app.utils.query_utils import parse_fields, project_items, parse_cursor
 
 router = APIRouter(
     prefix="/actuators",
@@ -10,34 +18,164 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=ActuatorResponse)
-async def create_actuator(actuator: ActuatorCreate, current_user: dict = Depends(get_current_user)):
+async def create_actuator(
+    actuator: ActuatorCreate,
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service)
+):
     """Créer un nouvel actionneur"""
     try:
-        service = ActuatorService()
-        result = await service.create(actuator)
+        result = await service.create(actuator, f"user:{current_user['user_id']}")
         return result
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/greenhouse/{greenhouse_id}", response_model=List[ActuatorResponse])
-async def get_actuators_by_greenhouse(greenhouse_id: str, current_user: dict = Depends(get_current_user)):
-    """Récupérer les actionneurs d'une serre"""
+@router.get("/greenhouse/{greenhouse_id}", response_model=List[ActuatorPartialResponse], response_model_exclude_unset=True)
+async def get_actuators_by_greenhouse(
+    greenhouse_id: str,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    if_none_match: Optional[str] = Header(None, description="ETag reçu lors de l'appel précédent"),
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service)
+):
+    """Récupérer les actionneurs d'une serre (depuis l'état en mémoire ; 304 si l'ETag n'a pas changé)"""
     try:
-        service = ActuatorService()
-        return await service.get_by_greenhouse_id(greenhouse_id)
+        projection = parse_fields(fields, ActuatorPartialResponse)
+        etag, actuators = await service.get_state(greenhouse_id)
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        models = [build_model(ActuatorResponse, actuator, projection, trusted=True) for actuator in actuators]
+        return project_items(models, projection)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/greenhouse/{greenhouse_id}/changes", response_model=ActuatorChanges)
+async def wait_for_actuator_changes(
+    greenhouse_id: str,
+    version: Optional[int] = Query(None, ge=0, description="Version reçue lors de l'appel précédent"),
+    epoch: Optional[str] = Query(None, description="Epoch reçu avec version (processus qui l'a retournée)"),
+    since: Optional[datetime] = Query(None, description="Watermark (updated_at) reçu lors de l'appel précédent"),
+    timeout: float = Query(
+        settings.ACTUATOR_LONG_POLL_TIMEOUT_SECONDS,
+        gt=0,
+        le=settings.ACTUATOR_LONG_POLL_MAX_TIMEOUT_SECONDS,
+        description="Durée maximale d'attente en secondes"
+    ),
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Attendre (long-poll) qu'un actionneur de la serre change, au lieu d'interroger l'état en boucle.
+
+    Sans version ni since, l'état courant est retourné immédiatement. Derrière plusieurs workers, renvoyer
+    epoch avec version : une version d'un autre worker est ignorée au profit de since.
+    """
+    try:
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        if version is None and since is None:
+            version = -1
+        return await service.wait_for_changes(greenhouse_id, version, since, timeout, epoch)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/greenhouse/{greenhouse_id}/commands", response_model=List[ActuatorResponse])
+async def apply_actuator_commands(
+    greenhouse_id: str,
+    commands: List[ActuatorCommand] = Body(..., min_length=1, max_length=100),
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Appliquer une scène : plusieurs commandes d'actionneurs d'une serre en un seul bulk_write ordonné"""
+    try:
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        return await service.apply_commands(greenhouse_id, commands, f"user:{current_user['user_id']}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/greenhouse/{greenhouse_id}/audit", response_model=ActuatorAuditPage)
+async def get_actuator_audit(
+    greenhouse_id: str,
+    actuator_id: Optional[str] = Query(None, description="Limiter le journal à un actionneur"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (next_cursor)"),
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Journal des commandes d'actionneurs d'une serre, du plus récent au plus ancien (pagination par curseur)"""
+    try:
+        after = parse_cursor(cursor)
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        return await service.get_audit_page(greenhouse_id, limit, after, actuator_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/greenhouse/{greenhouse_id}/usage", response_model=List[ActuatorUsageDay])
+async def get_actuator_usage(
+    greenhouse_id: str,
+    start_date: Optional[date] = Query(None, description="Premier jour (par défaut : 6 jours avant end_date)"),
+    end_date: Optional[date] = Query(None, description="Dernier jour inclus (par défaut : aujourd'hui)"),
+    current_user: dict = Depends(get_current_user),
+    usage_service: ActuatorUsageService = Depends(get_actuator_usage_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Temps de marche, taux de marche et mises en marche par type d'actionneur et par jour"""
+    try:
+        end_date = end_date or get_local_time().date()
+        start_date = start_date or end_date - timedelta(days=6)
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date doit précéder end_date")
+        if (end_date - start_date).days + 1 > settings.ACTUATOR_USAGE_MAX_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Période limitée à {settings.ACTUATOR_USAGE_MAX_DAYS} jours"
+            )
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        return await usage_service.get_usage(greenhouse_id, start_date, end_date)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{id}", response_model=ActuatorResponse)
-async def update_actuator(id: str, actuator_update: ActuatorUpdate, current_user: dict = Depends(get_current_user)):
+async def update_actuator(
+    id: str,
+    actuator_update: ActuatorUpdate,
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service)
+):
     """Mettre à jour un actionneur"""
     try:
-        service = ActuatorService()
-        result = await service.update(id, actuator_update)
+        result = await service.update(id, actuator_update, f"user:{current_user['user_id']}")
         if not result:
             raise HTTPException(status_code=404, detail="Actionneur non trouvé")
         return result
@@ -47,11 +185,14 @@ async def update_actuator(id: str, actuator_update: ActuatorUpdate, current_user
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.delete("/{id}")
-async def delete_actuator(id: str, current_user: dict = Depends(get_current_user)):
+async def delete_actuator(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: ActuatorService = Depends(get_actuator_service)
+):
     """Supprimer un actionneur"""
     try:
-        service = ActuatorService()
-        result = await service.delete(id)
+        result = await service.delete(id, f"user:{current_user['user_id']}")
         if not result:
             raise HTTPException(status_code=404, detail="Actionneur non trouvé")
         return {"message": "Actionneur supprimé avec succès"}
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 from app.services.alert_service import AlertService
 from app.services.greenhouse_service import GreenhouseService
-from app.schemas.alert_schema import AlertCreate, AlertUpdate, AlertResponse
+from app.schemas.alert_schema import AlertCreate, AlertUpdate, AlertResponse, AlertPartialResponse
 from app.auth.jwt_handler import get_current_user, get_current_admin
+from app.config.container import get_greenhouse_service, get_alert_service
+from app.models.alert_model import AlertModel
+from app.schemas.page_schema import Page
+from app.utils.query_utils import parse_fields, fetch_fields, parse_cursor
+from app.utils.fast_json import fast_json_response, fast_json_page_response
 
 router = APIRouter(
     prefix="/alerts",
@@ -11,16 +16,19 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=AlertResponse)
-async def create_alert(alert: AlertCreate, current_user: dict = Depends(get_current_user)):
+async def create_alert(
+    alert: AlertCreate,
+    current_user: dict = Depends(get_current_user),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service),
+    service: AlertService = Depends(get_alert_service)
+):
     """Créer une nouvelle alerte"""
     try:
-        greenhouse_service = GreenhouseService()
         greenhouse = await greenhouse_service.get_by_id(alert.greenhouse_id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        service = AlertService()
         result = await service.create(alert)
         return result
     except HTTPException:
@@ -29,55 +37,61 @@ async def create_alert(alert: AlertCreate, current_user: dict = Depends(get_curr
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/count", response_model=Dict[str, int])
-async def count_alerts(current_user: dict = Depends(get_current_user)):
+async def count_alerts(
+    exact: bool = Query(False, description="Comptage exact (recalcul complet) au lieu de la valeur en cache"),
+    current_user: dict = Depends(get_current_user),
+    service: AlertService = Depends(get_alert_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Compter les alertes par statut"""
     try:
-        service = AlertService()
-        results = await service.count_by_status()
-        if not current_user["is_admin"]:
-            # Filtrer pour les serres de l'utilisateur
-            user_greenhouses = await GreenhouseService().get_by_user_id(current_user["user_id"])
-            greenhouse_ids = [g.id for g in user_greenhouses]
-            alerts = await service.get_all()
-            resolved = sum(1 for a in alerts if a.greenhouse_id in greenhouse_ids and a.is_resolved)
-            unresolved = sum(1 for a in alerts if a.greenhouse_id in greenhouse_ids and not a.is_resolved)
-            results = {"resolved": resolved, "unresolved": unresolved}
-        return results
+        if current_user["is_admin"]:
+            return await service.count_by_status(exact=exact)
+        # Limiter le comptage aux serres de l'utilisateur
+        user_greenhouses = await greenhouse_service.get_by_user_id(current_user["user_id"], limit=0, fields=["id"])
+        return await service.count_by_status(greenhouse_ids=[g.id for g in user_greenhouses], exact=exact)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/search", response_model=List[AlertResponse])
+@router.get("/search", response_model=List[AlertPartialResponse], response_model_exclude_unset=True)
 async def search_alerts(
     query: str = Query(..., description="Type ou message à rechercher"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    current_user: dict = Depends(get_current_user),
+    service: AlertService = Depends(get_alert_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
 ):
     """Rechercher des alertes par type ou message"""
     try:
-        service = AlertService()
-        results = await service.search(query, skip, limit)
+        projection = parse_fields(fields, AlertPartialResponse)
+        results = await service.search(query, skip, limit, fetch_fields(projection, ["greenhouse_id"]))
         if not current_user["is_admin"]:
-            user_greenhouses = await GreenhouseService().get_by_user_id(current_user["user_id"])
-            greenhouse_ids = [g.id for g in user_greenhouses]
+            greenhouses = await greenhouse_service.get_many(list({r.greenhouse_id for r in results}))
+            greenhouse_ids = {g.id for g in greenhouses if g and g.user_id == current_user["user_id"]}
             results = [r for r in results if r.greenhouse_id in greenhouse_ids]
-        return results
+        return fast_json_response(results, AlertPartialResponse, AlertModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{id}", response_model=AlertResponse)
-async def get_alert(id: str, current_user: dict = Depends(get_current_user)):
+async def get_alert(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: AlertService = Depends(get_alert_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Récupérer une alerte par son ID"""
     try:
-        service = AlertService()
         result = await service.get_by_id(id)
         if not result:
             raise HTTPException(status_code=404, detail="Alerte non trouvée")
-        greenhouse = await GreenhouseService().get_by_id(result.greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(result.greenhouse_id)
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette alerte")
         return result
@@ -86,44 +100,73 @@ async def get_alert(id: str, current_user: dict = Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/greenhouse/{greenhouse_id}", response_model=List[AlertResponse])
-async def get_alerts_by_greenhouse(greenhouse_id: str, current_user: dict = Depends(get_current_user)):
+@router.get(
+    "/greenhouse/{greenhouse_id}",
+    response_model=Union[List[AlertPartialResponse], Page[AlertPartialResponse]],
+    response_model_exclude_unset=True
+)
+async def get_alerts_by_greenhouse(
+    greenhouse_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    paginate: bool = Query(False, description="Retourner {items, total, total_is_estimate, next_cursor} au lieu d'une liste"),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (next_cursor), implique paginate ; skip est alors ignoré"),
+    current_user: dict = Depends(get_current_user),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service),
+    service: AlertService = Depends(get_alert_service)
+):
     """Récupérer les alertes d'une serre"""
     try:
-        greenhouse = await GreenhouseService().get_by_id(greenhouse_id)
+        projection = parse_fields(fields, AlertPartialResponse)
+        after = parse_cursor(cursor)
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        service = AlertService()
-        return await service.get_by_greenhouse_id(greenhouse_id)
+        if paginate or after:
+            page = await service.get_page_by_greenhouse_id(greenhouse_id, limit, after, skip, projection)
+            return fast_json_page_response(page, AlertPartialResponse, AlertModel, projection)
+        results = await service.get_by_greenhouse_id(greenhouse_id, skip, limit, projection)
+        return fast_json_response(results, AlertPartialResponse, AlertModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[AlertResponse])
-async def get_all_alerts(current_user: dict = Depends(get_current_admin)):
+@router.get("/", response_model=List[AlertPartialResponse], response_model_exclude_unset=True)
+async def get_all_alerts(
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    current_user: dict = Depends(get_current_admin),
+    service: AlertService = Depends(get_alert_service)
+):
     """Récupérer toutes les alertes (admins uniquement)"""
     try:
         if not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs")
-        service = AlertService()
-        return await service.get_all()
+        projection = parse_fields(fields, AlertPartialResponse)
+        results = await service.get_all(fields=projection)
+        return fast_json_response(results, AlertPartialResponse, AlertModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{id}", response_model=AlertResponse)
-async def update_alert(id: str, alert_update: AlertUpdate, current_user: dict = Depends(get_current_user)):
+async def update_alert(
+    id: str,
+    alert_update: AlertUpdate,
+    current_user: dict = Depends(get_current_user),
+    service: AlertService = Depends(get_alert_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Mettre à jour une alerte"""
     try:
-        service = AlertService()
         alert = await service.get_by_id(id)
         if not alert:
             raise HTTPException(status_code=404, detail="Alerte non trouvée")
-        greenhouse = await GreenhouseService().get_by_id(alert.greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(alert.greenhouse_id)
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette alerte")
         result = await service.update(id, alert_update)
@@ -136,14 +179,18 @@ async def update_alert(id: str, alert_update: AlertUpdate, current_user: dict =
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{id}")
-async def delete_alert(id: str, current_user: dict = Depends(get_current_user)):
+async def delete_alert(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: AlertService = Depends(get_alert_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Supprimer une alerte"""
     try:
-        service = AlertService()
         alert = await service.get_by_id(id)
         if not alert:
             raise HTTPException(status_code=404, detail="Alerte non trouvée")
-        greenhouse = await GreenhouseService().get_by_id(alert.greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(alert.greenhouse_id)
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette alerte")
         result = await service.delete(id)
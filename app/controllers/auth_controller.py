@@ -6,7 +6,8 @@ from app.services.session_service import SessionService
 from app.schemas.session_schema import SessionCreate
 from app.schemas.user_schema import UserUpdate, UserResponse
 from app.auth.jwt_handler import create_access_token, get_current_user
-from app.services.email_service import send_reset_password_email
+from app.config.container import get_user_service, get_session_service, get_email_outbox_service
+from app.services.email_service import EmailOutboxService, send_reset_password_email
 import secrets
 import logging
 
@@ -23,10 +24,13 @@ class Token(BaseModel):
     user: UserResponse
     
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    user_service: UserService = Depends(get_user_service),
+    session_service: SessionService = Depends(get_session_service)
+):
     """Authentifier un utilisateur et générer un JWT"""
     try:
-        user_service = UserService()
         user = await user_service.get_by_email(form_data.username)  # username = email
         if not user:
             raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
@@ -36,7 +40,6 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
         
         # Créer une session
-        session_service = SessionService()
         session_data = SessionCreate(user_id=user.id, session_id="", is_active=True)  # session_id sera généré
         session = await session_service.create(session_data)
         
@@ -66,10 +69,12 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
 @router.post("/logout")
-async def logout(current_user: dict = Depends(get_current_user)):
+async def logout(
+    current_user: dict = Depends(get_current_user),
+    session_service: SessionService = Depends(get_session_service)
+):
     """Invalider la session actuelle"""
     try:
-        session_service = SessionService()
         result = await session_service.invalidate_session(current_user["session_id"])
         if not result:
             raise HTTPException(status_code=404, detail="Session non trouvée")
@@ -81,10 +86,13 @@ async def logout(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
 @router.post("/forgot-password")
-async def forgot_password(email: str = Form(...)):
+async def forgot_password(
+    email: str = Form(...),
+    user_service: UserService = Depends(get_user_service),
+    outbox: EmailOutboxService = Depends(get_email_outbox_service)
+):
     """Envoyer un lien de réinitialisation de mot de passe"""
     try:
-        user_service = UserService()
         user = await user_service.get_by_email(email)
         if not user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -92,7 +100,7 @@ async def forgot_password(email: str = Form(...)):
         # Stocker le token dans la base de données (expire après 1 heure)
         await user_service.update(user.id, UserUpdate(reset_token=reset_token))
         reset_url = f"http://localhost:3000/reset-password?token={reset_token}&email={email}"
-        await send_reset_password_email(email, reset_url)
+        await send_reset_password_email(outbox, email, reset_url)
         return {"message": "E-mail de réinitialisation envoyé"}
     except HTTPException:
         raise
@@ -103,11 +111,11 @@ async def forgot_password(email: str = Form(...)):
 async def reset_password(
     token: str = Form(...),
     email: str = Form(...),
-    new_password: str = Form(...)
+    new_password: str = Form(...),
+    user_service: UserService = Depends(get_user_service)
 ):
     """Réinitialiser le mot de passe"""
     try:
-        user_service = UserService()
         user = await user_service.get_by_email(email)
         if not user or user.reset_token != token:
             raise HTTPException(status_code=400, detail="Token invalide")
@@ -120,10 +128,12 @@ async def reset_password(
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_data(current_user: dict = Depends(get_current_user)):
+async def get_current_user_data(
+    current_user: dict = Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service)
+):
     """Récupérer les données de l'utilisateur actuel"""
     try:
-        user_service = UserService()
         user = await user_service.get_by_id(current_user["user_id"])
         if not user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -137,9 +147,9 @@ async def get_current_user_data(current_user: dict = Depends(get_current_user)):
 @router.patch("/me", response_model=UserResponse)
 async def update_current_user(
     user_update: UserUpdate,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserResponse = Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service)
 ):
-    user_service = UserService()
     updated_user = await user_service.update(current_user.id, user_update)
     if not updated_user:
         raise HTTPException(status_code=400, detail="Échec de la mise à jour du profil")
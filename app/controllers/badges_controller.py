@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Depends, Header
+from typing import List, Optional
 from app.services.badge_service import BadgeService
-from app.schemas.badge_schema import BadgeCreate, BadgeUpdate, BadgeResponse
+from app.schemas.badge_schema import BadgeCreate, BadgeUpdate, BadgeResponse, BadgeAccessRequest, BadgeAccessDecision, BadgeAccessPage, BadgePresence
+from app.config.settings import settings
+import hmac
 from app.models.user_model import UserModel
 from app.auth.jwt_handler import get_current_user, get_current_admin
+from app.services.greenhouse_service import GreenhouseService
+from app.config.container import get_badge_service, get_greenhouse_service
+from app.utils.query_utils import parse_cursor
 
 router = APIRouter(
     prefix="/badges",
@@ -13,26 +18,89 @@ router = APIRouter(
 @router.post("/", response_model=BadgeResponse)
 async def create_badge(
     badge: BadgeCreate,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Créer un nouveau badge"""
     try:
-        service = BadgeService()
         result = await service.create(badge, str(current_user["user_id"]))
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def verify_reader_key(x_reader_key: Optional[str] = Header(None, description="Clé partagée des lecteurs de badge")) -> None:
+    """Authentifier un lecteur de badge sans MongoDB (clé BADGE_ACCESS_API_KEY)"""
+    if not settings.BADGE_ACCESS_API_KEY:
+        raise HTTPException(status_code=503, detail="Contrôle d'accès par badge non configuré")
+    if not x_reader_key or not hmac.compare_digest(x_reader_key, settings.BADGE_ACCESS_API_KEY):
+        raise HTTPException(status_code=401, detail="Lecteur de badge non autorisé")
+
+@router.post("/access", response_model=BadgeAccessDecision, dependencies=[Depends(verify_reader_key)])
+async def check_badge_access(
+    request: BadgeAccessRequest,
+    service: BadgeService = Depends(get_badge_service)
+):
+    """Autoriser ou refuser l'ouverture d'une porte de serre pour un badge (index en mémoire)"""
+    try:
+        return await service.check_access(request.badge_id, request.greenhouse_id, request.direction)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/access/{greenhouse_id}", response_model=BadgeAccessPage)
+async def get_badge_access_events(
+    greenhouse_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (next_cursor)"),
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Journal des passages aux portes d'une serre, du plus récent au plus ancien"""
+    try:
+        after = parse_cursor(cursor)
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        return await service.get_access_page(greenhouse_id, limit, after)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/presence/{greenhouse_id}", response_model=List[BadgePresence])
+async def get_greenhouse_presence(
+    greenhouse_id: str,
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Badges actuellement présents dans une serre (vue tenue à jour à chaque lot de passages)"""
+    try:
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        return await service.get_presence(greenhouse_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/user/{user_id}", response_model=List[BadgeResponse])
 async def get_user_badges(
     user_id: str,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Récupérer les badges d'un utilisateur"""
     try:
         if str(current_user["user_id"]) != user_id and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Non autorisé")
-        service = BadgeService()
         result = await service.get_by_user_id(user_id)
         return result
     except HTTPException:
@@ -44,13 +112,13 @@ async def get_user_badges(
 async def get_greenhouse_badges(
     user_id: str,
     greenhouse_id: str,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Récupérer les badges d'une serre d'un utilisateur"""
     try:
         if str(current_user["user_id"]) != user_id and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Non autorisé")
-        service = BadgeService()
         result = await service.get_by_greenhouse_id(user_id, greenhouse_id)
         return result
     except HTTPException:
@@ -61,11 +129,11 @@ async def get_greenhouse_badges(
 @router.get("/{id}", response_model=BadgeResponse)
 async def get_badge(
     id: str,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Récupérer un badge par son ID"""
     try:
-        service = BadgeService()
         result = await service.get_by_id(id)
         if not result:
             raise HTTPException(status_code=404, detail="Badge non trouvé")
@@ -81,11 +149,11 @@ async def get_badge(
 async def update_badge(
     id: str,
     badge_update: BadgeUpdate,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Mettre à jour un badge"""
     try:
-        service = BadgeService()
         result = await service.update(id, badge_update, str(current_user["user_id"]))
         if not result:
             raise HTTPException(status_code=404, detail="Badge non trouvé")
@@ -98,11 +166,11 @@ async def update_badge(
 @router.delete("/{id}")
 async def delete_badge(
     id: str,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Supprimer un badge"""
     try:
-        service = BadgeService()
         result = await service.delete(id, str(current_user["user_id"]))
         if not result:
             raise HTTPException(status_code=404, detail="Badge non trouvé")
@@ -113,11 +181,11 @@ async def delete_badge(
 @router.get("/", response_model=List[BadgeResponse], dependencies=[Depends(get_current_admin)])
 async def get_all_badges(
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    service: BadgeService = Depends(get_badge_service)
 ):
     """Récupérer tous les badges (admin uniquement)"""
     try:
-        service = BadgeService()
         return await service.get_all(skip, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
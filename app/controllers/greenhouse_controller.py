@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List
+from typing import List, Optional
 from app.services.greenhouse_service import GreenhouseService
-from app.schemas.greenhouse_schema import GreenhouseCreate, GreenhouseUpdate, GreenhouseResponse
+from app.services.dashboard_service import DashboardService
+from app.services.cascade_delete_service import CascadeDeleteService
+from app.schemas.greenhouse_schema import GreenhouseCreate, GreenhouseUpdate, GreenhouseResponse, GreenhousePartialResponse
+from app.schemas.dashboard_schema import GreenhouseDashboard
+from app.schemas.cascade_job_schema import CascadeJobResponse
 from app.auth.jwt_handler import get_current_user, get_current_admin
+from app.config.container import get_greenhouse_service, get_dashboard_service, get_cascade_delete_service
+from app.models.greenhouse_model import GreenhouseModel
+from app.utils.query_utils import parse_fields, fetch_fields
+from app.utils.fast_json import fast_json_response
 
 router = APIRouter(
     prefix="/greenhouses",
@@ -10,12 +18,15 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=GreenhouseResponse)
-async def create_greenhouse(greenhouse: GreenhouseCreate, current_user: dict = Depends(get_current_user)):
+async def create_greenhouse(
+    greenhouse: GreenhouseCreate,
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Créer une nouvelle serre"""
     try:
         if greenhouse.user_id != current_user["user_id"]:
             raise HTTPException(status_code=403, detail="Vous ne pouvez créer une serre que pour votre propre utilisateur")
-        service = GreenhouseService()
         result = await service.create(greenhouse)
         return result
     except HTTPException:
@@ -23,11 +34,33 @@ async def create_greenhouse(greenhouse: GreenhouseCreate, current_user: dict = D
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/delete-jobs/{job_id}", response_model=CascadeJobResponse)
+async def get_delete_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    service: CascadeDeleteService = Depends(get_cascade_delete_service)
+):
+    """Suivre la suppression en cascade des données d'une serre supprimée"""
+    try:
+        job = await service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Tâche de suppression non trouvée")
+        if job["user_id"] != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette tâche")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{id}", response_model=GreenhouseResponse)
-async def get_greenhouse(id: str, current_user: dict = Depends(get_current_user)):
+async def get_greenhouse(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Récupérer une serre par son ID"""
     try:
-        service = GreenhouseService()
         result = await service.get_by_id(id)
         if not result:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
@@ -39,57 +72,96 @@ async def get_greenhouse(id: str, current_user: dict = Depends(get_current_user)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/user/{user_id}", response_model=List[GreenhouseResponse])
-async def get_greenhouses_by_user(user_id: str, current_user: dict = Depends(get_current_user)):
+@router.get("/{id}/dashboard", response_model=GreenhouseDashboard)
+async def get_greenhouse_dashboard(
+    id: str,
+    readings_limit: int = Query(20, ge=1, le=500, description="Nombre de dernières mesures"),
+    alerts_limit: int = Query(50, ge=1, le=500, description="Nombre maximal d'alertes non résolues"),
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service),
+    dashboard_service: DashboardService = Depends(get_dashboard_service)
+):
+    """Récupérer en une requête l'écran d'une serre : serre, dernières mesures, alertes non résolues, actionneurs et paramètres effectifs"""
+    try:
+        greenhouse = await service.get_by_id(id)
+        if not greenhouse:
+            raise HTTPException(status_code=404, detail="Serre non trouvée")
+        if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
+        return await dashboard_service.get_greenhouse_dashboard(greenhouse, readings_limit, alerts_limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/user/{user_id}", response_model=List[GreenhousePartialResponse], response_model_exclude_unset=True)
+async def get_greenhouses_by_user(
+    user_id: str,
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Récupérer les serres d'un utilisateur"""
     try:
         if user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé aux serres de cet utilisateur")
-        service = GreenhouseService()
-        return await service.get_by_user_id(user_id)
+        projection = parse_fields(fields, GreenhousePartialResponse)
+        results = await service.get_by_user_id(user_id, fields=projection)
+        return fast_json_response(results, GreenhousePartialResponse, GreenhouseModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/search", response_model=List[GreenhouseResponse])
+@router.get("/search", response_model=List[GreenhousePartialResponse], response_model_exclude_unset=True)
 async def search_greenhouses(
     name: str = Query(..., description="Nom de la serre à rechercher"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
 ):
     """Rechercher des serres par nom"""
     try:
-        service = GreenhouseService()
-        results = await service.search_by_name(name, skip, limit)
+        projection = parse_fields(fields, GreenhousePartialResponse)
+        results = await service.search_by_name(name, skip, limit, fetch_fields(projection, ["user_id"]))
         # Filtrer les résultats pour les non-admins
         if not current_user["is_admin"]:
             results = [r for r in results if r.user_id == current_user["user_id"]]
-        return results
+        return fast_json_response(results, GreenhousePartialResponse, GreenhouseModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[GreenhouseResponse])
-async def get_all_greenhouses(current_user: dict = Depends(get_current_admin)):
+@router.get("/", response_model=List[GreenhousePartialResponse], response_model_exclude_unset=True)
+async def get_all_greenhouses(
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    current_user: dict = Depends(get_current_admin),
+    service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Récupérer toutes les serres (admins uniquement)"""
     try:
         if not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs")
-        service = GreenhouseService()
-        return await service.get_all()
+        projection = parse_fields(fields, GreenhousePartialResponse)
+        results = await service.get_all(fields=projection)
+        return fast_json_response(results, GreenhousePartialResponse, GreenhouseModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{id}", response_model=GreenhouseResponse)
-async def update_greenhouse(id: str, greenhouse_update: GreenhouseUpdate, current_user: dict = Depends(get_current_user)):
+async def update_greenhouse(
+    id: str,
+    greenhouse_update: GreenhouseUpdate,
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Mettre à jour une serre"""
     try:
-        service = GreenhouseService()
         greenhouse = await service.get_by_id(id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
@@ -105,19 +177,22 @@ async def update_greenhouse(id: str, greenhouse_update: GreenhouseUpdate, curren
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{id}")
-async def delete_greenhouse(id: str, current_user: dict = Depends(get_current_user)):
-    """Supprimer une serre"""
+async def delete_greenhouse(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
+):
+    """Supprimer une serre (ses historiques, alertes, actionneurs, badges et paramètres sont supprimés en tâche de fond)"""
     try:
-        service = GreenhouseService()
         greenhouse = await service.get_by_id(id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        result = await service.delete(id)
-        if not result:
+        job = await service.delete(id)
+        if not job:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
-        return {"message": "Serre supprimée avec succès"}
+        return {"message": "Serre supprimée avec succès", "job_id": job["id"]}
     except HTTPException:
         raise
     except Exception as e:
@@ -126,11 +201,11 @@ async def delete_greenhouse(id: str, current_user: dict = Depends(get_current_us
 @router.get("/{id}/video", response_model=dict)
 async def get_video_stream(
     id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    service: GreenhouseService = Depends(get_greenhouse_service)
 ):
     """Récupérer l'URL du flux vidéo d'une serre"""
     try:
-        service = GreenhouseService()
         greenhouse = await service.get_by_id(id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
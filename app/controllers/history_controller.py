@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from typing import List, Optional, Union
 from app.services.history_service import HistoryService
 from app.services.greenhouse_service import GreenhouseService
-from app.schemas.history_schema import HistoryCreate, HistoryResponse
+from app.schemas.history_schema import HistoryCreate, HistoryResponse, HistoryPartialResponse
 from app.auth.jwt_handler import get_current_user, get_current_admin
+from app.config.container import get_greenhouse_service, get_history_service
+from app.models.history_model import HistoryModel
+from app.schemas.page_schema import Page
+from app.utils.query_utils import parse_fields, parse_cursor
+from app.utils.fast_json import fast_json_response, fast_json_page_response, response_fields
 from datetime import datetime
 
 router = APIRouter(
@@ -12,15 +17,19 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=HistoryResponse)
-async def create_history(history: HistoryCreate, current_user: dict = Depends(get_current_user)):
+async def create_history(
+    history: HistoryCreate,
+    current_user: dict = Depends(get_current_user),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service),
+    service: HistoryService = Depends(get_history_service)
+):
     """Créer une nouvelle entrée historique"""
     try:
-        greenhouse = await GreenhouseService().get_by_id(history.greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(history.greenhouse_id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        service = HistoryService()
         result = await service.create(history)
         return result
     except HTTPException:
@@ -29,22 +38,31 @@ async def create_history(history: HistoryCreate, current_user: dict = Depends(ge
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/count/{greenhouse_id}", response_model=int)
-async def count_history(greenhouse_id: str, current_user: dict = Depends(get_current_user)):
+async def count_history(
+    greenhouse_id: str,
+    exact: bool = Query(False, description="Comptage exact (recalcul complet) au lieu de la valeur en cache"),
+    current_user: dict = Depends(get_current_user),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service),
+    service: HistoryService = Depends(get_history_service)
+):
     """Compter les entrées historiques pour une serre"""
     try:
-        greenhouse = await GreenhouseService().get_by_id(greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        service = HistoryService()
-        return await service.count_by_greenhouse_id(greenhouse_id)
+        return await service.count_by_greenhouse_id(greenhouse_id, exact)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/search", response_model=List[HistoryResponse])
+@router.get(
+    "/search",
+    response_model=Union[List[HistoryPartialResponse], Page[HistoryPartialResponse]],
+    response_model_exclude_unset=True
+)
 async def search_history(
     greenhouse_id: str = Query(..., description="ID de la serre"),
     start_date: Optional[datetime] = Query(None, description="Date de début (ISO format)"),
@@ -53,31 +71,51 @@ async def search_history(
     temperature_max: Optional[float] = Query(None, description="Température maximum (°C)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    paginate: bool = Query(False, description="Retourner {items, total, total_is_estimate, next_cursor} au lieu d'une liste"),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (next_cursor), implique paginate ; skip est alors ignoré"),
+    current_user: dict = Depends(get_current_user),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service),
+    service: HistoryService = Depends(get_history_service)
 ):
     """Rechercher des historiques par plage de dates ou valeurs de capteurs"""
     try:
-        greenhouse = await GreenhouseService().get_by_id(greenhouse_id)
+        projection = parse_fields(fields, HistoryPartialResponse)
+        after = parse_cursor(cursor)
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        service = HistoryService()
-        return await service.search(greenhouse_id, start_date, end_date, temperature_min, temperature_max, skip, limit)
+        if paginate or after:
+            page = await service.search_page(
+                greenhouse_id, start_date, end_date, temperature_min, temperature_max, limit, after, skip,
+                response_fields(HistoryPartialResponse, projection)
+            )
+            return fast_json_page_response(page, HistoryPartialResponse, HistoryModel, projection)
+        documents = await service.search(
+            greenhouse_id, start_date, end_date, temperature_min, temperature_max, skip, limit,
+            response_fields(HistoryPartialResponse, projection), raw=True
+        )
+        return fast_json_response(documents, HistoryPartialResponse, HistoryModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{id}", response_model=HistoryResponse)
-async def get_history(id: str, current_user: dict = Depends(get_current_user)):
+async def get_history(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: HistoryService = Depends(get_history_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Récupérer une entrée historique par son ID"""
     try:
-        service = HistoryService()
         result = await service.get_by_id(id)
         if not result:
             raise HTTPException(status_code=404, detail="Entrée historique non trouvée")
-        greenhouse = await GreenhouseService().get_by_id(result.greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(result.greenhouse_id)
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette entrée historique")
         return result
@@ -86,49 +124,76 @@ async def get_history(id: str, current_user: dict = Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/greenhouse/{greenhouse_id}", response_model=List[HistoryResponse])
+@router.get(
+    "/greenhouse/{greenhouse_id}",
+    response_model=Union[List[HistoryPartialResponse], Page[HistoryPartialResponse]],
+    response_model_exclude_unset=True
+)
 async def get_history_by_greenhouse(
     greenhouse_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    paginate: bool = Query(False, description="Retourner {items, total, total_is_estimate, next_cursor} au lieu d'une liste"),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (next_cursor), implique paginate ; skip est alors ignoré"),
+    current_user: dict = Depends(get_current_user),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service),
+    service: HistoryService = Depends(get_history_service)
 ):
     """Récupérer l'historique d'une serre"""
     try:
-        greenhouse = await GreenhouseService().get_by_id(greenhouse_id)
+        projection = parse_fields(fields, HistoryPartialResponse)
+        after = parse_cursor(cursor)
+        greenhouse = await greenhouse_service.get_by_id(greenhouse_id)
         if not greenhouse:
             raise HTTPException(status_code=404, detail="Serre non trouvée")
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette serre")
-        service = HistoryService()
-        return await service.get_by_greenhouse_id(greenhouse_id, skip, limit)
+        if paginate or after:
+            page = await service.get_page_by_greenhouse_id(
+                greenhouse_id, limit, after, skip, response_fields(HistoryPartialResponse, projection)
+            )
+            return fast_json_page_response(page, HistoryPartialResponse, HistoryModel, projection)
+        documents = await service.get_by_greenhouse_id(
+            greenhouse_id, skip, limit, response_fields(HistoryPartialResponse, projection), raw=True
+        )
+        return fast_json_response(documents, HistoryPartialResponse, HistoryModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[HistoryResponse])
-async def get_all_history(current_user: dict = Depends(get_current_admin)):
+@router.get("/", response_model=List[HistoryPartialResponse], response_model_exclude_unset=True)
+async def get_all_history(
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    current_user: dict = Depends(get_current_admin),
+    service: HistoryService = Depends(get_history_service)
+):
     """Récupérer toutes les entrées historiques (admins uniquement)"""
     try:
         if not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs")
-        service = HistoryService()
-        return await service.get_all()
+        projection = parse_fields(fields, HistoryPartialResponse)
+        documents = await service.get_all(fields=response_fields(HistoryPartialResponse, projection), raw=True)
+        return fast_json_response(documents, HistoryPartialResponse, HistoryModel, projection)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{id}")
-async def delete_history(id: str, current_user: dict = Depends(get_current_user)):
+async def delete_history(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: HistoryService = Depends(get_history_service),
+    greenhouse_service: GreenhouseService = Depends(get_greenhouse_service)
+):
     """Supprimer une entrée historique"""
     try:
-        service = HistoryService()
         history = await service.get_by_id(id)
         if not history:
             raise HTTPException(status_code=404, detail="Entrée historique non trouvée")
-        greenhouse = await GreenhouseService().get_by_id(history.greenhouse_id)
+        greenhouse = await greenhouse_service.get_by_id(history.greenhouse_id)
         if greenhouse.user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé à cette entrée historique")
         result = await service.delete(id)
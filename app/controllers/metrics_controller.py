@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Any, Dict, List
+from datetime import timedelta
+from app.monitoring.metrics import metrics
+from app.auth.jwt_handler import get_current_admin
+from app.config.container import get_slow_query_repository
+from app.repositories.slow_query_repository import SlowQueryRepository
+from app.repositories.index_reconciler import index_reconciler
+from app.schemas.slow_query_schema import SlowQueryOffender
+from app.utils.time_utils import get_local_time
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
+@router.get("/", response_model=Dict[str, Any], dependencies=[Depends(get_current_admin)])
+async def get_metrics():
+    """Récupérer les métriques du processus : cache, pool MongoDB, latences (admin uniquement)"""
+    try:
+        return metrics.snapshot()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/slow-queries", response_model=List[SlowQueryOffender], dependencies=[Depends(get_current_admin)])
+async def get_slow_queries(
+    limit: int = Query(10, ge=1, le=100, description="Nombre de groupes de requêtes à retourner"),
+    since_hours: int = Query(24, ge=1, description="Fenêtre d'analyse en heures"),
+    repository: SlowQueryRepository = Depends(get_slow_query_repository)
+):
+    """Récupérer les requêtes MongoDB les plus coûteuses (temps cumulé) par route (admin uniquement)"""
+    try:
+        return await repository.get_top_offenders(get_local_time() - timedelta(hours=since_hours), limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/indexes", response_model=Dict[str, Any], dependencies=[Depends(get_current_admin)])
+async def get_index_diff():
+    """Comparer les index déclarés aux index MongoDB, sans rien créer (admin uniquement)"""
+    try:
+        return {
+            "ready": index_reconciler.ready,
+            "last_error": index_reconciler.last_error,
+            "diff": await index_reconciler.diff()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Dict, Optional
 from app.services.settings_service import SettingsService
-from app.schemas.settings_schema import SettingsCreate, SettingsUpdate, SettingsResponse
+from app.schemas.settings_schema import SettingsCreate, SettingsUpdate, SettingsResponse, EffectiveSettingsResponse
 from app.auth.jwt_handler import get_current_user, get_current_admin
+from app.config.container import get_settings_service
 from datetime import datetime
 
 router = APIRouter(
@@ -11,10 +12,13 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=SettingsResponse)
-async def create_settings(settings: SettingsCreate, current_user: dict = Depends(get_current_user)):
+async def create_settings(
+    settings: SettingsCreate,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Créer de nouveaux paramètres"""
     try:
-        service = SettingsService()
         result = await service.create(settings)
         return result
     except HTTPException:
@@ -23,11 +27,13 @@ async def create_settings(settings: SettingsCreate, current_user: dict = Depends
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/count", response_model=Dict[str, int], dependencies=[Depends(get_current_admin)])
-async def count_settings():
+async def count_settings(
+    exact: bool = Query(False, description="Comptage exact (recalcul complet) au lieu de la valeur en cache"),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Compter les paramètres par préférence de notification (admin uniquement)"""
     try:
-        service = SettingsService()
-        return await service.count_by_notify()
+        return await service.count_by_notify(exact)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -35,20 +41,23 @@ async def count_settings():
 async def search_settings(
     user_id: str = Query(..., description="ID d'utilisateur à rechercher"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    service: SettingsService = Depends(get_settings_service)
 ):
     """Rechercher des paramètres par user_id (admin uniquement)"""
     try:
-        service = SettingsService()
         return await service.search_by_user_id(user_id, skip, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{id}", response_model=SettingsResponse)
-async def get_settings(id: str, current_user: dict = Depends(get_current_user)):
+async def get_settings(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Récupérer des paramètres par leur ID"""
     try:
-        service = SettingsService()
         result = await service.get_by_id(id)
         if not result:
             raise HTTPException(status_code=404, detail="Paramètres non trouvés")
@@ -61,13 +70,17 @@ async def get_settings(id: str, current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/user/{user_id}", response_model=SettingsResponse)
-async def get_settings_by_user(user_id: str, greenhouse_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def get_settings_by_user(
+    user_id: str,
+    greenhouse_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Récupérer les paramètres d'une serre d'un utilisateur"""
     try:
         query = {"user_id": user_id}
         if greenhouse_id:
             query["greenhouse_id"] = greenhouse_id
-        service = SettingsService()
         result = await service.get_by_user_id(query)
         if not result:
             raise HTTPException(status_code=404, detail="Paramètres non trouvés pour cet utilisateur")
@@ -77,19 +90,36 @@ async def get_settings_by_user(user_id: str, greenhouse_id: Optional[str] = None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/greenhouse/{user_id}", response_model=SettingsResponse)
-async def get_settings_by_greenhouse_id(user_id: str, greenhouse_id: str, current_user: dict = Depends(get_current_user)):
-    """Récupérer les paramètres d'une serre d'une serre"""
+@router.get("/user/{user_id}/all", response_model=List[EffectiveSettingsResponse])
+async def get_all_effective_settings_by_user(
+    user_id: str,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
+    """Récupérer en une fois les paramètres effectifs de toutes les serres d'un utilisateur"""
+    try:
+        if user_id != current_user["user_id"] and not current_user["is_admin"]:
+            raise HTTPException(status_code=403, detail="Accès non autorisé aux paramètres de cet utilisateur")
+        return await service.get_effective_for_user(user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/greenhouse/{user_id}", response_model=EffectiveSettingsResponse)
+async def get_settings_by_greenhouse_id(
+    user_id: str,
+    greenhouse_id: str,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
+    """Récupérer les paramètres effectifs d'une serre (défauts, puis paramètres de l'utilisateur, puis de la serre)"""
     try:
         if user_id != current_user["user_id"] and not current_user["is_admin"]:
             raise HTTPException(status_code=403, detail="Accès non autorisé aux paramètres de cette serre")
-        query = {"user_id": user_id, "greenhouse_id": greenhouse_id}
-        service = SettingsService()
-        result = await service.get_by_greenhouse_id(query)
+        result = await service.get_effective(greenhouse_id, user_id)
         if not result:
-            result = await service.get_default_settings()
-            result["user_id"] = user_id
-            result["greenhouse_id"] = greenhouse_id
+            raise HTTPException(status_code=404, detail="Paramètres non trouvés pour cette serre")
         return result
     except HTTPException:
         raise
@@ -97,19 +127,22 @@ async def get_settings_by_greenhouse_id(user_id: str, greenhouse_id: str, curren
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/", response_model=List[SettingsResponse], dependencies=[Depends(get_current_admin)])
-async def get_all_settings():
+async def get_all_settings(service: SettingsService = Depends(get_settings_service)):
     """Récupérer tous les paramètres (admin uniquement)"""
     try:
-        service = SettingsService()
         return await service.get_all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/admin/{id}", response_model=SettingsResponse)
-async def update_settings_admin(id: str, settings_update: SettingsUpdate, current_user: dict = Depends(get_current_admin)):
+async def update_settings_admin(
+    id: str,
+    settings_update: SettingsUpdate,
+    current_user: dict = Depends(get_current_admin),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Mettre à jour des paramètres"""
     try:
-        service = SettingsService()
         settings = await service.get_by_id(id)
         if not settings:
             raise HTTPException(status_code=404, detail="Paramètres non trouvés")
@@ -125,10 +158,14 @@ async def update_settings_admin(id: str, settings_update: SettingsUpdate, curren
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/user/{id}", response_model=SettingsResponse)
-async def update_settings_user(id: str, settings_update: SettingsUpdate, current_user: dict = Depends(get_current_user)):
+async def update_settings_user(
+    id: str,
+    settings_update: SettingsUpdate,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Mettre à jour des paramètres"""
     try:
-        service = SettingsService()
         result = await service.update(id, settings_update)
         if not result:
             raise HTTPException(status_code=404, detail="Paramètres non trouvé")
@@ -139,10 +176,13 @@ async def update_settings_user(id: str, settings_update: SettingsUpdate, current
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{id}")
-async def delete_settings(id: str, current_user: dict = Depends(get_current_user)):
+async def delete_settings(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Supprimer des paramètres"""
     try:
-        service = SettingsService()
         settings = await service.get_by_id(id)
         if not settings:
             raise HTTPException(status_code=404, detail="Paramètres non trouvés")
@@ -158,10 +198,12 @@ async def delete_settings(id: str, current_user: dict = Depends(get_current_user
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/default/", response_model=SettingsResponse)
-async def get_default_settings(current_user: Dict = Depends(get_current_user)):
+async def get_default_settings(
+    current_user: Dict = Depends(get_current_user),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Récupérer les paramètres par défaut"""
     try:
-        service = SettingsService()
         settings = await service.get_default_settings()
         if not settings:
             raise HTTPException(status_code=404, detail="Paramètres par défaut non trouvés")
@@ -172,29 +214,26 @@ async def get_default_settings(current_user: Dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des paramètres par défaut dans controller: {str(e)}")
 
 @router.put("/default", response_model=SettingsResponse)
-async def update_default_settings(settings_update: SettingsUpdate, current_user: Dict = Depends(get_current_admin)):
+async def update_default_settings(
+    settings_update: SettingsUpdate,
+    current_user: Dict = Depends(get_current_admin),
+    service: SettingsService = Depends(get_settings_service)
+):
     """Mettre à jour les paramètres par défaut (admin uniquement)"""
     if not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Seul un administrateur peut modifier les paramètres par défaut")
     try:
-        service = SettingsService()
         default_settings = await service.get_default_settings()
         if not default_settings:
             raise HTTPException(status_code=404, detail="Paramètres par défaut non trouvés")
         
         # Mettre à jour les champs non nuls
         update_data = settings_update.dict(exclude_unset=True)
-        update_data["updated_at"] = datetime.now()
-        
-        # Mettre à jour dans la base
-        result = await service.repository.collection.update_one(
-            {"is_default": True},
-            {"$set": update_data}
-        )
-        if result.modified_count == 0:
+
+        # Mettre à jour dans la base (le service invalide les paramètres effectifs mémorisés)
+        updated_settings = await service.update_default(update_data)
+        if not updated_settings:
             raise HTTPException(status_code=400, detail="Aucune modification appliquée")
-        
-        updated_settings = await service.get_default_settings()
         return updated_settings
     except HTTPException:
         raise
@@ -3,6 +3,7 @@ from typing import List, Dict
 from app.services.user_service import UserService
 from app.schemas.user_schema import UserCreate, UserUpdate, UserResponse
 from app.auth.jwt_handler import get_current_admin, get_current_user
+from app.config.container import get_user_service
 
 router = APIRouter(
     prefix="/users",
@@ -10,10 +11,9 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=UserResponse)
-async def create_user(user: UserCreate) -> UserResponse:
+async def create_user(user: UserCreate, service: UserService = Depends(get_user_service)) -> UserResponse:
     """Créer un nouvel utilisateur (admin uniquement)"""
     try:
-        service = UserService()
         result = await service.create(user)
         return result
     except HTTPException:
@@ -22,11 +22,13 @@ async def create_user(user: UserCreate) -> UserResponse:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/count", response_model=Dict[str, int], dependencies=[Depends(get_current_admin)])
-async def count_users():
+async def count_users(
+    exact: bool = Query(False, description="Comptage exact (recalcul complet) au lieu de la valeur en cache"),
+    service: UserService = Depends(get_user_service)
+):
     """Compter les utilisateurs par rôle (admin uniquement)"""
     try:
-        service = UserService()
-        return await service.count_by_role()
+        return await service.count_by_role(exact)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -34,20 +36,19 @@ async def count_users():
 async def search_users_by_email(
     email: str = Query(..., description="Email à rechercher"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    service: UserService = Depends(get_user_service)
 ):
     """Rechercher des utilisateurs par email (admin uniquement)"""
     try:
-        service = UserService()
         return await service.search_by_email(email, skip, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{id}", response_model=UserResponse, dependencies=[Depends(get_current_admin)])
-async def get_user(id: str):
+async def get_user(id: str, service: UserService = Depends(get_user_service)):
     """Récupérer un utilisateur par son ID (admin uniquement)"""
     try:
-        service = UserService()
         result = await service.get_by_id(id)
         if not result:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -56,19 +57,17 @@ async def get_user(id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[UserResponse], dependencies=[Depends(get_current_admin)])
-async def get_all_users():
+async def get_all_users(service: UserService = Depends(get_user_service)):
     """Récupérer tous les utilisateurs (admin uniquement)"""
     try:
-        service = UserService()
         return await service.get_all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{id}", response_model=UserResponse, dependencies=[Depends(get_current_user)])
-async def update_user(id: str, user_update: UserUpdate):
+async def update_user(id: str, user_update: UserUpdate, service: UserService = Depends(get_user_service)):
     """Mettre à jour un utilisateur"""
     try:
-        service = UserService()
         result = await service.update(id, user_update)
         if not result:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -79,10 +78,9 @@ async def update_user(id: str, user_update: UserUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{id}", dependencies=[Depends(get_current_admin)])
-async def delete_user(id: str):
+async def delete_user(id: str, service: UserService = Depends(get_user_service)):
     """Supprimer un utilisateur (admin uniquement)"""
     try:
-        service = UserService()
         result = await service.delete(id)
         if not result:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
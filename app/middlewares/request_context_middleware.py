@@ -0,0 +1,17 @@
+from app.utils.request_context import RequestContext, set_request_context, reset_request_context
+
+class RequestContextMiddleware:
+    """Middleware ASGI qui ouvre un RequestContext pour chaque requête HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = set_request_context(RequestContext(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_request_context(token)
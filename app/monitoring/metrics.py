@@ -0,0 +1,69 @@
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict
+import threading
+
+class MetricsRegistry:
+    """Registre de métriques en mémoire (compteurs, jauges, latences), utilisable depuis plusieurs threads"""
+
+    def __init__(self, max_samples: int = 2048):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, Deque[float]] = {}
+        self._timing_counts: Dict[str, int] = defaultdict(int)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Incrémenter un compteur"""
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Fixer la valeur d'une jauge"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: float) -> None:
+        """Faire varier une jauge (ex. connexions en cours d'utilisation)"""
+        with self._lock:
+            self._gauges[name] += delta
+
+    def observe(self, name: str, value_ms: float) -> None:
+        """Enregistrer une latence en millisecondes (fenêtre glissante des derniers échantillons)"""
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self.max_samples)
+            samples.append(value_ms)
+            self._timing_counts[name] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retourner l'état courant des métriques"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {name: (sorted(samples), self._timing_counts[name]) for name, samples in self._timings.items()}
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "timings": {name: self._summarize(samples, count) for name, (samples, count) in timings.items()}
+        }
+
+    @staticmethod
+    def _summarize(samples, count: int) -> Dict[str, float]:
+        if not samples:
+            return {"count": count}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+        return {
+            "count": count,
+            "avg": round(sum(samples) / len(samples), 3),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(samples[-1], 3)
+        }
+
+metrics = MetricsRegistry()
@@ -0,0 +1,64 @@
+from pymongo import monitoring
+from app.monitoring.metrics import MetricsRegistry, metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Exporter l'état du pool de connexions MongoDB (attente de checkout, connexions ouvertes et utilisées)"""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+
+    def pool_created(self, event):
+        logger.info(f"Pool de connexions MongoDB créé pour {event.address}")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.registry.increment("mongo.pool.cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.registry.add_gauge("mongo.pool.open", 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.registry.add_gauge("mongo.pool.open", -1)
+
+    def connection_check_out_started(self, event):
+        self.registry.add_gauge("mongo.pool.waiting", 1)
+
+    def connection_check_out_failed(self, event):
+        self.registry.add_gauge("mongo.pool.waiting", -1)
+        self.registry.increment(f"mongo.pool.checkout_failed.{event.reason}")
+        self.registry.observe("mongo.pool.checkout_wait_ms", event.duration * 1000)
+
+    def connection_checked_out(self, event):
+        self.registry.add_gauge("mongo.pool.waiting", -1)
+        self.registry.add_gauge("mongo.pool.in_use", 1)
+        self.registry.observe("mongo.pool.checkout_wait_ms", event.duration * 1000)
+
+    def connection_checked_in(self, event):
+        self.registry.add_gauge("mongo.pool.in_use", -1)
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Exporter la latence de chaque commande MongoDB (find, aggregate, insert...)"""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.registry.observe(f"mongo.command.{event.command_name}_ms", event.duration_micros / 1000)
+
+    def failed(self, event):
+        self.registry.increment(f"mongo.command.{event.command_name}.failed")
+        self.registry.observe(f"mongo.command.{event.command_name}_ms", event.duration_micros / 1000)
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Optional, Tuple
+from pymongo import monitoring
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.utils.batch_writer import BatchWriter
+from app.utils.request_context import get_request_context
+from app.utils.time_utils import get_local_time
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Commandes portant sur une collection, avec le champ contenant le filtre
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": None,
+    "update": None,
+    "delete": None,
+    "insert": None,
+    "getMore": None,
+}
+
+slow_query_writer = BatchWriter("slow_queries", flush_interval=2.0)
+
+def normalize_filter(value: Any) -> Any:
+    """Remplacer les valeurs d'un filtre par "?" en conservant les champs et opérateurs"""
+    if isinstance(value, dict):
+        return {key: normalize_filter(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return [normalize_filter(item) for item in value]
+    return "?"
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> Optional[str]:
+    """Forme normalisée de la requête, utilisée pour regrouper les requêtes lentes identiques"""
+    if command_name == "aggregate":
+        shape = [
+            {"$match": normalize_filter(stage["$match"])} if "$match" in stage else next(iter(stage), "?")
+            for stage in command.get("pipeline", [])
+        ]
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        shape = normalize_filter(statements[0].get("q", {}))
+    elif _FILTER_FIELDS.get(command_name):
+        shape = normalize_filter(command.get(_FILTER_FIELDS[command_name], {}))
+    else:
+        return None
+    return json.dumps(shape, sort_keys=True)
+
+def _docs_returned(reply: Dict[str, Any]) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if batch is not None else None
+    if "values" in reply:
+        return len(reply["values"])
+    n = reply.get("n")
+    return n if isinstance(n, int) else None
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Enregistrer les commandes MongoDB plus lentes que le seuil, avec la route FastAPI qui les a déclenchées"""
+
+    def __init__(self, threshold_ms: float, collection_name: str, writer: BatchWriter = slow_query_writer):
+        self.threshold_micros = threshold_ms * 1000
+        self.collection_name = collection_name
+        self.writer = writer
+        self._pending: Dict[Tuple[Any, int], Tuple[str, Dict[str, Any], Optional[str]]] = {}
+
+    def started(self, event):
+        if event.command_name not in _FILTER_FIELDS:
+            return
+        field = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(field)
+        # Ne pas journaliser nos propres écritures dans le journal des requêtes lentes
+        if not isinstance(collection, str) or collection == self.collection_name:
+            return
+        context = get_request_context()
+        self._pending[(event.connection_id, event.request_id)] = (
+            collection, event.command, context.route if context else None
+        )
+
+    def succeeded(self, event):
+        self._finish(event, event.reply, failed=False)
+
+    def failed(self, event):
+        self._finish(event, {}, failed=True)
+
+    def _finish(self, event, reply: Dict[str, Any], failed: bool) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None or event.duration_micros < self.threshold_micros:
+            return
+        collection, command, route = pending
+        record = {
+            "collection": collection,
+            "command": event.command_name,
+            "shape": query_shape(event.command_name, command),
+            "docs_returned": _docs_returned(reply),
+            "duration_ms": round(event.duration_micros / 1000, 3),
+            "route": route,
+            "failed": failed,
+            "recorded_at": get_local_time()
+        }
+        metrics.increment("mongo.slow_queries")
+        logger.warning(
+            f"Requête lente ({record['duration_ms']} ms) {collection}.{event.command_name} "
+            f"{record['shape']} route={route}"
+        )
+        self.writer.add(record)
+
+def get_slow_query_listener() -> Optional[SlowQueryListener]:
+    """Listener des requêtes lentes selon la configuration (None si désactivé)"""
+    if not settings.SLOW_QUERY_ENABLED:
+        return None
+    return SlowQueryListener(settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_COLLECTION)
@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from bson import ObjectId
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.config.settings import settings
+from app.utils.batch_writer import BatchWriter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Les commandes sont journalisées sans attendre MongoDB (voir ActuatorService._audit)
+actuator_audit_writer = BatchWriter("actuator_audit")
+
+class ActuatorAuditRepository(BaseRepository[Dict[str, Any]]):
+    """Repository du journal des changements d'actionneurs (collection plafonnée, en ajout seul)"""
+    indexes = [
+        IndexSpec([("greenhouse_id", 1), ("_id", -1)]),
+        IndexSpec([("actuator_id", 1), ("_id", -1)]),
+        IndexSpec([("greenhouse_id", 1), ("recorded_at", 1)])
+    ]
+
+    def __init__(self):
+        super().__init__(settings.ACTUATOR_AUDIT_COLLECTION)
+
+    async def ensure_collection(self) -> None:
+        """Créer la collection plafonnée si elle n'existe pas encore"""
+        await self.ensure_capped_collection(settings.ACTUATOR_AUDIT_COLLECTION_SIZE_BYTES)
+
+    async def get_timeline(
+        self,
+        greenhouse_id: str,
+        limit: int = 50,
+        before_id: Optional[str] = None,
+        actuator_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Changements d'une serre du plus récent au plus ancien, avant before_id (pagination par clé sur _id)"""
+        try:
+            filter_query: Dict[str, Any] = {"greenhouse_id": greenhouse_id}
+            if actuator_id:
+                filter_query["actuator_id"] = actuator_id
+            if before_id:
+                filter_query["_id"] = {"$lt": ObjectId(before_id)}
+            cursor = self.collection.find(filter_query).sort("_id", -1).limit(limit)
+            entries = []
+            async for document in cursor:
+                document["id"] = str(document.pop("_id"))
+                entries.append(document)
+            return entries
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du journal des actionneurs: {str(e)}")
+            raise
+
+    async def get_changes(self, greenhouse_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Changements d'une serre entre start (inclus) et end (exclu), dans l'ordre chronologique"""
+        try:
+            cursor = self.collection.find(
+                {"greenhouse_id": greenhouse_id, "recorded_at": {"$gte": start, "$lt": end}},
+                {"_id": 0, "actuator_id": 1, "type": 1, "action": 1, "value": 1, "is_active": 1, "recorded_at": 1}
+            ).sort([("recorded_at", 1), ("_id", 1)])
+            return await cursor.to_list(None)
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des changements d'actionneurs: {str(e)}")
+            raise
+
+    async def get_states_before(self, greenhouse_id: str, before: datetime) -> List[Dict[str, Any]]:
+        """Dernier changement connu de chaque actionneur de la serre avant la date before"""
+        try:
+            pipeline = [
+                {"$match": {"greenhouse_id": greenhouse_id, "recorded_at": {"$lt": before}}},
+                {"$sort": {"recorded_at": -1, "_id": -1}},
+                {"$group": {
+                    "_id": "$actuator_id",
+                    "type": {"$first": "$type"},
+                    "action": {"$first": "$action"},
+                    "value": {"$first": "$value"},
+                    "is_active": {"$first": "$is_active"}
+                }}
+            ]
+            states = []
+            async for document in self.collection.aggregate(pipeline):
+                document["actuator_id"] = document.pop("_id")
+                states.append(document)
+            return states
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération de l'état des actionneurs: {str(e)}")
+            raise
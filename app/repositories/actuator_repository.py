@@ -1,28 +1,74 @@
-from typing import List, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from typing import List, Dict, Any, Optional, Tuple
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.actuator_model import ActuatorModel
+import asyncio
 import logging
+from datetime import datetime
 from bson import ObjectId
+from pymongo import UpdateOne
+from app.utils.time_utils import get_local_time
 
 logger = logging.getLogger(__name__)
 
 class ActuatorRepository(BaseRepository[ActuatorModel]):
     """Repository pour gérer les actionneurs dans MongoDB"""
+    indexes = [IndexSpec("greenhouse_id"), IndexSpec([("greenhouse_id", 1), ("updated_at", 1)])]
 
     def __init__(self):
         super().__init__("actuators")
 
-    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Récupérer les actionneurs d'une serre"""
         try:
-            return await self.get_all(filter_query={"greenhouse_id": greenhouse_id}, skip=skip, limit=limit)
+            return await self.get_all(filter_query={"greenhouse_id": greenhouse_id}, skip=skip, limit=limit, fields=fields)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des actionneurs par greenhouse_id: {str(e)}")
             raise
     
+    async def has_changes_since(self, greenhouse_id: str, since: datetime) -> bool:
+        """Vérifier si un actionneur de la serre a été modifié après since"""
+        try:
+            document = await self.collection.find_one(
+                {"greenhouse_id": greenhouse_id, "updated_at": {"$gt": since}},
+                {"_id": 1}
+            )
+            return document is not None
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification des changements d'actionneurs: {str(e)}")
+            raise
+
+    async def apply_commands(self, greenhouse_id: str, commands: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Appliquer les commandes (id, champs) d'une serre en un seul bulk_write ordonné et retourner les états.
+
+        Toutes les commandes portent le même updated_at, ce qui permet à l'appareil d'identifier la scène.
+        """
+        try:
+            now = get_local_time()
+            ids = list(dict.fromkeys(id for id, _ in commands))
+            try:
+                await self.collection.bulk_write(
+                    [
+                        UpdateOne({"_id": ObjectId(id), "greenhouse_id": greenhouse_id}, {"$set": {**data, "updated_at": now}})
+                        for id, data in commands
+                    ],
+                    ordered=True
+                )
+            finally:
+                # Même en cas d'échec : les commandes précédant l'erreur ont été appliquées
+                await asyncio.gather(*(self._invalidate(id) for id in ids))
+            states = {}
+            async for document in self.collection.find({"_id": {"$in": [ObjectId(id) for id in ids]}}):
+                document["id"] = str(document.pop("_id"))
+                states[document["id"]] = document
+            return [states[id] for id in ids if id in states]
+        except Exception as e:
+            logger.error(f"Erreur lors de l'application des commandes d'actionneurs: {str(e)}")
+            raise
+
     async def delete(self, id: str) -> bool:
         try:
             result = await self.collection.delete_one({"_id": ObjectId(id)})
+            await self._invalidate(id)
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Erreur lors de la suppression de l'actionneur: {str(e)}")
@@ -0,0 +1,38 @@
+from typing import Any, Dict, List
+from pymongo import ReplaceOne
+from app.repositories.base_repository import BaseRepository, IndexSpec
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ActuatorUsageRepository(BaseRepository[Dict[str, Any]]):
+    """Repository de l'utilisation des actionneurs par serre et par jour clos (calculée depuis le journal des commandes)"""
+    indexes = [IndexSpec([("greenhouse_id", 1), ("day", 1)], unique=True)]
+
+    def __init__(self):
+        super().__init__("actuator_usage")
+
+    async def get_days(self, greenhouse_id: str, days: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Jours déjà calculés parmi days (dates ISO), indexés par jour"""
+        try:
+            cursor = self.collection.find({"greenhouse_id": greenhouse_id, "day": {"$in": days}}, {"_id": 0})
+            return {document["day"]: document async for document in cursor}
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération de l'utilisation des actionneurs: {str(e)}")
+            raise
+
+    async def save_days(self, greenhouse_id: str, documents: List[Dict[str, Any]]) -> None:
+        """Enregistrer (ou remplacer) les jours clos calculés en une seule écriture"""
+        if not documents:
+            return
+        try:
+            await self.collection.bulk_write(
+                [
+                    ReplaceOne({"greenhouse_id": greenhouse_id, "day": document["day"]}, document, upsert=True)
+                    for document in documents
+                ],
+                ordered=False
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement de l'utilisation des actionneurs: {str(e)}")
+            raise
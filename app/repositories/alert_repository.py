@@ -1,5 +1,5 @@
-from typing import List, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from typing import List, Dict, Any, Optional
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.alert_model import AlertModel
 import logging
 
@@ -7,22 +7,44 @@ logger = logging.getLogger(__name__)
 
 class AlertRepository(BaseRepository[AlertModel]):
     """Repository pour gérer les alertes dans MongoDB"""
+    indexes = [IndexSpec("greenhouse_id"), IndexSpec([("greenhouse_id", 1), ("is_resolved", 1), ("_id", -1)])]
 
     def __init__(self):
         super().__init__("alerts")
 
-    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Récupérer les alertes d'une serre"""
         try:
-            return await self.get_all(filter_query={"greenhouse_id": greenhouse_id}, skip=skip, limit=limit)
+            return await self.get_all(filter_query={"greenhouse_id": greenhouse_id}, skip=skip, limit=limit, fields=fields)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des alertes par greenhouse_id: {str(e)}")
             raise
 
-    async def count_by_status(self) -> Dict[str, int]:
-        """Compter les alertes par statut (résolues/non résolues)"""
+    async def get_unresolved_by_greenhouse_id(self, greenhouse_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Récupérer les alertes non résolues d'une serre (plus récentes d'abord)"""
         try:
-            pipeline = [
+            return await self.get_all(
+                filter_query={"greenhouse_id": greenhouse_id, "is_resolved": False},
+                limit=limit,
+                sort=[("_id", -1)]
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des alertes non résolues: {str(e)}")
+            raise
+
+    async def count_by_status(self, greenhouse_ids: Optional[List[str]] = None, exact: bool = False) -> Dict[str, int]:
+        """Compter les alertes par statut (résolues/non résolues), éventuellement pour certaines serres.
+
+        Le comptage global est servi depuis le cache sauf si exact=True.
+        """
+        if greenhouse_ids is not None:
+            return await self._count_by_status(greenhouse_ids)
+        return await self.cached_counts("by_status", self._count_by_status, exact)
+
+    async def _count_by_status(self, greenhouse_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        try:
+            pipeline = [] if greenhouse_ids is None else [{"$match": {"greenhouse_id": {"$in": greenhouse_ids}}}]
+            pipeline += [
                 {"$group": {"_id": "$is_resolved", "count": {"$sum": 1}}},
                 {"$project": {"_id": 0, "is_resolved": "$_id", "count": 1}}
             ]
@@ -38,7 +60,7 @@ class AlertRepository(BaseRepository[AlertModel]):
             logger.error(f"Erreur lors du comptage des alertes: {str(e)}")
             raise
 
-    async def search(self, query: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def search(self, query: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Rechercher des alertes par type ou message"""
         try:
             return await self.get_all(
@@ -49,7 +71,8 @@ class AlertRepository(BaseRepository[AlertModel]):
                     ]
                 },
                 skip=skip,
-                limit=limit
+                limit=limit,
+                fields=fields
             )
         except Exception as e:
             logger.error(f"Erreur lors de la recherche des alertes: {str(e)}")
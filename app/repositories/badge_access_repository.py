@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.config.settings import settings
+from app.utils.batch_writer import BatchWriter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Les passages aux portes sont journalisés sans attendre MongoDB (voir BadgeService.check_access)
+badge_access_writer = BatchWriter("badge_access")
+
+class BadgeAccessRepository(BaseRepository[Dict[str, Any]]):
+    """Repository du journal des passages de badges aux portes des serres"""
+    indexes = [
+        IndexSpec([("greenhouse_id", 1), ("_id", -1)]),
+        IndexSpec([("badge_id", 1), ("_id", -1)]),
+        IndexSpec("recorded_at", expireAfterSeconds=settings.BADGE_ACCESS_RETENTION_DAYS * 86400)
+    ]
+
+    def __init__(self):
+        super().__init__("badge_access_events")
+
+    async def get_by_greenhouse_id(self, greenhouse_id: str, limit: int = 50, before_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Passages d'une serre du plus récent au plus ancien, avant before_id (pagination par clé sur _id)"""
+        try:
+            filter_query: Dict[str, Any] = {"greenhouse_id": greenhouse_id}
+            if before_id:
+                filter_query["_id"] = {"$lt": ObjectId(before_id)}
+            events = []
+            async for document in self.collection.find(filter_query).sort("_id", -1).limit(limit):
+                document["id"] = str(document.pop("_id"))
+                events.append(document)
+            return events
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des passages de badges: {str(e)}")
+            raise
@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.badge_model import BadgeModel
 import logging
 
@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 class BadgeRepository(BaseRepository[BadgeModel]):
     """Repository pour gérer les badges dans MongoDB"""
+    indexes = [IndexSpec("greenhouse_id")]
+    # Compteur incrémenté à chaque écriture, surveillé par l'index des badges de chaque processus
+    VERSION_KEY = "badges:version"
 
     def __init__(self):
         super().__init__("badges")
@@ -1,17 +1,49 @@
-from typing import Optional, List, Dict, Any, Generic, TypeVar
+from typing import Optional, List, Dict, Any, Generic, TypeVar, Callable, Awaitable, Tuple
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import IndexModel
+from pymongo.errors import CollectionInvalid
 from app.config.database import Database
+from app.config.settings import settings
+import asyncio
 import logging
 from datetime import datetime
 from app.utils.time_utils import get_local_time
+from app.utils.request_context import get_request_context
+from app.utils.dataloader import DataLoader
+from app.cache.repository_cache import get_repository_cache, get_count_cache
+from app.utils.query_utils import encode_cursor
 
 T = TypeVar('T')
 
+class IndexSpec:
+    """Index déclaré par un repository (critical=True : requis avant que l'application soit prête)"""
+
+    def __init__(self, keys: Any, critical: bool = False, **options: Any):
+        self.model = IndexModel(keys, **options)
+        self.critical = critical
+
+    @property
+    def name(self) -> str:
+        return self.model.document["name"]
+
+    @property
+    def keys(self) -> Dict[str, Any]:
+        return dict(self.model.document["key"])
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        return {key: value for key, value in self.model.document.items() if key not in ("key", "name")}
+
 class BaseRepository(Generic[T]):
     """Repository de base avec des méthodes CRUD génériques"""
+    # Index de la collection, créés en arrière-plan au démarrage (voir index_reconciler)
+    indexes: List[IndexSpec] = []
+
     def __init__(self, collection_name: str):
         self.collection: AsyncIOMotorCollection = Database.smart_greenhouse_db[collection_name]
+        self.cache = get_repository_cache(collection_name)
+        self.count_cache = get_count_cache(collection_name)
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -27,27 +59,127 @@ class BaseRepository(Generic[T]):
             self.logger.error(f"Erreur lors de la création: {str(e)}")
             raise
 
-    async def get_by_id(self, id: str) -> Optional[Dict[str, Any]]:
+    async def ensure_capped_collection(self, size_bytes: int) -> None:
+        """Créer la collection en collection plafonnée (taille fixe, ordre d'insertion) si elle n'existe pas encore"""
+        try:
+            database = self.collection.database
+            if self.collection.name not in await database.list_collection_names():
+                await database.create_collection(self.collection.name, capped=True, size=size_bytes)
+                self.logger.info(f"Collection plafonnée {self.collection.name} créée")
+        except CollectionInvalid:
+            # Créée entre-temps par un autre worker
+            pass
+        except Exception as e:
+            self.logger.error(f"Erreur lors de la création de la collection plafonnée {self.collection.name}: {str(e)}")
+            raise
+
+    @staticmethod
+    def _projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+        """Construire la projection MongoDB à partir d'une liste de champs (None = document complet)"""
+        if not fields:
+            return None
+        projection = {"_id": 1}
+        for field in fields:
+            if field != "id":
+                projection[field] = 1
+        return projection
+
+    async def cached_counts(
+        self,
+        name: str,
+        compute: Callable[[], Awaitable[Dict[str, int]]],
+        exact: bool = False
+    ) -> Dict[str, int]:
+        """Comptage agrégé servi depuis le cache à TTL court (exact=True : recalcul immédiat)"""
+        if not exact:
+            counts = await self.count_cache.get(name)
+            if counts is not None:
+                return counts
+        counts = await compute()
+        await self.count_cache.set(name, counts)
+        return counts
+
+    async def get_by_id(self, id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """Récupérer un document par son ID"""
         try:
-            doc = await self.collection.find_one({"_id": ObjectId(id)})
+            if self.cache and not fields:
+                doc = await self.cache.get(id)
+                if doc is not None:
+                    return doc
+            doc = await self.collection.find_one({"_id": ObjectId(id)}, self._projection(fields))
             if doc:
                 doc["id"] = str(doc.pop("_id"))
+                if self.cache and not fields:
+                    await self.cache.set(doc["id"], doc)
             return doc
         except Exception as e:
             self.logger.error(f"Erreur lors de la récupération par ID: {str(e)}")
             raise
 
+    async def get_many(self, ids: List[str], fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Récupérer plusieurs documents en une seule requête $in (résultats dans l'ordre des IDs, None si absent)"""
+        try:
+            use_cache = self.cache is not None and not fields
+            docs = await self.cache.get_many(list(set(ids))) if use_cache else {}
+            object_ids = [ObjectId(id) for id in set(ids) if id not in docs and ObjectId.is_valid(id)]
+            if object_ids:
+                cursor = self.collection.find({"_id": {"$in": object_ids}}, self._projection(fields))
+                async for doc in cursor:
+                    doc["id"] = str(doc.pop("_id"))
+                    docs[doc["id"]] = doc
+                    if use_cache:
+                        await self.cache.set(doc["id"], doc)
+            return [docs.get(id) for id in ids]
+        except Exception as e:
+            self.logger.error(f"Erreur lors de la récupération multiple par ID: {str(e)}")
+            raise
+
+    async def load(self, id: str) -> Optional[Dict[str, Any]]:
+        """Récupérer un document par son ID via le DataLoader de la requête en cours (un seul $in par collection)"""
+        loader = self._get_loader()
+        if loader is None:
+            return await self.get_by_id(id)
+        return await loader.load(id)
+
+    async def load_many(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Récupérer plusieurs documents via le DataLoader de la requête en cours (ordre des IDs conservé)"""
+        loader = self._get_loader()
+        if loader is None:
+            return await self.get_many(ids)
+        return await loader.load_many(ids)
+
+    def _get_loader(self) -> Optional[DataLoader]:
+        context = get_request_context()
+        if context is None:
+            return None
+        loader = context.loaders.get(self.collection.name)
+        if loader is None:
+            loader = context.loaders[self.collection.name] = DataLoader(self.get_many)
+        return loader
+
+    async def _invalidate(self, id: str) -> None:
+        """Invalider le document dans le cache et dans le DataLoader de la requête en cours après une écriture"""
+        if self.cache:
+            await self.cache.invalidate(id)
+        context = get_request_context()
+        if context is not None and self.collection.name in context.loaders:
+            context.loaders[self.collection.name].clear(id)
+
     async def get_all(
         self,
         filter_query: Dict[str, Any] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None
     ) -> List[Dict[str, Any]]:
         """Récupérer tous les documents avec pagination"""
         try:
             filter_query = filter_query or {}
-            cursor = self.collection.find(filter_query).skip(skip).limit(limit)
+            cursor = self.collection.find(filter_query, self._projection(fields))
+            if sort:
+                cursor = cursor.sort(sort)
+            cursor = cursor.skip(skip).limit(limit)
             docs = []
             async for doc in cursor:
                 doc["id"] = str(doc.pop("_id"))
@@ -57,6 +189,76 @@ class BaseRepository(Generic[T]):
             self.logger.error(f"Erreur lors de la récupération: {str(e)}")
             raise
 
+    async def get_page(
+        self,
+        filter_query: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        after: Optional[Tuple[str, int]] = None,
+        skip: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Récupérer une page triée par _id et le total en une seule agrégation $facet.
+
+        after est le curseur décodé (dernier ID servi, nombre d'éléments déjà servis) ; skip ne s'applique
+        qu'à la première page : il est ignoré avec un curseur, qui tient déjà compte des éléments sautés.
+        Le $match, le tri et une limite à PAGE_TOTAL_CAP sont placés avant le $facet pour que la requête
+        reste indexée et bornée ; au-delà de cette limite le total est estimé (total_is_estimate=True).
+        """
+        try:
+            filter_query = filter_query or {}
+            page_filter = dict(filter_query)
+            if after:
+                skip = 0
+                page_filter["_id"] = {"$gt": ObjectId(after[0])}
+            offset = after[1] if after else skip
+            cap = settings.PAGE_TOTAL_CAP
+            items_pipeline = [{"$limit": limit + 1}]
+            projection = self._projection(fields)
+            if projection:
+                items_pipeline.append({"$project": projection})
+            pipeline = [
+                {"$match": page_filter},
+                {"$sort": {"_id": 1}},
+                {"$skip": skip},
+                {"$limit": cap + 1},
+                {"$facet": {"items": items_pipeline, "remaining": [{"$count": "value"}]}}
+            ]
+            result = (await self.collection.aggregate(pipeline).to_list(1))[0]
+            docs = result["items"][:limit]
+            for doc in docs:
+                doc["id"] = str(doc.pop("_id"))
+            remaining = result["remaining"][0]["value"] if result["remaining"] else 0
+            next_cursor = encode_cursor(docs[-1]["id"], offset + limit) if len(result["items"]) > limit else None
+            total = offset + remaining
+            total_is_estimate = remaining > cap
+            if total_is_estimate:
+                total = max(offset + cap + 1, await self.estimate_total(filter_query))
+            return {"items": docs, "total": total, "total_is_estimate": total_is_estimate, "next_cursor": next_cursor}
+        except Exception as e:
+            self.logger.error(f"Erreur lors de la récupération paginée: {str(e)}")
+            raise
+
+    async def delete_batch(self, filter_query: Dict[str, Any], batch_size: int) -> int:
+        """Supprimer au plus batch_size documents correspondant au filtre (un delete_many par lot) et retourner leur nombre"""
+        try:
+            cursor = self.collection.find(filter_query, {"_id": 1}).limit(batch_size)
+            ids = [doc["_id"] async for doc in cursor]
+            if not ids:
+                return 0
+            result = await self.collection.delete_many({"_id": {"$in": ids}})
+            if self.cache:
+                await asyncio.gather(*(self._invalidate(str(id)) for id in ids))
+            return result.deleted_count
+        except Exception as e:
+            self.logger.error(f"Erreur lors de la suppression par lot: {str(e)}")
+            raise
+
+    async def estimate_total(self, filter_query: Dict[str, Any]) -> int:
+        """Estimer le nombre de documents d'un filtre quand le comptage dépasse PAGE_TOTAL_CAP (0 si inconnu)"""
+        if not filter_query:
+            return await self.collection.estimated_document_count()
+        return 0
+
     async def update(self, id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Mettre à jour un document"""
         try:
@@ -65,6 +267,7 @@ class BaseRepository(Generic[T]):
                 {"_id": ObjectId(id)},
                 {"$set": data}
             )
+            await self._invalidate(id)
             if result.modified_count:
                 updated_doc = await self.get_by_id(id)
                 self.logger.info(f"Document mis à jour: {id}")
@@ -78,6 +281,7 @@ class BaseRepository(Generic[T]):
         """Supprimer un document"""
         try:
             result = await self.collection.delete_one({"_id": ObjectId(id)})
+            await self._invalidate(id)
             if result.deleted_count > 0:
                 self.logger.info(f"Document supprimé: {id}")
                 return True
@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.utils.time_utils import get_local_time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CascadeJobRepository(BaseRepository[Dict[str, Any]]):
+    """Repository des tâches de suppression en cascade (dépendants d'une serre supprimée)"""
+    indexes = [IndexSpec([("status", 1), ("created_at", 1)])]
+
+    def __init__(self):
+        super().__init__("cascade_jobs")
+
+    async def create_job(self, greenhouse_id: str, user_id: str, collections: List[str]) -> Dict[str, Any]:
+        """Enregistrer une tâche en attente"""
+        try:
+            return await self.create({
+                "greenhouse_id": greenhouse_id,
+                "user_id": user_id,
+                "status": "pending",
+                "deleted": {collection: 0 for collection in collections},
+                "error": None,
+                "attempts": 0,
+                "next_attempt_at": None,
+                "heartbeat_at": None,
+                "finished_at": None
+            })
+        except Exception as e:
+            logger.error(f"Erreur lors de la création de la tâche de suppression: {str(e)}")
+            raise
+
+    async def claim_next(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Prendre atomiquement la plus ancienne tâche due (ou abandonnée par un worker arrêté)"""
+        try:
+            now = get_local_time()
+            document = await self.collection.find_one_and_update(
+                {"$or": [
+                    {"status": "pending", "next_attempt_at": {"$not": {"$gt": now}}},
+                    {"status": "running", "heartbeat_at": {"$lt": now - timedelta(seconds=lease_seconds)}}
+                ]},
+                {"$set": {"status": "running", "heartbeat_at": now, "updated_at": now}, "$inc": {"attempts": 1}},
+                sort=[("created_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if document:
+                document["id"] = str(document.pop("_id"))
+            return document
+        except Exception as e:
+            logger.error(f"Erreur lors de la prise d'une tâche de suppression: {str(e)}")
+            raise
+
+    async def record_progress(self, id: str, collection: str, deleted: int) -> None:
+        """Ajouter les documents supprimés d'un lot et prolonger le bail de la tâche"""
+        try:
+            now = get_local_time()
+            await self.collection.update_one(
+                {"_id": ObjectId(id)},
+                {"$inc": {f"deleted.{collection}": deleted}, "$set": {"heartbeat_at": now, "updated_at": now}}
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement de la progression de la tâche {id}: {str(e)}")
+            raise
+
+    async def retry(self, id: str, error: str, next_attempt_at: datetime) -> None:
+        """Remettre une tâche en échec en attente jusqu'à next_attempt_at (reprise depuis le début, idempotente)"""
+        try:
+            await self.collection.update_one(
+                {"_id": ObjectId(id)},
+                {"$set": {
+                    "status": "pending",
+                    "error": error,
+                    "next_attempt_at": next_attempt_at,
+                    "updated_at": get_local_time()
+                }}
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la reprogrammation de la tâche {id}: {str(e)}")
+            raise
+
+    async def finish(self, id: str, status: str, error: Optional[str] = None) -> None:
+        """Marquer une tâche comme terminée (done) ou en échec (failed)"""
+        try:
+            now = get_local_time()
+            await self.collection.update_one(
+                {"_id": ObjectId(id)},
+                {"$set": {"status": status, "error": error, "finished_at": now, "updated_at": now}}
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la clôture de la tâche {id}: {str(e)}")
+            raise
@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional
+from pymongo import ReturnDocument
+from app.repositories.base_repository import BaseRepository
+from app.utils.time_utils import get_local_time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CounterRepository(BaseRepository[dict]):
+    """Repository des compteurs maintenus à l'écriture (ex. nombre d'historiques par serre)"""
+
+    def __init__(self):
+        super().__init__("counters")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Compteur {value, synced_at} (None s'il n'a pas encore été initialisé)"""
+        try:
+            return await self.collection.find_one({"_id": key}, {"value": 1, "synced_at": 1})
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture du compteur {key}: {str(e)}")
+            raise
+
+    async def get_value(self, key: str) -> Optional[int]:
+        """Valeur d'un compteur (None s'il n'a pas encore été initialisé)"""
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"value": 1})
+            return doc["value"] if doc else None
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture du compteur {key}: {str(e)}")
+            raise
+
+    async def increment(self, key: str, delta: int = 1, upsert: bool = False) -> None:
+        """Faire varier un compteur (sans upsert, sans effet s'il n'est pas initialisé : il sera calculé à la lecture)"""
+        try:
+            await self.collection.update_one({"_id": key}, {"$inc": {"value": delta}}, upsert=upsert)
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour du compteur {key}: {str(e)}")
+            raise
+
+    async def set_value(self, key: str, value: int) -> None:
+        """Initialiser ou resynchroniser un compteur avec une valeur exacte"""
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {"value": value, "synced_at": get_local_time()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation du compteur {key}: {str(e)}")
+            raise
+
+    async def seed(self, key: str, value: int) -> int:
+        """Initialiser un compteur s'il n'existe pas encore ; retourne la valeur enregistrée.
+
+        $setOnInsert ne remplace pas un compteur initialisé entre-temps par un autre processus (et déjà
+        incrémenté depuis) par une valeur comptée plus tôt.
+        """
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"_id": key},
+                {"$setOnInsert": {"value": value, "synced_at": get_local_time()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return doc["value"]
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation du compteur {key}: {str(e)}")
+            raise
+
+    async def reset(self, key: str) -> None:
+        """Supprimer un compteur (il sera recalculé à la prochaine lecture)"""
+        try:
+            await self.collection.delete_one({"_id": key})
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression du compteur {key}: {str(e)}")
+            raise
@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.config.settings import settings
+from app.utils.time_utils import get_local_time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmailOutboxRepository(BaseRepository[Dict[str, Any]]):
+    """Repository de la file d'envoi des e-mails (pending -> sending -> sent, ou failed après trop d'essais).
+
+    Tous les messages (envoyés, en échec ou jamais envoyés, qui peuvent contenir un lien de
+    réinitialisation) expirent EMAIL_OUTBOX_RETENTION_DAYS jours après leur dernière modification.
+    """
+    indexes = [
+        IndexSpec([("status", 1), ("next_attempt_at", 1)]),
+        IndexSpec("updated_at", expireAfterSeconds=settings.EMAIL_OUTBOX_RETENTION_DAYS * 86400)
+    ]
+
+    def __init__(self):
+        super().__init__("email_outbox")
+
+    async def enqueue(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Mettre des messages {to, subject, body} en file, envoyables immédiatement"""
+        try:
+            now = get_local_time()
+            documents = [
+                {
+                    **message,
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "lease_until": None,
+                    "claimed_by": None,
+                    "last_error": None,
+                    "sent_at": None,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for message in messages
+            ]
+            result = await self.collection.insert_many(documents, ordered=False)
+            return [str(id) for id in result.inserted_ids]
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise en file des e-mails: {str(e)}")
+            raise
+
+    async def claim_batch(
+        self,
+        limit: int,
+        lease_seconds: float,
+        max_attempts: int
+    ) -> Tuple[Optional[ObjectId], List[Dict[str, Any]]]:
+        """Prendre jusqu'à limit messages dus (ou abandonnés par un worker arrêté) pour un seul envoi groupé.
+
+        Chaque prise compte une tentative : un message abandonné en cours d'envoi (worker arrêté) après
+        max_attempts tentatives est marqué failed au lieu d'être repris. Retourne le jeton de prise, à
+        passer à record_results, et les messages pris.
+        """
+        try:
+            now = get_local_time()
+            await self.collection.update_many(
+                {"status": "sending", "lease_until": {"$lt": now}, "attempts": {"$gte": max_attempts}},
+                {"$set": {
+                    "status": "failed",
+                    "last_error": "Envoi interrompu (bail expiré)",
+                    "lease_until": None,
+                    "updated_at": now
+                }}
+            )
+            due = {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "lease_until": {"$lt": now}}
+            ]}
+            candidates = await self.collection.find(due, {"_id": 1}).sort("next_attempt_at", 1).limit(limit).to_list(limit)
+            if not candidates:
+                return None, []
+            # Jeton de prise : seuls les messages encore dus au moment de l'update reviennent à ce worker
+            token = ObjectId()
+            await self.collection.update_many(
+                {"_id": {"$in": [candidate["_id"] for candidate in candidates]}, **due},
+                {"$set": {
+                    "status": "sending",
+                    "claimed_by": token,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now
+                }, "$inc": {"attempts": 1}}
+            )
+            messages = []
+            async for document in self.collection.find({"claimed_by": token, "status": "sending"}):
+                document["id"] = str(document.pop("_id"))
+                messages.append(document)
+            return token, messages
+        except Exception as e:
+            logger.error(f"Erreur lors de la prise des e-mails à envoyer: {str(e)}")
+            raise
+
+    async def record_results(self, token: ObjectId, sent: List[str], failed: List[Dict[str, Any]]) -> int:
+        """Enregistrer un envoi groupé : IDs envoyés, et échecs {id, error, next_attempt_at (None : abandon)}.
+
+        Seuls les messages encore pris avec token sont mis à jour : un message repris par un autre worker
+        après l'expiration du bail garde l'état enregistré par ce worker. Retourne le nombre de messages
+        mis à jour.
+        """
+        now = get_local_time()
+        operations = [
+            UpdateOne(
+                {"_id": ObjectId(id), "claimed_by": token, "status": "sending"},
+                {"$set": {"status": "sent", "sent_at": now, "lease_until": None, "updated_at": now}}
+            )
+            for id in sent
+        ] + [
+            UpdateOne(
+                {"_id": ObjectId(failure["id"]), "claimed_by": token, "status": "sending"},
+                {
+                    "$set": {
+                        "status": "pending" if failure["next_attempt_at"] else "failed",
+                        "next_attempt_at": failure["next_attempt_at"],
+                        "last_error": failure["error"],
+                        "lease_until": None,
+                        "updated_at": now
+                    }
+                }
+            )
+            for failure in failed
+        ]
+        if not operations:
+            return 0
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            return result.matched_count
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement des envois d'e-mails: {str(e)}")
+            raise
@@ -1,5 +1,6 @@
 from typing import Optional, List, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from bson import ObjectId
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.greenhouse_model import GreenhouseModel
 import logging
 
@@ -7,14 +8,15 @@ logger = logging.getLogger(__name__)
 
 class GreenhouseRepository(BaseRepository[GreenhouseModel]):
     """Repository pour gérer les serres dans MongoDB"""
+    indexes = [IndexSpec("user_id")]
 
     def __init__(self):
         super().__init__("greenhouses")
 
-    async def get_by_user_id(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def get_by_user_id(self, user_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Récupérer les serres d'un utilisateur"""
         try:
-            return await self.get_all(filter_query={"user_id": user_id}, skip=skip, limit=limit)
+            return await self.get_all(filter_query={"user_id": user_id}, skip=skip, limit=limit, fields=fields)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des serres par user_id: {str(e)}")
             raise
@@ -27,14 +29,48 @@ class GreenhouseRepository(BaseRepository[GreenhouseModel]):
             logger.error(f"Erreur lors de la récupération des serres par user_id: {str(e)}")
             raise
 
-    async def search_by_name(self, name: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def search_by_name(self, name: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Rechercher des serres par nom (recherche partielle)"""
         try:
             return await self.get_all(
                 filter_query={"name": {"$regex": name, "$options": "i"}},  # Recherche insensible à la casse
                 skip=skip,
-                limit=limit
+                limit=limit,
+                fields=fields
             )
         except Exception as e:
             logger.error(f"Erreur lors de la recherche des serres par nom: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_notification_recipients(self, greenhouse_ids: List[str]) -> List[Dict[str, Any]]:
+        """Propriétaire (email) et paramètres de notification de plusieurs serres en une seule agrégation.
+
+        settings contient les documents de paramètres du propriétaire (niveau utilisateur et serres) ;
+        le choix du niveau applicable est fait par l'appelant.
+        """
+        try:
+            pipeline = [
+                {"$match": {"_id": {"$in": [ObjectId(id) for id in greenhouse_ids if ObjectId.is_valid(id)]}}},
+                {"$addFields": {"owner_id": {"$convert": {"input": "$user_id", "to": "objectId", "onError": None, "onNull": None}}}},
+                {"$lookup": {"from": "users", "localField": "owner_id", "foreignField": "_id", "as": "owner"}},
+                {"$lookup": {"from": "settings", "localField": "user_id", "foreignField": "user_id", "as": "settings"}},
+                {"$project": {
+                    "name": 1,
+                    "user_id": 1,
+                    "owner.email": 1,
+                    "owner.username": 1,
+                    "settings.greenhouse_id": 1,
+                    "settings.notify_by_email": 1
+                }}
+            ]
+            recipients = []
+            async for document in self.collection.aggregate(pipeline):
+                owner = document.pop("owner")
+                document["id"] = str(document.pop("_id"))
+                document["email"] = owner[0].get("email") if owner else None
+                document["username"] = owner[0].get("username") if owner else None
+                recipients.append(document)
+            return recipients
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des destinataires des serres: {str(e)}")
+            raise
@@ -1,6 +1,10 @@
 from typing import List, Dict, Any, Optional
-from app.repositories.base_repository import BaseRepository
+from bson import ObjectId
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.repositories.counter_repository import CounterRepository
 from app.models.history_model import HistoryModel
+from app.config.settings import settings
+from app.utils.time_utils import get_local_time, convert_to_local_time
 import logging
 from datetime import datetime
 
@@ -8,30 +12,132 @@ logger = logging.getLogger(__name__)
 
 class HistoryRepository(BaseRepository[HistoryModel]):
     """Repository pour gérer les historiques des capteurs dans MongoDB"""
+    indexes = [
+        IndexSpec("greenhouse_id"),
+        IndexSpec("recorded_at"),
+        IndexSpec([("greenhouse_id", 1), ("_id", -1)])
+    ]
 
-    def __init__(self):
+    def __init__(self, counters: Optional[CounterRepository] = None):
         super().__init__("history")
+        self.counters = counters or CounterRepository()
 
-    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _counter_key(greenhouse_id: str) -> str:
+        return f"history:{greenhouse_id}"
+
+    async def reset_counter(self, greenhouse_id: str) -> None:
+        """Oublier le compteur d'une serre (après une suppression en masse de son historique)"""
+        await self.counters.reset(self._counter_key(greenhouse_id))
+
+    async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Créer une entrée historique et incrémenter le compteur de la serre"""
+        created_doc = await super().create(data)
+        await self.counters.increment(self._counter_key(data["greenhouse_id"]))
+        return created_doc
+
+    async def delete(self, id: str) -> bool:
+        """Supprimer une entrée historique et décrémenter le compteur de la serre"""
+        try:
+            doc = await self.collection.find_one_and_delete({"_id": ObjectId(id)}, {"greenhouse_id": 1})
+            await self._invalidate(id)
+            if doc is None:
+                return False
+            await self.counters.increment(self._counter_key(doc["greenhouse_id"]), -1)
+            logger.info(f"Historique supprimé: {id}")
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression de l'historique: {str(e)}")
+            raise
+
+    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Récupérer l'historique d'une serre"""
         try:
             return await self.get_all(
                 filter_query={"greenhouse_id": greenhouse_id},
                 skip=skip,
-                limit=limit
+                limit=limit,
+                fields=fields
             )
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de l'historique par greenhouse_id: {str(e)}")
             raise
 
-    async def count_by_greenhouse_id(self, greenhouse_id: str) -> int:
-        """Compter les entrées historiques pour une serre"""
+    async def get_latest_by_greenhouse_id(self, greenhouse_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Récupérer les dernières mesures d'une serre (plus récentes d'abord).
+
+        Le tri se fait sur _id (ordre d'insertion) : recorded_at n'est pas toujours stocké.
+        """
         try:
-            return await self.collection.count_documents({"greenhouse_id": greenhouse_id})
+            return await self.get_all(
+                filter_query={"greenhouse_id": greenhouse_id},
+                limit=limit,
+                sort=[("_id", -1)]
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des dernières mesures: {str(e)}")
+            raise
+
+    async def estimate_total(self, filter_query: Dict[str, Any]) -> int:
+        """Le compteur de la serre sert d'estimation pour les pages de l'historique d'une serre.
+
+        Valeur enregistrée, même à resynchroniser (0 si le compteur n'existe pas) : aucun count_documents
+        dans une requête de page, qui n'atteint ce chemin que pour les serres les plus volumineuses. Le
+        compteur est initialisé et resynchronisé par count_by_greenhouse_id.
+        """
+        if set(filter_query) == {"greenhouse_id"}:
+            counter = await self.counters.get(self._counter_key(filter_query["greenhouse_id"]))
+            return counter["value"] if counter else 0
+        return await super().estimate_total(filter_query)
+
+    async def count_by_greenhouse_id(self, greenhouse_id: str, exact: bool = False) -> int:
+        """Compter les entrées historiques pour une serre.
+
+        La valeur vient du compteur maintenu à l'écriture. Il est calculé par count_documents lors de la
+        première lecture, puis recalculé toutes les HISTORY_COUNTER_RESYNC_SECONDS secondes ou si
+        exact=True : une écriture concurrente d'un calcul peut manquer au compteur jusqu'au recalcul suivant.
+        """
+        try:
+            key = self._counter_key(greenhouse_id)
+            counter = None if exact else await self.counters.get(key)
+            if counter is not None:
+                synced_at = counter.get("synced_at")
+                age = (get_local_time() - convert_to_local_time(synced_at)).total_seconds() if synced_at else None
+                if age is not None and age < settings.HISTORY_COUNTER_RESYNC_SECONDS:
+                    return counter["value"]
+            count = await self.collection.count_documents({"greenhouse_id": greenhouse_id})
+            if counter is None and not exact:
+                return await self.counters.seed(key, count)
+            await self.counters.set_value(key, count)
+            return count
         except Exception as e:
             logger.error(f"Erreur lors du comptage des historiques: {str(e)}")
             raise
 
+    @staticmethod
+    def search_filter(
+        greenhouse_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        temperature_min: Optional[float] = None,
+        temperature_max: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Construire le filtre de recherche par plage de dates ou valeurs de capteurs"""
+        filter_query = {"greenhouse_id": greenhouse_id}
+        if start_date or end_date:
+            filter_query["recorded_at"] = {}
+            if start_date:
+                filter_query["recorded_at"]["$gte"] = start_date
+            if end_date:
+                filter_query["recorded_at"]["$lte"] = end_date
+        if temperature_min is not None:
+            filter_query["temperature"] = filter_query.get("temperature", {})
+            filter_query["temperature"]["$gte"] = temperature_min
+        if temperature_max is not None:
+            filter_query["temperature"] = filter_query.get("temperature", {})
+            filter_query["temperature"]["$lte"] = temperature_max
+        return filter_query
+
     async def search(
         self,
         greenhouse_id: str,
@@ -40,24 +146,13 @@ class HistoryRepository(BaseRepository[HistoryModel]):
         temperature_min: Optional[float] = None,
         temperature_max: Optional[float] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """Rechercher des historiques par plage de dates ou valeurs de capteurs"""
         try:
-            filter_query = {"greenhouse_id": greenhouse_id}
-            if start_date or end_date:
-                filter_query["recorded_at"] = {}
-                if start_date:
-                    filter_query["recorded_at"]["$gte"] = start_date
-                if end_date:
-                    filter_query["recorded_at"]["$lte"] = end_date
-            if temperature_min is not None:
-                filter_query["temperature"] = filter_query.get("temperature", {})
-                filter_query["temperature"]["$gte"] = temperature_min
-            if temperature_max is not None:
-                filter_query["temperature"] = filter_query.get("temperature", {})
-                filter_query["temperature"]["$lte"] = temperature_max
-            return await self.get_all(filter_query=filter_query, skip=skip, limit=limit)
+            filter_query = self.search_filter(greenhouse_id, start_date, end_date, temperature_min, temperature_max)
+            return await self.get_all(filter_query=filter_query, skip=skip, limit=limit, fields=fields)
         except Exception as e:
             logger.error(f"Erreur lors de la recherche des historiques: {str(e)}")
             raise
\ No newline at end of file
@@ -0,0 +1,176 @@
+from typing import Any, Dict, List, Optional, Type
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.repositories.user_repository import UserRepository
+from app.repositories.greenhouse_repository import GreenhouseRepository
+from app.repositories.alert_repository import AlertRepository
+from app.repositories.history_repository import HistoryRepository
+from app.repositories.badge_repository import BadgeRepository
+from app.repositories.actuator_repository import ActuatorRepository
+from app.repositories.settings_repository import SettingsRepository
+from app.repositories.session_repository import SessionRepository
+from app.repositories.cascade_job_repository import CascadeJobRepository
+from app.repositories.actuator_audit_repository import ActuatorAuditRepository
+from app.repositories.actuator_usage_repository import ActuatorUsageRepository
+from app.repositories.badge_access_repository import BadgeAccessRepository
+from app.repositories.presence_repository import PresenceRepository
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Repositories dont les index déclarés sont réconciliés
+REPOSITORIES: List[Type[BaseRepository]] = [
+    UserRepository,
+    GreenhouseRepository,
+    AlertRepository,
+    HistoryRepository,
+    BadgeRepository,
+    ActuatorRepository,
+    SettingsRepository,
+    SessionRepository,
+    CascadeJobRepository,
+    ActuatorAuditRepository,
+    ActuatorUsageRepository,
+    BadgeAccessRepository,
+    PresenceRepository,
+    EmailOutboxRepository,
+]
+
+class IndexReconciler:
+    """Comparer les index déclarés par les repositories à ceux de MongoDB et créer les manquants.
+
+    La réconciliation tourne en tâche de fond après le démarrage : les collections sont traitées en
+    parallèle, les index critiques d'abord. L'application est prête (/ready) dès que tous les index
+    critiques existent.
+    """
+
+    def __init__(self, repositories: List[Type[BaseRepository]] = REPOSITORIES):
+        self.repositories = repositories
+        self.ready = False
+        self.last_diff: List[Dict[str, Any]] = []
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _entry(collection: str, spec: IndexSpec, status: str) -> Dict[str, Any]:
+        return {
+            "collection": collection,
+            "name": spec.name,
+            "keys": spec.keys,
+            "options": spec.options,
+            "critical": spec.critical,
+            "status": status
+        }
+
+    async def _diff_collection(self, repository: BaseRepository) -> List[Dict[str, Any]]:
+        """Différences pour une collection : present, missing, conflict (même nom, définition différente) ou extra"""
+        collection = repository.collection
+        existing = {}
+        async for index in collection.list_indexes():
+            existing[index["name"]] = index
+        diff = []
+        for spec in repository.indexes:
+            index = existing.pop(spec.name, None)
+            if index is None:
+                status = "missing"
+            elif dict(index["key"]) != spec.keys or any(index.get(key) != value for key, value in spec.options.items()):
+                status = "conflict"
+            else:
+                status = "present"
+            diff.append(self._entry(collection.name, spec, status))
+        for name, index in existing.items():
+            if name != "_id_":
+                diff.append({
+                    "collection": collection.name,
+                    "name": name,
+                    "keys": dict(index["key"]),
+                    "options": {key: value for key, value in index.items() if key not in ("key", "name", "v")},
+                    "critical": False,
+                    "status": "extra"
+                })
+        return diff
+
+    async def diff(self) -> List[Dict[str, Any]]:
+        """Calculer les différences pour toutes les collections, sans rien modifier (dry-run)"""
+        repositories = [repository_class() for repository_class in self.repositories]
+        diffs = await asyncio.gather(*(self._diff_collection(repository) for repository in repositories))
+        return [entry for diff in diffs for entry in diff]
+
+    async def _create_missing(self, repository: BaseRepository, names: List[str]) -> None:
+        specs = [spec for spec in repository.indexes if spec.name in names]
+        if not specs:
+            return
+        started = time.perf_counter()
+        await repository.collection.create_indexes([spec.model for spec in specs])
+        metrics.observe("indexes.create_ms", (time.perf_counter() - started) * 1000)
+        logger.info(f"Index créés sur {repository.collection.name}: {', '.join(spec.name for spec in specs)}")
+
+    async def reconcile(self, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """Créer les index manquants (critiques d'abord, collections en parallèle) et retourner le diff initial"""
+        repositories = [repository_class() for repository_class in self.repositories]
+        diffs = await asyncio.gather(*(self._diff_collection(repository) for repository in repositories))
+        self.last_diff = [entry for diff in diffs for entry in diff]
+        for entry in self.last_diff:
+            if entry["status"] != "present":
+                logger.warning(
+                    f"Index {entry['collection']}.{entry['name']} {entry['keys']}: {entry['status']}"
+                    f"{' (dry-run)' if dry_run else ''}"
+                )
+        missing = [
+            [entry for entry in diff if entry["status"] == "missing"]
+            for diff in diffs
+        ]
+        if dry_run:
+            self.ready = not any(entry["critical"] and entry["status"] != "present" for entry in self.last_diff)
+            return self.last_diff
+        for critical in (True, False):
+            await asyncio.gather(*(
+                self._create_missing(repository, [entry["name"] for entry in entries if entry["critical"] == critical])
+                for repository, entries in zip(repositories, missing)
+            ))
+            if critical:
+                # Un index critique en conflit (définition différente) doit être corrigé manuellement
+                conflicts = [entry for entry in self.last_diff if entry["critical"] and entry["status"] == "conflict"]
+                if conflicts:
+                    self.last_error = "Index critiques en conflit: " + ", ".join(
+                        f"{entry['collection']}.{entry['name']}" for entry in conflicts
+                    )
+                    logger.error(self.last_error)
+                else:
+                    self.ready = True
+                    logger.info("Index critiques disponibles, application prête")
+        return self.last_diff
+
+    async def _run(self, dry_run: bool) -> None:
+        while True:
+            try:
+                self.last_error = None
+                await self.reconcile(dry_run=dry_run)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                metrics.increment("indexes.reconcile_failed")
+                logger.error(f"Erreur lors de la réconciliation des index: {str(e)}")
+                await asyncio.sleep(settings.INDEX_RECONCILE_RETRY_SECONDS)
+
+    def start(self) -> None:
+        """Lancer la réconciliation en tâche de fond (nouvelle tentative périodique en cas d'échec)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(settings.INDEX_RECONCILE_DRY_RUN))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+index_reconciler = IndexReconciler()
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.repositories.base_repository import BaseRepository, IndexSpec
+from app.monitoring.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+class PresenceRepository(BaseRepository[Dict[str, Any]]):
+    """Repository des badges présents dans chaque serre, tenu à jour à partir des passages autorisés (un document par badge)"""
+    indexes = [
+        IndexSpec("badge_id", unique=True),
+        IndexSpec([("greenhouse_id", 1), ("entered_at", 1)])
+    ]
+
+    def __init__(self):
+        super().__init__("greenhouse_presence")
+
+    async def apply_events(self, events: List[Dict[str, Any]]) -> None:
+        """Appliquer un lot de passages : une entrée place le badge dans la serre, une sortie l'en retire.
+
+        Un badge n'est présent que dans une serre à la fois. Chaque worker écrit ses propres lots, qui
+        peuvent arriver dans le désordre : un passage n'est appliqué que s'il est plus récent que le
+        dernier appliqué au badge (last_event_at ; une sortie garde le document, present=False, pour
+        que l'entrée qui la précède ne soit pas réappliquée). Une sortie d'une autre serre que celle du
+        badge est ignorée. Un passage ignoré fait échouer l'upsert sur l'index unique de badge_id.
+        """
+        operations = []
+        for event in events:
+            if not event.get("allowed"):
+                continue
+            recorded_at = event["recorded_at"]
+            if event.get("direction") == "out":
+                operations.append(UpdateOne(
+                    {
+                        "badge_id": event["badge_id"],
+                        "greenhouse_id": event["greenhouse_id"],
+                        "last_event_at": {"$not": {"$gte": recorded_at}}
+                    },
+                    {"$set": {"present": False, "last_event_at": recorded_at}},
+                    upsert=True
+                ))
+            else:
+                operations.append(UpdateOne(
+                    {"badge_id": event["badge_id"], "last_event_at": {"$not": {"$gte": recorded_at}}},
+                    {"$set": {
+                        "greenhouse_id": event["greenhouse_id"],
+                        "entered_at": recorded_at,
+                        "present": True,
+                        "last_event_at": recorded_at
+                    }},
+                    upsert=True
+                ))
+        if not operations:
+            return
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors) or e.details.get("writeConcernErrors"):
+                logger.error(f"Erreur lors de la mise à jour des présences: {str(e)}")
+                raise
+            # Passages plus anciens que l'état enregistré : ignorés
+            metrics.increment("badges.presence.stale_events", len(errors))
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour des présences: {str(e)}")
+            raise
+
+    async def get_by_greenhouse_id(self, greenhouse_id: str) -> List[Dict[str, Any]]:
+        """Badges présents dans une serre, par ordre d'arrivée"""
+        try:
+            cursor = self.collection.find(
+                {"greenhouse_id": greenhouse_id, "present": {"$ne": False}},
+                {"_id": 0, "present": 0, "last_event_at": 0}
+            ).sort("entered_at", 1)
+            return await cursor.to_list(None)
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des présences: {str(e)}")
+            raise
+
+    async def remove_badge(self, badge_id: str) -> None:
+        """Retirer un badge supprimé de la serre où il se trouvait"""
+        try:
+            await self.collection.delete_one({"badge_id": badge_id})
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression de la présence du badge: {str(e)}")
+            raise
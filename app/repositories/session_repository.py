@@ -1,5 +1,5 @@
 from typing import Optional, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.session_model import SessionModel
 from app.utils.time_utils import get_local_time
 import logging
@@ -8,6 +8,7 @@ logger = logging.getLogger(__name__)
 
 class SessionRepository(BaseRepository[SessionModel]):
     """Repository pour gérer les sessions dans MongoDB"""
+    indexes = [IndexSpec("session_id", critical=True, unique=True)]
 
     def __init__(self):
         super().__init__("sessions")
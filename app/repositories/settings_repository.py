@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.settings_model import SettingsModel
 import logging
 
@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 class SettingsRepository(BaseRepository[SettingsModel]):
     """Repository pour gérer les paramètres dans MongoDB"""
+    indexes = [IndexSpec(["user_id", "greenhouse_id"], critical=True, unique=True)]
+    # Compteur incrémenté à chaque modification de paramètres (invalide les paramètres effectifs mémorisés)
+    VERSION_KEY = "settings:version"
 
     def __init__(self):
         super().__init__("settings")
@@ -22,8 +25,11 @@ class SettingsRepository(BaseRepository[SettingsModel]):
             logger.error(f"Erreur lors de la récupération des paramètres par user_id: {str(e)}")
             raise
 
-    async def count_by_notify(self) -> Dict[str, int]:
-        """Compter les paramètres par préférence de notification"""
+    async def count_by_notify(self, exact: bool = False) -> Dict[str, int]:
+        """Compter les paramètres par préférence de notification, servi depuis le cache sauf si exact=True"""
+        return await self.cached_counts("by_notify", self._count_by_notify, exact)
+
+    async def _count_by_notify(self) -> Dict[str, int]:
         try:
             pipeline = [
                 {"$group": {"_id": "$notify_by_email", "count": {"$sum": 1}}},
@@ -74,4 +80,44 @@ class SettingsRepository(BaseRepository[SettingsModel]):
             return None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération par greenhouse_id: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_layers(self, user_id: str, greenhouse_id: str) -> Dict[str, Dict[str, Any]]:
+        """Récupérer en une requête les paramètres par défaut, de l'utilisateur et de la serre.
+
+        Les paramètres de l'utilisateur sont le document sans greenhouse_id.
+        """
+        try:
+            cursor = self.collection.find({"$or": [
+                {"is_default": True},
+                {"user_id": user_id, "greenhouse_id": None},
+                {"user_id": user_id, "greenhouse_id": greenhouse_id}
+            ]})
+            layers = {}
+            async for document in cursor:
+                document["id"] = str(document.pop("_id"))
+                if document.get("is_default"):
+                    layers["default"] = document
+                elif document.get("greenhouse_id") == greenhouse_id:
+                    layers["greenhouse"] = document
+                else:
+                    layers["user"] = document
+            return layers
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des niveaux de paramètres: {str(e)}")
+            raise
+
+    async def get_user_layers(self, user_id: str, greenhouse_ids: List[str]) -> Dict[Optional[str], Dict[str, Any]]:
+        """Paramètres d'un utilisateur et de plusieurs de ses serres en une requête $in, indexés par greenhouse_id (None = utilisateur)"""
+        try:
+            cursor = self.collection.find({"user_id": user_id, "greenhouse_id": {"$in": [None, *greenhouse_ids]}})
+            documents = {}
+            async for document in cursor:
+                if document.get("is_default"):
+                    continue
+                document["id"] = str(document.pop("_id"))
+                documents[document.get("greenhouse_id")] = document
+            return documents
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des paramètres des serres de l'utilisateur: {str(e)}")
+            raise
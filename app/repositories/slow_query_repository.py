@@ -0,0 +1,47 @@
+from typing import Any, Dict, List
+from datetime import datetime
+from app.repositories.base_repository import BaseRepository
+from app.config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SlowQueryRepository(BaseRepository[Dict[str, Any]]):
+    """Repository du journal des requêtes lentes (collection plafonnée)"""
+
+    def __init__(self):
+        super().__init__(settings.SLOW_QUERY_COLLECTION)
+
+    async def ensure_collection(self) -> None:
+        """Créer la collection plafonnée si elle n'existe pas encore"""
+        await self.ensure_capped_collection(settings.SLOW_QUERY_COLLECTION_SIZE_BYTES)
+
+    async def get_top_offenders(self, since: datetime, limit: int = 10) -> List[Dict[str, Any]]:
+        """Regrouper les requêtes lentes par collection, commande, forme et route, triées par temps cumulé"""
+        try:
+            pipeline = [
+                {"$match": {"recorded_at": {"$gte": since}}},
+                {"$group": {
+                    "_id": {
+                        "collection": "$collection",
+                        "command": "$command",
+                        "shape": "$shape",
+                        "route": "$route"
+                    },
+                    "count": {"$sum": 1},
+                    "total_ms": {"$sum": "$duration_ms"},
+                    "avg_ms": {"$avg": "$duration_ms"},
+                    "max_ms": {"$max": "$duration_ms"},
+                    "max_docs_returned": {"$max": "$docs_returned"},
+                    "last_seen": {"$max": "$recorded_at"}
+                }},
+                {"$sort": {"total_ms": -1}},
+                {"$limit": limit}
+            ]
+            offenders = []
+            async for doc in self.collection.aggregate(pipeline):
+                offenders.append({**doc.pop("_id"), **doc})
+            return offenders
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des requêtes lentes: {str(e)}")
+            raise
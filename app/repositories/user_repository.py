@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, IndexSpec
 from app.models.user_model import UserModel
 import logging
 
@@ -7,6 +7,7 @@ logger = logging.getLogger(__name__)
 
 class UserRepository(BaseRepository[UserModel]):
     """Repository pour gérer les utilisateurs dans MongoDB"""
+    indexes = [IndexSpec("email", critical=True, unique=True)]
 
     def __init__(self):
         super().__init__("users")
@@ -22,8 +23,11 @@ class UserRepository(BaseRepository[UserModel]):
             logger.error(f"Erreur lors de la récupération par email: {str(e)}")
             raise
 
-    async def count_by_role(self) -> Dict[str, int]:
-        """Compter les utilisateurs par rôle (admin/non-admin)"""
+    async def count_by_role(self, exact: bool = False) -> Dict[str, int]:
+        """Compter les utilisateurs par rôle (admin/non-admin), servi depuis le cache sauf si exact=True"""
+        return await self.cached_counts("by_role", self._count_by_role, exact)
+
+    async def _count_by_role(self) -> Dict[str, int]:
         try:
             pipeline = [
                 {"$group": {"_id": "$is_admin", "count": {"$sum": 1}}},
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 
 class ActuatorCreate(BaseModel):
     greenhouse_id: str
@@ -12,6 +12,10 @@ class ActuatorUpdate(BaseModel):
     value: Optional[float] = None
     is_active: Optional[bool] = None
 
+class ActuatorCommand(ActuatorUpdate):
+    """Commande d'un actionneur dans une scène (POST /actuators/greenhouse/{greenhouse_id}/commands)"""
+    id: str = Field(..., description="ID de l'actionneur")
+
 class ActuatorResponse(BaseModel):
     id: str
     greenhouse_id: str
@@ -22,4 +26,57 @@ class ActuatorResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ActuatorPartialResponse(BaseModel):
+    id: Optional[str] = None
+    greenhouse_id: Optional[str] = None
+    type: Optional[str] = None
+    value: Optional[float] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ActuatorChanges(BaseModel):
+    """Réponse du long-poll des actionneurs d'une serre"""
+    changed: bool = Field(..., description="Un actionneur a changé (sinon le délai d'attente a expiré)")
+    epoch: str = Field(..., description="Processus ayant répondu, à renvoyer dans ?epoch= avec version")
+    version: int = Field(..., description="Version de la serre dans ce processus, à renvoyer dans ?version=")
+    watermark: Optional[datetime] = Field(None, description="Dernier updated_at connu, à renvoyer dans ?since=")
+    actuators: List[ActuatorResponse] = Field(default_factory=list, description="État des actionneurs (vide si rien n'a changé)")
+
+class ActuatorAuditEntry(BaseModel):
+    """Changement d'un actionneur dans le journal des commandes"""
+    id: str = Field(..., description="Identifiant de l'entrée")
+    actuator_id: str = Field(..., description="ID de l'actionneur")
+    greenhouse_id: str = Field(..., description="ID de la serre")
+    type: Optional[str] = Field(None, description="Type d'actionneur")
+    action: str = Field(..., description="create, update ou delete")
+    changes: Dict[str, Any] = Field(default_factory=dict, description="Champs modifiés par la commande")
+    value: Optional[float] = Field(None, description="Valeur après la commande")
+    is_active: Optional[bool] = Field(None, description="État après la commande")
+    source: Optional[str] = Field(None, description="Origine : user:<id>, rule:<règles> ou system")
+    recorded_at: datetime = Field(..., description="Date du changement")
+
+class ActuatorAuditPage(BaseModel):
+    """Page du journal des commandes d'une serre"""
+    items: List[ActuatorAuditEntry] = Field(..., description="Changements, du plus récent au plus ancien")
+    next_cursor: Optional[str] = Field(None, description="Curseur de la page suivante (None sur la dernière page)")
+
+class ActuatorTypeUsage(BaseModel):
+    """Utilisation d'un type d'actionneur sur un jour"""
+    type: Optional[str] = Field(None, description="Type d'actionneur")
+    actuator_count: int = Field(..., description="Nombre d'actionneurs de ce type présents dans la journée")
+    on_seconds: float = Field(..., description="Temps de marche cumulé (secondes)")
+    duty_cycle: float = Field(..., description="Part du temps en marche, entre 0 et 1 (moyenne des actionneurs)")
+    switch_count: int = Field(..., description="Nombre de mises en marche")
+
+class ActuatorUsageDay(BaseModel):
+    """Utilisation des actionneurs d'une serre sur un jour"""
+    day: date = Field(..., description="Jour (fuseau horaire configuré)")
+    complete: bool = Field(..., description="False pour le jour en cours, calculé jusqu'à maintenant")
+    period_seconds: float = Field(..., description="Durée couverte par le calcul (secondes)")
+    types: List[ActuatorTypeUsage] = Field(default_factory=list, description="Utilisation par type d'actionneur")
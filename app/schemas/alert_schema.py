@@ -36,4 +36,18 @@ class AlertResponse(AlertBase):
         data = obj.dict()
         data["created_at"] = convert_to_local_time(data["created_at"])
         data["updated_at"] = convert_to_local_time(data["updated_at"])
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+class AlertPartialResponse(BaseModel):
+    """Schéma pour la réponse partielle d'une alerte (projection ?fields=)"""
+    greenhouse_id: Optional[str] = Field(None, description="ID de la serre associée")
+    type: Optional[str] = Field(None, description="Type d'alerte")
+    value: Optional[float] = Field(None, description="Valeur du capteur ayant déclenché l'alerte")
+    message: Optional[str] = Field(None, description="Message descriptif de l'alerte")
+    is_resolved: Optional[bool] = Field(None, description="Statut de résolution")
+    id: Optional[str] = Field(None, description="Identifiant unique")
+    created_at: Optional[datetime] = Field(None, description="Date de création")
+    updated_at: Optional[datetime] = Field(None, description="Date de mise à jour")
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from app.utils.time_utils import convert_to_local_time
 
@@ -33,4 +33,37 @@ class BadgeResponse(BadgeBase):
         data = obj.dict()
         data["created_at"] = convert_to_local_time(data["created_at"])
         data["updated_at"] = convert_to_local_time(data["updated_at"])
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+class BadgeAccessRequest(BaseModel):
+    """Demande d'ouverture envoyée par un lecteur de badge"""
+    badge_id: str = Field(..., description="ID du badge présenté")
+    greenhouse_id: str = Field(..., description="ID de la serre dont la porte est commandée")
+    direction: Literal["in", "out"] = Field("in", description="Lecteur d'entrée (in) ou de sortie (out)")
+
+class BadgeAccessDecision(BaseModel):
+    """Décision d'accès d'un badge à une serre"""
+    allowed: bool = Field(..., description="True si la porte doit s'ouvrir")
+    reason: Optional[str] = Field(None, description="Motif du refus : unknown_badge ou wrong_greenhouse")
+
+class BadgeAccessEvent(BaseModel):
+    """Passage d'un badge à une porte de serre"""
+    id: str = Field(..., description="Identifiant du passage")
+    badge_id: str = Field(..., description="ID du badge présenté")
+    greenhouse_id: str = Field(..., description="ID de la serre")
+    direction: str = Field(..., description="in ou out")
+    allowed: bool = Field(..., description="Décision rendue au lecteur")
+    reason: Optional[str] = Field(None, description="Motif du refus")
+    recorded_at: datetime = Field(..., description="Date du passage")
+
+class BadgeAccessPage(BaseModel):
+    """Page du journal des passages d'une serre"""
+    items: List[BadgeAccessEvent] = Field(..., description="Passages, du plus récent au plus ancien")
+    next_cursor: Optional[str] = Field(None, description="Curseur de la page suivante (None sur la dernière page)")
+
+class BadgePresence(BaseModel):
+    """Badge présent dans une serre"""
+    badge_id: str = Field(..., description="ID du badge")
+    name: Optional[str] = Field(None, description="Nom du badge")
+    user_id: Optional[str] = Field(None, description="ID de l'utilisateur associé")
+    entered_at: datetime = Field(..., description="Date de la dernière entrée")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from datetime import datetime
+
+class CascadeJobResponse(BaseModel):
+    """Schéma de l'état d'une suppression en cascade"""
+    id: str = Field(..., description="Identifiant de la tâche")
+    greenhouse_id: str = Field(..., description="ID de la serre supprimée")
+    user_id: str = Field(..., description="ID du propriétaire de la serre")
+    status: str = Field(..., description="pending, running, done ou failed")
+    deleted: Dict[str, int] = Field(..., description="Documents supprimés par collection")
+    error: Optional[str] = Field(None, description="Dernière erreur ayant interrompu la tâche")
+    attempts: int = Field(0, description="Nombre de tentatives")
+    next_attempt_at: Optional[datetime] = Field(None, description="Date de la prochaine tentative après un échec")
+    created_at: datetime = Field(..., description="Date de la suppression de la serre")
+    updated_at: datetime = Field(..., description="Date de la dernière progression")
+    finished_at: Optional[datetime] = Field(None, description="Date de fin de la tâche")
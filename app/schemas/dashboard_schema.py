@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.schemas.greenhouse_schema import GreenhouseResponse
+from app.schemas.history_schema import HistoryResponse
+from app.schemas.alert_schema import AlertResponse
+from app.schemas.actuator_schema import ActuatorResponse
+from app.schemas.settings_schema import EffectiveSettingsResponse
+
+class GreenhouseDashboard(BaseModel):
+    """Schéma de l'écran d'une serre : serre, dernières mesures, alertes non résolues, actionneurs et paramètres"""
+    greenhouse: GreenhouseResponse = Field(..., description="Serre")
+    latest_readings: List[HistoryResponse] = Field(..., description="Dernières mesures (plus récentes d'abord)")
+    unresolved_alerts: List[AlertResponse] = Field(..., description="Alertes non résolues (plus récentes d'abord)")
+    actuators: List[ActuatorResponse] = Field(..., description="Actionneurs de la serre")
+    settings: Optional[EffectiveSettingsResponse] = Field(None, description="Paramètres effectifs de la serre")
@@ -58,4 +58,29 @@ class GreenhouseResponse(GreenhouseBase):
         data = obj.dict()
         data["created_at"] = convert_to_local_time(data["created_at"])
         data["updated_at"] = convert_to_local_time(data["updated_at"])
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+class GreenhousePartialResponse(BaseModel):
+    """Schéma pour la réponse partielle d'une serre (projection ?fields=)"""
+    name: Optional[str] = Field(None, description="Nom de la serre")
+    description: Optional[str] = Field(None, description="Description de la serre")
+    location: Optional[str] = Field(None, description="Localisation de la serre")
+    user_id: Optional[str] = Field(None, description="ID de l'utilisateur propriétaire")
+    temperature: Optional[float] = Field(None, description="Température actuelle (°C)")
+    humidity: Optional[float] = Field(None, description="Humidité actuelle (%)")
+    light_level: Optional[float] = Field(None, description="Niveau de luminosité (lux)")
+    soil_moisture: Optional[float] = Field(None, description="Humidité du sol (%)")
+    ph_level: Optional[float] = Field(None, description="Niveau de pH (0-14)")
+    co2_level: Optional[float] = Field(None, description="Niveau de CO2 (ppm)")
+    temperature_threshold: Optional[float] = Field(None, description="Seuil de température pour les alertes (°C)")
+    humidity_threshold: Optional[float] = Field(None, description="Seuil d'humidité pour les alertes (%)")
+    ph_level_min: Optional[float] = Field(None, description="Seuil minimum de pH pour les alertes")
+    ph_level_max: Optional[float] = Field(None, description="Seuil maximum de pH pour les alertes")
+    co2_level_max: Optional[float] = Field(None, description="Seuil maximum de CO2 pour les alertes (ppm)")
+    is_active: Optional[bool] = Field(None, description="Statut d'activation")
+    id: Optional[str] = Field(None, description="Identifiant unique")
+    created_at: Optional[datetime] = Field(None, description="Date de création")
+    updated_at: Optional[datetime] = Field(None, description="Date de mise à jour")
+
+    class Config:
+        from_attributes = True
@@ -30,4 +30,19 @@ class HistoryResponse(HistoryBase):
         data = obj.dict()
         data["created_at"] = convert_to_local_time(data["created_at"])
         data["updated_at"] = convert_to_local_time(data["updated_at"])
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+class HistoryPartialResponse(BaseModel):
+    """Schéma pour la réponse partielle d'une entrée historique (projection ?fields=)"""
+    greenhouse_id: Optional[str] = Field(None, description="ID de la serre associée")
+    temperature: Optional[float] = Field(None, description="Température (°C)")
+    humidity: Optional[float] = Field(None, description="Humidité (%)")
+    light_level: Optional[float] = Field(None, description="Niveau de luminosité (lux)")
+    soil_moisture: Optional[float] = Field(None, description="Humidité du sol (%)")
+    ph_level: Optional[float] = Field(None, description="Niveau de pH (0-14)")
+    co2_level: Optional[float] = Field(None, description="Niveau de CO2 (ppm)")
+    id: Optional[str] = Field(None, description="Identifiant unique")
+    recorded_at: Optional[datetime] = Field(None, description="Date d'enregistrement")
+
+    class Config:
+        from_attributes = True
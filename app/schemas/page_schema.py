@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """Schéma d'une page de résultats avec le total"""
+    items: List[T] = Field(..., description="Éléments de la page")
+    total: int = Field(..., description="Nombre total d'éléments")
+    total_is_estimate: bool = Field(..., description="Total estimé (au-delà du plafond de comptage)")
+    next_cursor: Optional[str] = Field(None, description="Curseur de la page suivante (None sur la dernière page)")
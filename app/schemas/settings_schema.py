@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Dict
 from datetime import datetime
 from app.utils.time_utils import convert_to_local_time
 
@@ -57,4 +57,9 @@ class SettingsResponse(SettingsBase):
         data = obj.dict()
         data["created_at"] = convert_to_local_time(data["created_at"])
         data["updated_at"] = convert_to_local_time(data["updated_at"])
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+class EffectiveSettingsResponse(SettingsResponse):
+    """Paramètres effectifs d'une serre (défauts, utilisateur puis serre fusionnés champ par champ)"""
+    sources: Dict[str, str] = Field(default_factory=dict, description="Niveau d'origine de chaque valeur (default, user ou greenhouse)")
+    version: int = Field(0, description="Version des paramètres ayant servi au calcul")
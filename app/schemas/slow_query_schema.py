@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class SlowQueryOffender(BaseModel):
+    """Schéma d'un groupe de requêtes lentes identiques"""
+    collection: str = Field(..., description="Collection interrogée")
+    command: str = Field(..., description="Commande MongoDB (find, aggregate, update...)")
+    shape: Optional[str] = Field(None, description="Forme normalisée du filtre")
+    route: Optional[str] = Field(None, description="Route FastAPI à l'origine de la requête")
+    count: int = Field(..., description="Nombre d'occurrences")
+    total_ms: float = Field(..., description="Durée cumulée en millisecondes")
+    avg_ms: float = Field(..., description="Durée moyenne en millisecondes")
+    max_ms: float = Field(..., description="Durée maximale en millisecondes")
+    max_docs_returned: Optional[int] = Field(None, description="Nombre maximal de documents retournés")
+    last_seen: datetime = Field(..., description="Dernière occurrence")
@@ -0,0 +1,55 @@
+from typing import Dict
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class ActuatorHub:
+    """Notifications en mémoire des changements d'actionneurs, par serre (propre à chaque processus).
+
+    Chaque écriture d'un actionneur incrémente la version de sa serre et réveille les appareils en
+    attente (long-poll). Les versions repartent de 0 au redémarrage du processus : epoch distingue
+    les versions de deux processus (ou de deux démarrages) dans les ETag.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def version(self, greenhouse_id: str) -> int:
+        return self._versions.get(greenhouse_id, 0)
+
+    def etag(self, greenhouse_id: str) -> str:
+        """ETag de l'état des actionneurs d'une serre dans ce processus"""
+        return f'"{self.epoch}-{self.version(greenhouse_id)}"'
+
+    def publish(self, greenhouse_id: str) -> int:
+        """Signaler un changement dans une serre et retourner la nouvelle version"""
+        version = self._versions[greenhouse_id] = self.version(greenhouse_id) + 1
+        event = self._events.pop(greenhouse_id, None)
+        if event is not None:
+            event.set()
+        return version
+
+    async def wait(self, greenhouse_id: str, version: int, timeout: float) -> bool:
+        """Attendre que la version de la serre dépasse version (True) ou l'expiration du délai (False)"""
+        if self.version(greenhouse_id) != version:
+            return True
+        event = self._events.get(greenhouse_id)
+        if event is None:
+            event = self._events[greenhouse_id] = asyncio.Event()
+        self._waiters[greenhouse_id] = self._waiters.get(greenhouse_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters[greenhouse_id] -= 1
+            if not self._waiters[greenhouse_id]:
+                del self._waiters[greenhouse_id]
+                if self._events.get(greenhouse_id) is event:
+                    del self._events[greenhouse_id]
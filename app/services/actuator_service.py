@@ -1,15 +1,102 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
 from app.models.actuator_model import ActuatorModel
 from app.repositories.actuator_repository import ActuatorRepository
-from app.schemas.actuator_schema import ActuatorCreate, ActuatorUpdate, ActuatorResponse
-from app.services.base_service import BaseService
+from app.repositories.actuator_audit_repository import ActuatorAuditRepository, actuator_audit_writer
+from app.schemas.actuator_schema import ActuatorCreate, ActuatorUpdate, ActuatorResponse, ActuatorCommand
+from app.services.base_service import BaseService, build_model
+from app.services.actuator_hub import ActuatorHub
+from app.cache.actuator_state_cache import ActuatorStateCache
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.utils.batch_writer import BatchWriter
+from app.utils.query_utils import encode_cursor
+from app.utils.time_utils import get_local_time
+from bson import ObjectId
+from fastapi import HTTPException
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 class ActuatorService(BaseService[ActuatorModel, ActuatorCreate, ActuatorUpdate]):
-    def __init__(self):
-        self.repository = ActuatorRepository()
+    def __init__(
+        self,
+        repository: Optional[ActuatorRepository] = None,
+        hub: Optional[ActuatorHub] = None,
+        state_cache: Optional[ActuatorStateCache] = None,
+        audit_repository: Optional[ActuatorAuditRepository] = None,
+        audit_writer: BatchWriter = actuator_audit_writer
+    ):
+        self.repository = repository or ActuatorRepository()
+        self.hub = hub or ActuatorHub()
+        self.state_cache = state_cache or ActuatorStateCache(
+            settings.ACTUATOR_STATE_TTL_SECONDS, settings.ACTUATOR_STATE_MAX_GREENHOUSES
+        )
+        self.audit_repository = audit_repository or ActuatorAuditRepository()
+        self.audit_writer = audit_writer
+
+    def _audit(self, action: str, state: Dict[str, Any], changes: Dict[str, Any], source: str) -> None:
+        """Journaliser un changement d'actionneur sans attendre MongoDB (écriture groupée en arrière-plan)"""
+        if not settings.ACTUATOR_AUDIT_ENABLED:
+            return
+        self.audit_writer.add({
+            "actuator_id": state["id"],
+            "greenhouse_id": state["greenhouse_id"],
+            "type": state.get("type"),
+            "action": action,
+            "changes": changes,
+            "value": state.get("value"),
+            "is_active": state.get("is_active"),
+            "source": source,
+            "recorded_at": state.get("updated_at") if action != "delete" else get_local_time()
+        })
+
+    async def get_audit_page(
+        self,
+        greenhouse_id: str,
+        limit: int = 50,
+        after: Optional[Tuple[str, int]] = None,
+        actuator_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Page du journal des commandes d'une serre, du plus récent au plus ancien (curseur = dernière entrée servie)"""
+        try:
+            entries = await self.audit_repository.get_timeline(
+                greenhouse_id, limit + 1, after[0] if after else None, actuator_id
+            )
+            items = entries[:limit]
+            offset = (after[1] if after else 0) + len(items)
+            next_cursor = encode_cursor(items[-1]["id"], offset) if len(entries) > limit else None
+            return {"items": items, "next_cursor": next_cursor}
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du journal des actionneurs: {str(e)}")
+            raise
+
+    async def _load_state(self, greenhouse_id: str) -> List[Dict[str, Any]]:
+        """État des actionneurs d'une serre depuis la mémoire (MongoDB seulement si absent ou expiré)"""
+        states = self.state_cache.get(greenhouse_id)
+        if states is None:
+            # Noter les écritures de ce processus pendant la lecture : elles sont plus récentes que documents
+            journal = self.state_cache.begin_load(greenhouse_id)
+            try:
+                documents = await self.repository.get_by_greenhouse_id(greenhouse_id, limit=0)
+            except BaseException:
+                self.state_cache.end_load(greenhouse_id, journal)
+                raise
+            states, changed = self.state_cache.load(greenhouse_id, documents, journal)
+            if changed:
+                # Modifié par un autre processus depuis le dernier chargement (ou état précédent inconnu)
+                self.hub.publish(greenhouse_id)
+        return states
+
+    async def get_state(self, greenhouse_id: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """ETag (version) et état des actionneurs d'une serre, lus ensemble"""
+        try:
+            states = await self._load_state(greenhouse_id)
+            return self.hub.etag(greenhouse_id), states
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture de l'état des actionneurs: {str(e)}")
+            raise
     
     async def get_all(self, skip: int = 0, limit: int = 100) -> List[ActuatorResponse]:
         """Récupérer tous les actionneurs"""
@@ -31,40 +118,163 @@ class ActuatorService(BaseService[ActuatorModel, ActuatorCreate, ActuatorUpdate]
             logger.error(f"Erreur lors de la récupération de l'actionneur par ID: {str(e)}")
             raise
 
-    async def create(self, actuator: ActuatorCreate) -> ActuatorResponse:
+    async def create(self, actuator: ActuatorCreate, source: str = "system") -> ActuatorResponse:
         """Créer un nouvel actionneur"""
         try:
             actuator_dict = actuator.dict()
             created = await self.repository.create(actuator_dict)
+            self.state_cache.put(created)
+            self.hub.publish(created["greenhouse_id"])
+            self._audit("create", created, {"value": created["value"], "is_active": created["is_active"]}, source)
             return ActuatorResponse(**created)
         except Exception as e:
             logger.error(f"Erreur lors de la création de l'actionneur: {str(e)}")
             raise
     
-    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100) -> List[ActuatorResponse]:
-        """Récupérer les actionneurs d'une serre"""
+    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[ActuatorResponse]:
+        """Récupérer les actionneurs d'une serre (depuis l'état en mémoire, limit=0 : tous)"""
         try:
-            actuators = await self.repository.get_by_greenhouse_id(greenhouse_id, skip, limit)
-            return [ActuatorResponse(**actuator) for actuator in actuators]
+            actuators = await self._load_state(greenhouse_id)
+            actuators = actuators[skip:skip + limit] if limit else actuators[skip:]
+            return [build_model(ActuatorResponse, actuator, fields, trusted=True) for actuator in actuators]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des actionneurs: {str(e)}")
             raise
     
-    async def update(self, id: str, actuator_update: ActuatorUpdate) -> Optional[ActuatorResponse]:
+    async def apply_commands(
+        self,
+        greenhouse_id: str,
+        commands: List[ActuatorCommand],
+        source: str = "system"
+    ) -> List[ActuatorResponse]:
+        """Appliquer une scène (plusieurs commandes d'actionneurs d'une même serre) en une seule écriture"""
+        try:
+            ids = list(dict.fromkeys(command.id for command in commands))
+            invalid = [id for id in ids if not ObjectId.is_valid(id)]
+            if invalid:
+                raise HTTPException(status_code=400, detail=f"ID d'actionneur invalide: {', '.join(invalid)}")
+            # Refuser toute la scène si un actionneur n'appartient pas à la serre
+            known = await self.repository.get_all(
+                filter_query={"_id": {"$in": [ObjectId(id) for id in ids]}, "greenhouse_id": greenhouse_id},
+                limit=0,
+                fields=["id"]
+            )
+            missing = set(ids) - {actuator["id"] for actuator in known}
+            if missing:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Actionneurs non trouvés dans cette serre: {', '.join(sorted(missing))}"
+                )
+            changes = [(command.id, command.model_dump(exclude={"id"}, exclude_unset=True)) for command in commands]
+            try:
+                states = await self.repository.apply_commands(greenhouse_id, changes)
+            except Exception:
+                # Une partie des commandes a pu être appliquée : recharger l'état et réveiller les appareils
+                self.state_cache.invalidate(greenhouse_id)
+                self.hub.publish(greenhouse_id)
+                raise
+            for state in states:
+                self.state_cache.put(state)
+            self.hub.publish(greenhouse_id)
+            merged: Dict[str, Dict[str, Any]] = {}
+            for id, data in changes:
+                merged.setdefault(id, {}).update(data)
+            for state in states:
+                self._audit("update", state, merged.get(state["id"], {}), source)
+            return [ActuatorResponse(**state) for state in states]
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors de l'application des commandes d'actionneurs: {str(e)}")
+            raise
+
+    async def update(self, id: str, actuator_update: ActuatorUpdate, source: str = "system") -> Optional[ActuatorResponse]:
         """Mettre à jour un actionneur"""
         try:
             update_dict = actuator_update.dict(exclude_unset=True)
-            updated = await self.repository.update(id, update_dict)
+            # Le repository ajoute updated_at au dictionnaire : journaliser une copie des champs demandés
+            updated = await self.repository.update(id, dict(update_dict))
             if updated:
+                self.state_cache.put(updated)
+                self.hub.publish(updated["greenhouse_id"])
+                self._audit("update", updated, update_dict, source)
                 return ActuatorResponse(**updated)
             return None
         except Exception as e:
             logger.error(f"Erreur lors de la mise à jour de l'actionneur: {str(e)}")
             raise
             
-    async def delete(self, id: str) -> bool:
+    async def delete(self, id: str, source: str = "system") -> bool:
         try:
-            return await self.repository.delete(id)
+            actuator = await self.repository.get_by_id(id)
+            deleted = await self.repository.delete(id)
+            if deleted and actuator:
+                self.state_cache.remove(actuator["greenhouse_id"], id)
+                self.hub.publish(actuator["greenhouse_id"])
+                self._audit("delete", actuator, {}, source)
+            return deleted
         except Exception as e:
             logger.error(f"Erreur lors de la suppression de l'actionneur: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def _changed_since(self, greenhouse_id: str, since: datetime) -> bool:
+        changed = await self.repository.has_changes_since(greenhouse_id, since)
+        if changed:
+            # Écriture d'un autre processus : l'état en mémoire est peut-être périmé
+            self.state_cache.invalidate(greenhouse_id)
+        return changed
+
+    async def wait_for_changes(
+        self,
+        greenhouse_id: str,
+        version: Optional[int] = None,
+        since: Optional[datetime] = None,
+        timeout: float = 30,
+        epoch: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Attendre (long-poll) qu'un actionneur de la serre change après version ou since, ou l'expiration du délai.
+
+        version est la version retournée par ce processus (epoch) : la comparer ne coûte aucune requête.
+        Une version d'un autre processus (epoch différent) n'a pas de sens ici : elle est ignorée au profit
+        de since, ou l'état courant est retourné immédiatement sans since. since (updated_at) sert de repère
+        commun à tous les processus : il est vérifié en base au début puis toutes les
+        ACTUATOR_LONG_POLL_RECHECK_SECONDS secondes, pour voir les écritures faites ailleurs.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            current = self.hub.version(greenhouse_id)
+            if version is not None and epoch is not None and epoch != self.hub.epoch:
+                metrics.increment("actuators.long_poll.other_epoch")
+                version = None if since is not None else -1
+            changed = version is not None and version != current
+            if not changed and since is not None:
+                changed = await self._changed_since(greenhouse_id, since)
+            metrics.add_gauge("actuators.long_poll.waiting", 1)
+            try:
+                while not changed:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    changed = await self.hub.wait(
+                        greenhouse_id, current, min(remaining, settings.ACTUATOR_LONG_POLL_RECHECK_SECONDS)
+                    )
+                    if not changed and since is not None and deadline - loop.time() > 0:
+                        changed = await self._changed_since(greenhouse_id, since)
+            finally:
+                metrics.add_gauge("actuators.long_poll.waiting", -1)
+            metrics.increment(f"actuators.long_poll.{'changed' if changed else 'timeout'}")
+            if not changed:
+                return {"changed": False, "epoch": self.hub.epoch, "version": current, "watermark": since, "actuators": []}
+            actuators = await self._load_state(greenhouse_id)
+            watermarks = [actuator["updated_at"] for actuator in actuators if actuator.get("updated_at")]
+            return {
+                "changed": True,
+                "epoch": self.hub.epoch,
+                "version": self.hub.version(greenhouse_id),
+                "watermark": max(watermarks) if watermarks else since,
+                "actuators": [ActuatorResponse(**actuator) for actuator in actuators]
+            }
+        except Exception as e:
+            logger.error(f"Erreur lors de l'attente des changements d'actionneurs: {str(e)}")
+            raise
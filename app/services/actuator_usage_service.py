@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, time as day_time, timedelta
+from collections import defaultdict
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.repositories.actuator_audit_repository import ActuatorAuditRepository
+from app.repositories.actuator_usage_repository import ActuatorUsageRepository
+from app.utils.time_utils import get_local_time, convert_to_local_time
+import numpy as np
+import logging
+import pytz
+import time
+
+logger = logging.getLogger(__name__)
+
+def is_on(change: Dict[str, Any]) -> bool:
+    """Un actionneur consomme s'il est actif avec une valeur non nulle (supprimé : arrêté)"""
+    return change.get("action") != "delete" and bool(change.get("is_active")) and (change.get("value") or 0) > 0
+
+def compute_day_usage(
+    initial: Dict[str, Dict[str, Any]],
+    changes: List[Dict[str, Any]],
+    start: float,
+    end: float
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Temps de marche, taux de marche et mises en marche par type d'actionneur sur [start, end[ (timestamps).
+
+    initial contient l'état {type, on} de chaque actionneur à start ; changes les changements de la
+    période dans l'ordre chronologique. Chaque état (initial ou changement) ouvre un intervalle qui dure
+    jusqu'au changement suivant du même actionneur, ou jusqu'à end. Retourne l'utilisation par type et
+    l'état de chaque actionneur à end (état initial du jour suivant).
+    """
+    actuators: Dict[str, int] = {}
+    types: Dict[str, Any] = {}
+    rows_actuator, rows_time, rows_on, rows_initial = [], [], [], []
+    for actuator_id, state in initial.items():
+        actuators[actuator_id] = len(actuators)
+        types[actuator_id] = state["type"]
+        rows_actuator.append(actuators[actuator_id])
+        rows_time.append(start)
+        rows_on.append(state["on"])
+        rows_initial.append(True)
+    deleted = set()
+    for change in changes:
+        actuator_id = change["actuator_id"]
+        if actuator_id not in actuators:
+            actuators[actuator_id] = len(actuators)
+        types[actuator_id] = change.get("type") or types.get(actuator_id)
+        if change.get("action") == "delete":
+            deleted.add(actuator_id)
+        else:
+            deleted.discard(actuator_id)
+        rows_actuator.append(actuators[actuator_id])
+        rows_time.append(min(max(change["timestamp"], start), end))
+        rows_on.append(is_on(change))
+        rows_initial.append(False)
+    if not actuators:
+        return [], {}
+
+    actuator = np.asarray(rows_actuator, dtype=np.int64)
+    at = np.asarray(rows_time, dtype=np.float64)
+    on = np.asarray(rows_on, dtype=bool)
+    first = np.asarray(rows_initial, dtype=bool)
+    # Tri stable par actionneur puis par date : l'état initial précède les changements simultanés
+    order = np.lexsort((at, actuator))
+    actuator, at, on, first = actuator[order], at[order], on[order], first[order]
+    last_of_actuator = np.append(actuator[1:] != actuator[:-1], True)
+    first_of_actuator = np.insert(actuator[1:] != actuator[:-1], 0, True)
+    until = np.where(last_of_actuator, end, np.append(at[1:], end))
+    durations = np.clip(until - at, 0, None)
+    # Mise en marche : passage de l'arrêt à la marche, sauf pour l'état initial du jour
+    previous_on = np.insert(on[:-1], 0, False)
+    previous_on[first_of_actuator] = False
+    switched_on = on & ~previous_on & ~first
+
+    count = len(actuators)
+    on_seconds = np.bincount(actuator, weights=durations * on, minlength=count)
+    switches = np.bincount(actuator, weights=switched_on, minlength=count)
+    final_on = np.zeros(count, dtype=bool)
+    final_on[actuator[last_of_actuator]] = on[last_of_actuator]
+
+    period = max(end - start, 0)
+    by_type: Dict[Any, Dict[str, float]] = defaultdict(lambda: {"actuator_count": 0, "on_seconds": 0.0, "switch_count": 0})
+    for actuator_id, index in actuators.items():
+        usage = by_type[types[actuator_id]]
+        usage["actuator_count"] += 1
+        usage["on_seconds"] += float(on_seconds[index])
+        usage["switch_count"] += int(switches[index])
+    usage = [
+        {
+            "type": actuator_type,
+            "actuator_count": values["actuator_count"],
+            "on_seconds": round(values["on_seconds"], 3),
+            "duty_cycle": round(values["on_seconds"] / (period * values["actuator_count"]), 6) if period else 0.0,
+            "switch_count": values["switch_count"]
+        }
+        for actuator_type, values in sorted(by_type.items(), key=lambda item: str(item[0]))
+    ]
+    end_states = {
+        actuator_id: {"type": types[actuator_id], "on": bool(final_on[index])}
+        for actuator_id, index in actuators.items()
+        if actuator_id not in deleted
+    }
+    return usage, end_states
+
+class ActuatorUsageService:
+    """Utilisation des actionneurs par jour (temps de marche, taux de marche, mises en marche) depuis le journal des commandes.
+
+    Les jours clos (fin du jour + ACTUATOR_USAGE_CLOSE_DELAY_SECONDS passée, pour laisser le journal
+    s'écrire) sont calculés une fois puis lus dans actuator_usage, avec l'état des actionneurs en fin de
+    jour qui sert d'état initial au jour suivant. Le jour en cours est recalculé à chaque appel.
+    """
+
+    def __init__(
+        self,
+        audit_repository: Optional[ActuatorAuditRepository] = None,
+        usage_repository: Optional[ActuatorUsageRepository] = None
+    ):
+        self.audit_repository = audit_repository or ActuatorAuditRepository()
+        self.usage_repository = usage_repository or ActuatorUsageRepository()
+
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        """Début du jour dans le fuseau configuré (gère les changements d'heure)"""
+        return pytz.timezone(settings.TIMEZONE).localize(datetime.combine(day, day_time.min))
+
+    async def _initial_states(self, greenhouse_id: str, day: date, previous: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        if previous is not None:
+            return previous["end_states"]
+        states = await self.audit_repository.get_states_before(greenhouse_id, self._day_start(day))
+        return {
+            state["actuator_id"]: {"type": state.get("type"), "on": is_on(state)}
+            for state in states
+            if state.get("action") != "delete"
+        }
+
+    async def get_usage(self, greenhouse_id: str, start_day: date, end_day: date) -> List[Dict[str, Any]]:
+        """Utilisation par type d'actionneur pour chaque jour de start_day à end_day (jours futurs exclus)"""
+        try:
+            now = get_local_time()
+            days = [
+                day for day in (start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1))
+                if self._day_start(day) <= now
+            ]
+            if not days:
+                return []
+            previous_day = days[0] - timedelta(days=1)
+            cached = await self.usage_repository.get_days(
+                greenhouse_id, [day.isoformat() for day in [previous_day] + days]
+            )
+            missing = [day for day in days if day.isoformat() not in cached]
+            metrics.increment("actuators.usage.cached_days", len(days) - len(missing))
+            computed: Dict[str, Dict[str, Any]] = {}
+            if missing:
+                started = time.perf_counter()
+                first, last = missing[0], missing[-1]
+                states = await self._initial_states(
+                    greenhouse_id, first, cached.get((first - timedelta(days=1)).isoformat())
+                )
+                range_end = min(self._day_start(last + timedelta(days=1)), now)
+                changes = await self.audit_repository.get_changes(greenhouse_id, self._day_start(first), range_end)
+                timestamps = np.asarray(
+                    [convert_to_local_time(change["recorded_at"]).timestamp() for change in changes], dtype=np.float64
+                )
+                to_save = []
+                day = first
+                while day <= last:
+                    start = self._day_start(day)
+                    day_end = self._day_start(day + timedelta(days=1))
+                    end = min(day_end, now)
+                    lower, upper = np.searchsorted(timestamps, [start.timestamp(), end.timestamp()], side="left")
+                    day_changes = [
+                        {**change, "timestamp": float(timestamp)}
+                        for change, timestamp in zip(changes[lower:upper], timestamps[lower:upper])
+                    ]
+                    usage, states = compute_day_usage(states, day_changes, start.timestamp(), end.timestamp())
+                    complete = (now - day_end).total_seconds() >= settings.ACTUATOR_USAGE_CLOSE_DELAY_SECONDS
+                    document = {
+                        "greenhouse_id": greenhouse_id,
+                        "day": day.isoformat(),
+                        "complete": complete,
+                        "period_seconds": (end - start).total_seconds(),
+                        "types": usage,
+                        "end_states": states
+                    }
+                    computed[document["day"]] = document
+                    if complete and document["day"] not in cached:
+                        to_save.append(document)
+                    day += timedelta(days=1)
+                await self.usage_repository.save_days(greenhouse_id, to_save)
+                metrics.increment("actuators.usage.computed_days", len(missing))
+                metrics.observe("actuators.usage.compute_ms", (time.perf_counter() - started) * 1000)
+            return [cached.get(day.isoformat()) or computed[day.isoformat()] for day in days]
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul de l'utilisation des actionneurs: {str(e)}")
+            raise
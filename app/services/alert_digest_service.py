@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.repositories.greenhouse_repository import GreenhouseRepository
+from app.repositories.settings_repository import SettingsRepository
+from app.services.email_service import EmailOutboxService
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+def wants_email(recipient: Dict[str, Any], default: Optional[Dict[str, Any]]) -> bool:
+    """notify_by_email effectif d'une serre : paramètres de la serre, puis de l'utilisateur, puis par défaut"""
+    layers = {document.get("greenhouse_id"): document for document in recipient.get("settings", [])}
+    for document in (layers.get(recipient["id"]), layers.get(None), default):
+        if document and document.get("notify_by_email") is not None:
+            return bool(document["notify_by_email"])
+    return False
+
+def render_digest(username: Optional[str], greenhouses: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Sujet et corps du récapitulatif d'un utilisateur : alertes regroupées par serre"""
+    total = sum(len(greenhouse["alerts"]) for greenhouse in greenhouses)
+    lines = [f"Bonjour {username}," if username else "Bonjour,", "", f"{total} nouvelle(s) alerte(s) sur vos serres :"]
+    for greenhouse in greenhouses:
+        alerts = sorted(greenhouse["alerts"], key=lambda alert: alert["created_at"], reverse=True)
+        counts = ", ".join(f"{type} x{count}" for type, count in Counter(alert["type"] for alert in alerts).most_common())
+        lines += ["", f"{greenhouse['name']} ({len(alerts)}) : {counts}"]
+        shown = alerts[:settings.ALERT_DIGEST_MAX_ALERTS_PER_GREENHOUSE]
+        lines += [f"  - {alert['message']} (valeur {alert['value']})" for alert in shown]
+        if len(alerts) > len(shown):
+            lines.append(f"  ... et {len(alerts) - len(shown)} autre(s)")
+    lines += ["", "Cordialement,", "L'équipe SmartGreenhouse"]
+    return {"subject": f"SmartGreenhouse : {total} nouvelle(s) alerte(s)", "body": "\n".join(lines)}
+
+class AlertDigestService:
+    """Récapitulatif par e-mail des nouvelles alertes, pour les serres dont notify_by_email est actif.
+
+    AlertService.create met chaque alerte en attente (submit). Toutes les ALERT_DIGEST_WINDOW_SECONDS,
+    les alertes en attente sont regroupées par propriétaire : destinataires et préférences de toutes les
+    serres concernées sont lus en une agrégation, puis un seul message par utilisateur est mis dans la
+    file d'envoi (email_outbox), par lots de ALERT_DIGEST_ENQUEUE_BATCH_SIZE.
+    """
+
+    def __init__(
+        self,
+        outbox: Optional[EmailOutboxService] = None,
+        greenhouse_repository: Optional[GreenhouseRepository] = None,
+        settings_repository: Optional[SettingsRepository] = None
+    ):
+        self.outbox = outbox or EmailOutboxService()
+        self.greenhouse_repository = greenhouse_repository or GreenhouseRepository()
+        self.settings_repository = settings_repository or SettingsRepository()
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, alert: Dict[str, Any]) -> bool:
+        """Mettre une alerte en attente du prochain récapitulatif (False si elle est abandonnée, file pleine)"""
+        if len(self._pending) >= settings.ALERT_DIGEST_MAX_PENDING:
+            metrics.increment("alert_digest.dropped")
+            return False
+        self._pending.append(alert)
+        return True
+
+    async def build_digests(self, alerts: List[Dict[str, Any]]) -> List[Tuple[Dict[str, str], List[Dict[str, Any]]]]:
+        """Messages {to, subject, body} d'un lot d'alertes, un par utilisateur à notifier, avec les alertes qu'ils récapitulent"""
+        greenhouse_ids = list(dict.fromkeys(alert["greenhouse_id"] for alert in alerts))
+        recipients, default = await asyncio.gather(
+            self.greenhouse_repository.get_notification_recipients(greenhouse_ids),
+            self.settings_repository.get_default()
+        )
+        alerts_by_greenhouse: Dict[str, List[Dict[str, Any]]] = {}
+        for alert in alerts:
+            alerts_by_greenhouse.setdefault(alert["greenhouse_id"], []).append(alert)
+        by_email: Dict[str, Dict[str, Any]] = {}
+        for recipient in recipients:
+            if not recipient["email"] or not wants_email(recipient, default):
+                continue
+            digest = by_email.setdefault(recipient["email"], {"username": recipient["username"], "greenhouses": []})
+            digest["greenhouses"].append({"name": recipient["name"], "alerts": alerts_by_greenhouse[recipient["id"]]})
+        return [
+            (
+                {"to": email, **render_digest(digest["username"], digest["greenhouses"])},
+                [alert for greenhouse in digest["greenhouses"] for alert in greenhouse["alerts"]]
+            )
+            for email, digest in by_email.items()
+        ]
+
+    async def run_pending(self) -> int:
+        """Envoyer le récapitulatif des alertes en attente et retourner le nombre de messages mis en file"""
+        alerts, self._pending = self._pending, []
+        if not alerts:
+            return 0
+        try:
+            digests = await self.build_digests(alerts)
+        except Exception as e:
+            # Rien n'a été mis en file : les alertes attendent le prochain récapitulatif
+            self._pending = (alerts + self._pending)[:settings.ALERT_DIGEST_MAX_PENDING]
+            metrics.increment("alert_digest.failed")
+            logger.error(f"Erreur lors de la préparation du récapitulatif des alertes: {e}")
+            raise
+        messages = [message for message, _ in digests]
+        batch_size = settings.ALERT_DIGEST_ENQUEUE_BATCH_SIZE
+        for start in range(0, len(messages), batch_size):
+            try:
+                await self.outbox.enqueue_many(messages[start:start + batch_size])
+            except Exception as e:
+                # Les lots précédents sont déjà en file : seules les alertes des messages restants attendent
+                # le prochain récapitulatif
+                unsent = [alert for _, digest_alerts in digests[start:] for alert in digest_alerts]
+                self._pending = (unsent + self._pending)[:settings.ALERT_DIGEST_MAX_PENDING]
+                metrics.increment("alert_digest.failed")
+                logger.error(
+                    f"Erreur lors de l'envoi du récapitulatif des alertes "
+                    f"({len(messages) - start} message(s) sur {len(messages)} non mis en file): {e}"
+                )
+                raise
+        metrics.increment("alert_digest.alerts", len(alerts))
+        metrics.increment("alert_digest.messages", len(messages))
+        return len(messages)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ALERT_DIGEST_WINDOW_SECONDS)
+            try:
+                await self.run_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Déjà journalisé par run_pending
+                pass
+
+    def start(self) -> None:
+        """Lancer l'envoi périodique des récapitulatifs en tâche de fond"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrêter l'envoi périodique en envoyant le récapitulatif des alertes restantes"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.run_pending()
+        except Exception:
+            # Déjà journalisé par run_pending
+            pass
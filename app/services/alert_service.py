@@ -1,8 +1,9 @@
-from typing import Optional, List, Dict
-from app.services.base_service import BaseService
+from typing import Optional, List, Dict, Any, Tuple
+from app.services.base_service import BaseService, build_model
 from app.models.alert_model import AlertModel
 from app.repositories.alert_repository import AlertRepository
 from app.services.greenhouse_service import GreenhouseService
+from app.services.alert_digest_service import AlertDigestService
 from app.schemas.alert_schema import AlertCreate, AlertUpdate
 from fastapi import HTTPException
 import logging
@@ -12,10 +13,17 @@ logger = logging.getLogger(__name__)
 class AlertService(BaseService[AlertModel, AlertCreate, AlertUpdate]):
     """Service pour gérer les opérations liées aux alertes"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        repository: Optional[AlertRepository] = None,
+        greenhouse_service: Optional[GreenhouseService] = None,
+        alert_digest: Optional[AlertDigestService] = None
+    ):
         super().__init__()
-        self.repository = AlertRepository()
-        self.greenhouse_service = GreenhouseService()
+        self.repository = repository or AlertRepository()
+        self.greenhouse_service = greenhouse_service or GreenhouseService()
+        # Sans récapitulatif (None), les alertes ne sont pas envoyées par e-mail
+        self.alert_digest = alert_digest
 
     async def create(self, data: AlertCreate) -> AlertModel:
         """Créer une nouvelle alerte"""
@@ -25,6 +33,8 @@ class AlertService(BaseService[AlertModel, AlertCreate, AlertUpdate]):
             if not greenhouse:
                 raise HTTPException(status_code=400, detail="Serre non trouvée")
             result = await self.repository.create(data.model_dump())
+            if self.alert_digest is not None:
+                self.alert_digest.submit(result)
             return AlertModel(**result)
         except HTTPException:
             raise
@@ -36,42 +46,68 @@ class AlertService(BaseService[AlertModel, AlertCreate, AlertUpdate]):
         """Récupérer une alerte par son ID"""
         try:
             entity = await self.repository.get_by_id(id)
-            return AlertModel(**entity) if entity else None
+            return build_model(AlertModel, entity, trusted=True) if entity else None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de l'alerte: {e}")
             raise
 
-    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100) -> List[AlertModel]:
+    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[AlertModel]:
         """Récupérer les alertes d'une serre"""
         try:
-            entities = await self.repository.get_by_greenhouse_id(greenhouse_id, skip, limit)
-            return [AlertModel(**entity) for entity in entities]
+            entities = await self.repository.get_by_greenhouse_id(greenhouse_id, skip, limit, fields)
+            return [build_model(AlertModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des alertes par greenhouse_id: {e}")
             raise
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[AlertModel]:
+    async def get_unresolved_by_greenhouse_id(self, greenhouse_id: str, limit: int = 100) -> List[AlertModel]:
+        """Récupérer les alertes non résolues d'une serre"""
+        try:
+            entities = await self.repository.get_unresolved_by_greenhouse_id(greenhouse_id, limit)
+            return [build_model(AlertModel, entity, trusted=True) for entity in entities]
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des alertes non résolues: {e}")
+            raise
+
+    async def get_page_by_greenhouse_id(
+        self,
+        greenhouse_id: str,
+        limit: int = 100,
+        after: Optional[Tuple[str, int]] = None,
+        skip: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Récupérer une page des alertes d'une serre avec le total"""
+        try:
+            page = await self.repository.get_page({"greenhouse_id": greenhouse_id}, limit, after, skip, fields)
+            page["items"] = [build_model(AlertModel, entity, fields, trusted=True) for entity in page["items"]]
+            return page
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération paginée des alertes: {e}")
+            raise
+
+    async def get_all(self, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[AlertModel]:
         """Récupérer toutes les alertes"""
         try:
-            entities = await self.repository.get_all(skip=skip, limit=limit)
-            return [AlertModel(**entity) for entity in entities]
+            entities = await self.repository.get_all(skip=skip, limit=limit, fields=fields)
+            return [build_model(AlertModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des alertes: {e}")
             raise
 
-    async def count_by_status(self) -> Dict[str, int]:
-        """Compter les alertes par statut"""
+    async def count_by_status(self, greenhouse_ids: Optional[List[str]] = None, exact: bool = False) -> Dict[str, int]:
+        """Compter les alertes par statut (toutes, ou celles de certaines serres)"""
         try:
-            return await self.repository.count_by_status()
+            return await self.repository.count_by_status(greenhouse_ids, exact)
         except Exception as e:
             logger.error(f"Erreur lors du comptage des alertes: {e}")
             raise
 
-    async def search(self, query: str, skip: int = 0, limit: int = 100) -> List[AlertModel]:
+    async def search(self, query: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[AlertModel]:
         """Rechercher des alertes par type ou message"""
         try:
-            entities = await self.repository.search(query, skip, limit)
-            return [AlertModel(**entity) for entity in entities]
+            entities = await self.repository.search(query, skip, limit, fields)
+            return [build_model(AlertModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la recherche des alertes: {e}")
             raise
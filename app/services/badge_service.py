@@ -1,19 +1,157 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+from bson import ObjectId
 from app.services.base_service import BaseService
 from app.models.badge_model import BadgeModel
 from app.repositories.badge_repository import BadgeRepository
+from app.repositories.counter_repository import CounterRepository
+from app.repositories.badge_access_repository import BadgeAccessRepository, badge_access_writer
+from app.repositories.presence_repository import PresenceRepository
 from app.schemas.badge_schema import BadgeCreate, BadgeUpdate
+from app.cache.badge_index import BadgeIndex
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.utils.batch_writer import BatchWriter
+from app.utils.query_utils import encode_cursor
+from app.utils.time_utils import get_local_time
 from fastapi import HTTPException
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class BadgeService(BaseService[BadgeModel, BadgeCreate, BadgeUpdate]):
     """Service pour gérer les opérations liées aux badges"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        repository: Optional[BadgeRepository] = None,
+        index: Optional[BadgeIndex] = None,
+        counters: Optional[CounterRepository] = None,
+        access_repository: Optional[BadgeAccessRepository] = None,
+        presence_repository: Optional[PresenceRepository] = None,
+        access_writer: BatchWriter = badge_access_writer
+    ):
         super().__init__()
-        self.repository = BadgeRepository()
+        self.repository = repository or BadgeRepository()
+        self.index = index or BadgeIndex()
+        self.counters = counters or CounterRepository()
+        self.access_repository = access_repository or BadgeAccessRepository()
+        self.presence_repository = presence_repository or PresenceRepository()
+        self.access_writer = access_writer
+        self._task: Optional[asyncio.Task] = None
+
+    async def _bump_version(self) -> None:
+        """Signaler l'écriture aux index des autres processus"""
+        await self.counters.increment(BadgeRepository.VERSION_KEY, 1, upsert=True)
+
+    async def load_index(self, version: Optional[int] = None) -> None:
+        """Charger tous les badges dans l'index en mémoire"""
+        try:
+            if version is None:
+                version = await self.counters.get_value(BadgeRepository.VERSION_KEY) or 0
+            started = time.perf_counter()
+            documents = await self.repository.get_all(limit=0, fields=["greenhouse_id"])
+            self.index.load(documents, version)
+            metrics.observe("badges.index.load_ms", (time.perf_counter() - started) * 1000)
+            logger.info(f"Index des badges chargé ({len(documents)} badges, version {version})")
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de l'index des badges: {e}")
+            raise
+
+    async def refresh_index(self) -> bool:
+        """Recharger l'index si la version des badges a changé ou s'il est trop ancien (True si rechargé)"""
+        version = await self.counters.get_value(BadgeRepository.VERSION_KEY) or 0
+        if self.index.loaded and version == self.index.version and self.index.age() < settings.BADGE_INDEX_MAX_AGE_SECONDS:
+            return False
+        await self.load_index(version)
+        return True
+
+    async def check_access(self, badge_id: str, greenhouse_id: str, direction: str = "in") -> Dict[str, Any]:
+        """Décider l'ouverture d'une porte depuis l'index en mémoire (aucune requête MongoDB une fois chargé).
+
+        Le passage est journalisé en arrière-plan ; les présences sont mises à jour à l'écriture de chaque lot.
+        """
+        started = time.perf_counter()
+        if not self.index.loaded:
+            await self.load_index()
+        reason = self.index.check(badge_id, greenhouse_id)
+        if settings.BADGE_ACCESS_LOG_ENABLED:
+            self.access_writer.add({
+                "badge_id": badge_id,
+                "greenhouse_id": greenhouse_id,
+                "direction": direction,
+                "allowed": reason is None,
+                "reason": reason,
+                "recorded_at": get_local_time()
+            })
+        metrics.increment(f"badges.access.{'denied' if reason else 'allowed'}")
+        metrics.observe("badges.access_ms", (time.perf_counter() - started) * 1000)
+        return {"allowed": reason is None, "reason": reason}
+
+    async def get_access_page(
+        self,
+        greenhouse_id: str,
+        limit: int = 50,
+        after: Optional[Tuple[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Page du journal des passages d'une serre, du plus récent au plus ancien"""
+        try:
+            events = await self.access_repository.get_by_greenhouse_id(greenhouse_id, limit + 1, after[0] if after else None)
+            items = events[:limit]
+            offset = (after[1] if after else 0) + len(items)
+            next_cursor = encode_cursor(items[-1]["id"], offset) if len(events) > limit else None
+            return {"items": items, "next_cursor": next_cursor}
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des passages de badges: {e}")
+            raise
+
+    async def get_presence(self, greenhouse_id: str) -> List[Dict[str, Any]]:
+        """Badges présents dans une serre, complétés du nom et de l'utilisateur du badge (une requête $in)"""
+        try:
+            entries = await self.presence_repository.get_by_greenhouse_id(greenhouse_id)
+            ids = [ObjectId(entry["badge_id"]) for entry in entries if ObjectId.is_valid(entry["badge_id"])]
+            badges = {}
+            if ids:
+                documents = await self.repository.get_all({"_id": {"$in": ids}}, limit=0, fields=["name", "user_id"])
+                badges = {document["id"]: document for document in documents}
+            return [
+                {
+                    **entry,
+                    "name": badges.get(entry["badge_id"], {}).get("name"),
+                    "user_id": badges.get(entry["badge_id"], {}).get("user_id")
+                }
+                for entry in entries
+            ]
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des présences: {e}")
+            raise
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.BADGE_INDEX_CHECK_SECONDS)
+            try:
+                await self.refresh_index()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # L'index précédent continue de servir les portes
+                metrics.increment("badges.index.refresh_failed")
+                logger.warning(f"Rechargement de l'index des badges impossible: {e}")
+
+    def start(self) -> None:
+        """Lancer la surveillance de la version des badges en tâche de fond"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
 
     async def create(self, data: BadgeCreate, current_user_id: str) -> BadgeModel:
         """Créer un nouveau badge"""
@@ -21,6 +159,8 @@ class BadgeService(BaseService[BadgeModel, BadgeCreate, BadgeUpdate]):
             badge_data = data.model_dump()
             badge_data["user_id"] = current_user_id
             result = await self.repository.create(badge_data)
+            self.index.put(result)
+            await self._bump_version()
             return BadgeModel(**result)
         except Exception as e:
             logger.error(f"Erreur lors de la création du badge: {e}")
@@ -65,7 +205,11 @@ class BadgeService(BaseService[BadgeModel, BadgeCreate, BadgeUpdate]):
             if not update_data:
                 raise ValueError("Aucune donnée à mettre à jour")
             result = await self.repository.update(id, update_data)
-            return BadgeModel(**result) if result else None
+            if not result:
+                return None
+            self.index.put(result)
+            await self._bump_version()
+            return BadgeModel(**result)
         except HTTPException:
             raise
         except Exception as e:
@@ -80,7 +224,12 @@ class BadgeService(BaseService[BadgeModel, BadgeCreate, BadgeUpdate]):
                 raise HTTPException(status_code=404, detail="Badge non trouvé")
             if badge.user_id != current_user_id:
                 raise HTTPException(status_code=403, detail="Non autorisé")
-            return await self.repository.delete(id)
+            deleted = await self.repository.delete(id)
+            if deleted:
+                self.index.remove(id)
+                await self._bump_version()
+                await self.presence_repository.remove_badge(id)
+            return deleted
         except Exception as e:
             logger.error(f"Erreur lors de la suppression du badge: {e}")
             raise
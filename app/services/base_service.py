@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Optional, List
+from typing import Generic, TypeVar, Optional, List, Dict, Any, Type
 from pydantic import BaseModel
+from app.config.settings import settings
 import logging
 
 ModelType = TypeVar("ModelType")
@@ -9,6 +10,21 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 logger = logging.getLogger(__name__)
 
+def build_model(
+    model_class: Type[ModelType],
+    entity: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+    trusted: bool = False
+) -> ModelType:
+    """Construire un modèle à partir d'un document.
+
+    Les documents partiels (projection) et, avec trusted=True, les documents relus depuis nos propres
+    collections (déjà validés à l'écriture) sont construits sans validation.
+    """
+    if fields or (trusted and settings.TRUSTED_DB_READS):
+        return model_class.model_construct(**entity)
+    return model_class(**entity)
+
 class BaseService(ABC, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Service de base avec des méthodes CRUD génériques"""
     def __init__(self):
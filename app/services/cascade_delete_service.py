@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.repositories.base_repository import BaseRepository
+from app.repositories.cascade_job_repository import CascadeJobRepository
+from app.repositories.counter_repository import CounterRepository
+from app.repositories.greenhouse_repository import GreenhouseRepository
+from app.repositories.history_repository import HistoryRepository
+from app.repositories.alert_repository import AlertRepository
+from app.repositories.actuator_repository import ActuatorRepository
+from app.repositories.badge_repository import BadgeRepository
+from app.repositories.settings_repository import SettingsRepository
+from app.repositories.actuator_usage_repository import ActuatorUsageRepository
+from app.repositories.badge_access_repository import BadgeAccessRepository
+from app.repositories.presence_repository import PresenceRepository
+from app.utils.time_utils import get_local_time
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class CascadeDeleteService:
+    """Supprimer en tâche de fond les documents dépendants des serres supprimées.
+
+    Chaque suppression de serre enregistre une tâche dans cascade_jobs avant de supprimer la serre. Le
+    worker de chaque processus prend les tâches une à une (prise atomique, bail renouvelé à chaque lot),
+    supprime la serre si elle existe encore (processus arrêté entre les deux écritures) puis ses dépendants
+    par lots delete_many espacés de CASCADE_DELETE_BATCH_PAUSE_SECONDS pour ne pas saturer le cluster.
+    Une tâche en échec est reprise depuis le début avec un délai exponentiel, puis marquée failed après
+    CASCADE_DELETE_MAX_ATTEMPTS tentatives.
+    """
+
+    def __init__(
+        self,
+        jobs: Optional[CascadeJobRepository] = None,
+        dependents: Optional[List[BaseRepository]] = None,
+        counters: Optional[CounterRepository] = None
+    ):
+        self.jobs = jobs or CascadeJobRepository()
+        self.counters = counters or CounterRepository()
+        self.greenhouse_repository = GreenhouseRepository()
+        self.history_repository = HistoryRepository(counters=self.counters)
+        self.settings_repository = SettingsRepository()
+        self.badge_repository = BadgeRepository()
+        # L'historique d'abord : c'est lui qui pèse le plus dans les requêtes par serre
+        self.dependents = dependents or [
+            self.history_repository,
+            AlertRepository(),
+            ActuatorRepository(),
+            self.badge_repository,
+            BadgeAccessRepository(),
+            PresenceRepository(),
+            ActuatorUsageRepository(),
+            self.settings_repository
+        ]
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, greenhouse_id: str, user_id: str) -> Dict[str, Any]:
+        """Enregistrer la suppression des dépendants d'une serre et réveiller le worker"""
+        try:
+            job = await self.jobs.create_job(
+                greenhouse_id, user_id, [repository.collection.name for repository in self.dependents]
+            )
+            metrics.increment("cascade_delete.enqueued")
+            if self._wakeup is not None:
+                self._wakeup.set()
+            return job
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement de la suppression en cascade: {e}")
+            raise
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Récupérer l'état d'une tâche (statut et nombre de documents supprimés par collection)"""
+        try:
+            return await self.jobs.get_by_id(job_id)
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération de la tâche {job_id}: {e}")
+            raise
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        greenhouse_id = job["greenhouse_id"]
+        filter_query = {"greenhouse_id": greenhouse_id}
+        # Sans effet si la serre a déjà été supprimée par la requête
+        await self.greenhouse_repository.delete(greenhouse_id)
+        for repository in self.dependents:
+            name = repository.collection.name
+            while True:
+                started = time.perf_counter()
+                deleted = await repository.delete_batch(filter_query, settings.CASCADE_DELETE_BATCH_SIZE)
+                metrics.observe("cascade_delete.batch_ms", (time.perf_counter() - started) * 1000)
+                if not deleted:
+                    break
+                metrics.increment(f"cascade_delete.deleted.{name}", deleted)
+                await self.jobs.record_progress(job["id"], name, deleted)
+                await asyncio.sleep(settings.CASCADE_DELETE_BATCH_PAUSE_SECONDS)
+            if repository is self.history_repository:
+                await self.history_repository.reset_counter(greenhouse_id)
+            elif repository is self.settings_repository:
+                await self.counters.increment(SettingsRepository.VERSION_KEY, 1, upsert=True)
+            elif repository is self.badge_repository:
+                await self.counters.increment(BadgeRepository.VERSION_KEY, 1, upsert=True)
+        await self.jobs.finish(job["id"], "done")
+        logger.info(f"Dépendants de la serre {greenhouse_id} supprimés (tâche {job['id']})")
+
+    @staticmethod
+    def _retry_at(attempts: int) -> Optional[datetime]:
+        """Prochaine tentative après attempts échecs (None : abandon)"""
+        if attempts >= settings.CASCADE_DELETE_MAX_ATTEMPTS:
+            return None
+        delay = min(
+            settings.CASCADE_DELETE_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+            settings.CASCADE_DELETE_RETRY_MAX_SECONDS
+        )
+        return get_local_time() + timedelta(seconds=delay)
+
+    async def run_pending(self) -> int:
+        """Traiter les tâches en attente jusqu'à épuisement et retourner leur nombre"""
+        processed = 0
+        while True:
+            job = await self.jobs.claim_next(settings.CASCADE_DELETE_LEASE_SECONDS)
+            if job is None:
+                return processed
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                next_attempt_at = self._retry_at(job["attempts"])
+                if next_attempt_at is None:
+                    metrics.increment("cascade_delete.failed")
+                    logger.error(f"Erreur lors de la suppression en cascade (tâche {job['id']}, abandonnée): {e}")
+                    await self.jobs.finish(job["id"], "failed", str(e))
+                else:
+                    metrics.increment("cascade_delete.retried")
+                    logger.warning(f"Erreur lors de la suppression en cascade (tâche {job['id']}, réessayée): {e}")
+                    await self.jobs.retry(job["id"], str(e), next_attempt_at)
+            processed += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur du worker de suppression en cascade: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.CASCADE_DELETE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Lancer le worker en tâche de fond"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
@@ -0,0 +1,59 @@
+from typing import Any, Dict, Optional
+from app.models.greenhouse_model import GreenhouseModel
+from app.monitoring.metrics import metrics
+from app.services.history_service import HistoryService
+from app.services.alert_service import AlertService
+from app.services.actuator_service import ActuatorService
+from app.services.settings_service import SettingsService
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class DashboardService:
+    """Service composant l'écran d'une serre à partir des autres services"""
+
+    def __init__(
+        self,
+        history_service: Optional[HistoryService] = None,
+        alert_service: Optional[AlertService] = None,
+        actuator_service: Optional[ActuatorService] = None,
+        settings_service: Optional[SettingsService] = None
+    ):
+        self.history_service = history_service or HistoryService()
+        self.alert_service = alert_service or AlertService()
+        self.actuator_service = actuator_service or ActuatorService()
+        self.settings_service = settings_service or SettingsService()
+
+    async def get_greenhouse_dashboard(
+        self,
+        greenhouse: GreenhouseModel,
+        readings_limit: int = 20,
+        alerts_limit: int = 50
+    ) -> Dict[str, Any]:
+        """Récupérer en parallèle les données de l'écran d'une serre dont l'accès a déjà été vérifié.
+
+        La durée totale est enregistrée dans la métrique dashboard.greenhouse_ms (p95 via /metrics).
+        """
+        started = time.perf_counter()
+        try:
+            readings, alerts, actuators, effective_settings = await asyncio.gather(
+                self.history_service.get_latest_by_greenhouse_id(greenhouse.id, readings_limit),
+                self.alert_service.get_unresolved_by_greenhouse_id(greenhouse.id, alerts_limit),
+                self.actuator_service.get_by_greenhouse_id(greenhouse.id, limit=0),
+                self.settings_service.get_effective(greenhouse.id, greenhouse.user_id)
+            )
+            return {
+                "greenhouse": greenhouse,
+                "latest_readings": readings,
+                "unresolved_alerts": alerts,
+                "actuators": actuators,
+                "settings": effective_settings
+            }
+        except Exception as e:
+            metrics.increment("dashboard.greenhouse_failed")
+            logger.error(f"Erreur lors de la récupération du tableau de bord de la serre: {e}")
+            raise
+        finally:
+            metrics.observe("dashboard.greenhouse_ms", (time.perf_counter() - started) * 1000)
@@ -1,25 +1,183 @@
-import smtplib
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.utils.time_utils import get_local_time
+import asyncio
+import smtplib
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def send_reset_password_email(to_email: str, reset_url: str):
-    """Envoyer un e-mail de réinitialisation de mot de passe"""
-    try:
-        # Configurer les paramètres SMTP (par exemple, Gmail)
-        smtp_server = "smtp.gmail.com"
-        smtp_port = 587
-        sender_email = "your_email@gmail.com"
-        sender_password = "your_app_password"
-
-        # Créer le message
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = to_email
-        message["Subject"] = "Réinitialisation de votre mot de passe"
+class SmtpSender:
+    """Envoi SMTP avec smtplib (bloquant, exécuté hors de la boucle asyncio) : une connexion par lot de messages"""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: Optional[bool] = None,
+        sender: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        self.host = host or settings.SMTP_HOST
+        self.port = port or settings.SMTP_PORT
+        self.username = username if username is not None else settings.SMTP_USERNAME
+        self.password = password if password is not None else settings.SMTP_PASSWORD
+        self.starttls = starttls if starttls is not None else settings.SMTP_STARTTLS
+        self.sender = sender or settings.SMTP_SENDER
+        self.timeout = timeout or settings.SMTP_TIMEOUT_SECONDS
+
+    def _build(self, message: Dict[str, Any]) -> MIMEMultipart:
+        mime = MIMEMultipart()
+        mime["From"] = self.sender
+        mime["To"] = message["to"]
+        mime["Subject"] = message["subject"]
+        mime.attach(MIMEText(message["body"], "plain"))
+        return mime
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Envoyer les messages sur une seule connexion ; retourne l'erreur de chaque message (None si envoyé).
+
+        Une erreur de connexion ou d'authentification est levée : aucun message n'a été envoyé.
+        """
+        results: List[Optional[str]] = []
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+            for index, message in enumerate(messages):
+                try:
+                    server.sendmail(self.sender, [message["to"]], self._build(message).as_string())
+                    results.append(None)
+                except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+                    # Connexion perdue : les messages restants seront réessayés
+                    results.extend([str(e)] * (len(messages) - index))
+                    break
+                except smtplib.SMTPException as e:
+                    results.append(str(e))
+        return results
+
+class EmailOutboxService:
+    """File d'envoi des e-mails : les requêtes ne font qu'enregistrer les messages dans email_outbox.
+
+    EMAIL_OUTBOX_WORKERS workers par processus prennent les messages dus par lots (prise atomique avec
+    bail, comme les tâches de suppression en cascade) et envoient chaque lot sur une seule connexion SMTP,
+    dans un thread pour ne pas bloquer la boucle asyncio. Un message en échec est réessayé avec un délai
+    exponentiel, puis marqué failed après EMAIL_OUTBOX_MAX_ATTEMPTS tentatives.
+    """
+
+    def __init__(self, repository: Optional[EmailOutboxRepository] = None, sender: Optional[SmtpSender] = None):
+        self.repository = repository or EmailOutboxRepository()
+        self.sender = sender or SmtpSender()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
 
+    async def enqueue_many(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Mettre en file des messages {to, subject, body} et réveiller les workers"""
+        try:
+            ids = await self.repository.enqueue(messages)
+            metrics.increment("email.enqueued", len(ids))
+            if self._wakeup is not None:
+                self._wakeup.set()
+            return ids
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise en file des e-mails: {e}")
+            raise
+
+    async def enqueue(self, to: str, subject: str, body: str) -> str:
+        return (await self.enqueue_many([{"to": to, "subject": subject, "body": body}]))[0]
+
+    @staticmethod
+    def _retry_at(attempts: int) -> Optional[datetime]:
+        """Prochaine tentative après attempts échecs (None : abandon)"""
+        if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            return None
+        delay = min(
+            settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+            settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS
+        )
+        return get_local_time() + timedelta(seconds=delay)
+
+    async def run_batch(self) -> int:
+        """Envoyer un lot de messages dus et retourner sa taille (0 si la file est vide)"""
+        token, messages = await self.repository.claim_batch(
+            settings.EMAIL_OUTBOX_BATCH_SIZE, settings.EMAIL_OUTBOX_LEASE_SECONDS, settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        )
+        if not messages:
+            return 0
+        try:
+            results = await asyncio.to_thread(self.sender.send_batch, messages)
+        except Exception as e:
+            metrics.increment("email.smtp_failed")
+            logger.warning(f"Connexion SMTP impossible ({len(messages)} e-mails réessayés plus tard): {e}")
+            results = [str(e)] * len(messages)
+        sent = [message["id"] for message, error in zip(messages, results) if error is None]
+        failed = [
+            {"id": message["id"], "error": error, "next_attempt_at": self._retry_at(message["attempts"])}
+            for message, error in zip(messages, results)
+            if error is not None
+        ]
+        recorded = await self.repository.record_results(token, sent, failed)
+        if recorded < len(messages):
+            # Bail expiré pendant l'envoi : ces messages ont été repris par un autre worker
+            metrics.increment("email.lease_lost", len(messages) - recorded)
+            logger.warning(f"{len(messages) - recorded} e-mails repris par un autre worker pendant l'envoi (bail expiré)")
+        metrics.increment("email.sent", len(sent))
+        if failed:
+            metrics.increment("email.retried", sum(1 for failure in failed if failure["next_attempt_at"]))
+            metrics.increment("email.abandoned", sum(1 for failure in failed if not failure["next_attempt_at"]))
+        return len(messages)
+
+    async def run_pending(self) -> int:
+        """Envoyer les messages dus jusqu'à épuisement et retourner leur nombre"""
+        processed = 0
+        while True:
+            count = await self.run_batch()
+            if not count:
+                return processed
+            processed += count
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur du worker d'envoi des e-mails: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.EMAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Lancer les workers en tâche de fond"""
+        if not self._tasks:
+            self._wakeup = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._run()) for _ in range(settings.EMAIL_OUTBOX_WORKERS)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+async def send_reset_password_email(outbox: EmailOutboxService, to_email: str, reset_url: str) -> str:
+    """Mettre en file l'e-mail de réinitialisation de mot de passe"""
+    try:
         body = f"""
         Bonjour,
 
@@ -33,15 +191,9 @@ async def send_reset_password_email(to_email: str, reset_url: str):
         Cordialement,
         L'équipe SmartGreenhouse
         """
-        message.attach(MIMEText(body, "plain"))
-
-        # Envoyer l'e-mail
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, to_email, message.as_string())
-
-        logger.info(f"E-mail de réinitialisation envoyé à {to_email}")
+        id = await outbox.enqueue(to_email, "Réinitialisation de votre mot de passe", body)
+        logger.info(f"E-mail de réinitialisation mis en file pour {to_email}")
+        return id
     except Exception as e:
-        logger.error(f"Erreur lors de l'envoi de l'e-mail: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error(f"Erreur lors de la mise en file de l'e-mail: {str(e)}")
+        raise
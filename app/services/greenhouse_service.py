@@ -1,8 +1,9 @@
-from typing import Optional, List
-from app.services.base_service import BaseService
+from typing import Optional, List, Dict, Any
+from app.services.base_service import BaseService, build_model
 from app.models.greenhouse_model import GreenhouseModel
 from app.repositories.greenhouse_repository import GreenhouseRepository
 from app.services.user_service import UserService
+from app.services.cascade_delete_service import CascadeDeleteService
 from app.schemas.greenhouse_schema import GreenhouseCreate, GreenhouseUpdate
 from fastapi import HTTPException
 import logging
@@ -12,10 +13,16 @@ logger = logging.getLogger(__name__)
 class GreenhouseService(BaseService[GreenhouseModel, GreenhouseCreate, GreenhouseUpdate]):
     """Service pour gérer les opérations liées aux serres"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        repository: Optional[GreenhouseRepository] = None,
+        user_service: Optional[UserService] = None,
+        cascade_delete_service: Optional[CascadeDeleteService] = None
+    ):
         super().__init__()
-        self.repository = GreenhouseRepository()
-        self.user_service = UserService()
+        self.repository = repository or GreenhouseRepository()
+        self.user_service = user_service or UserService()
+        self.cascade_delete_service = cascade_delete_service or CascadeDeleteService()
 
     async def create(self, data: GreenhouseCreate) -> GreenhouseModel:
         """Créer une nouvelle serre"""
@@ -35,35 +42,44 @@ class GreenhouseService(BaseService[GreenhouseModel, GreenhouseCreate, Greenhous
     async def get_by_id(self, id: str) -> Optional[GreenhouseModel]:
         """Récupérer une serre par son ID"""
         try:
-            entity = await self.repository.get_by_id(id)
-            return GreenhouseModel(**entity) if entity else None
+            entity = await self.repository.load(id)
+            return build_model(GreenhouseModel, entity, trusted=True) if entity else None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la serre: {e}")
             raise
 
-    async def get_by_user_id(self, user_id: str, skip: int = 0, limit: int = 100) -> List[GreenhouseModel]:
+    async def get_many(self, ids: List[str]) -> List[Optional[GreenhouseModel]]:
+        """Récupérer plusieurs serres (regroupées en une seule requête $in par le DataLoader)"""
+        try:
+            entities = await self.repository.load_many(ids)
+            return [build_model(GreenhouseModel, entity, trusted=True) if entity else None for entity in entities]
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des serres: {e}")
+            raise
+
+    async def get_by_user_id(self, user_id: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[GreenhouseModel]:
         """Récupérer les serres d'un utilisateur"""
         try:
-            entities = await self.repository.get_by_user_id(user_id, skip, limit)
-            return [GreenhouseModel(**entity) for entity in entities]
+            entities = await self.repository.get_by_user_id(user_id, skip, limit, fields)
+            return [build_model(GreenhouseModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des serres par user_id: {e}")
             raise
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[GreenhouseModel]:
+    async def get_all(self, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[GreenhouseModel]:
         """Récupérer toutes les serres"""
         try:
-            entities = await self.repository.get_all(skip=skip, limit=limit)
-            return [GreenhouseModel(**entity) for entity in entities]
+            entities = await self.repository.get_all(skip=skip, limit=limit, fields=fields)
+            return [build_model(GreenhouseModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des serres: {e}")
             raise
 
-    async def search_by_name(self, name: str, skip: int = 0, limit: int = 100) -> List[GreenhouseModel]:
+    async def search_by_name(self, name: str, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[GreenhouseModel]:
         """Rechercher des serres par nom"""
         try:
-            entities = await self.repository.search_by_name(name, skip, limit)
-            return [GreenhouseModel(**entity) for entity in entities]
+            entities = await self.repository.search_by_name(name, skip, limit, fields)
+            return [build_model(GreenhouseModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la recherche des serres: {e}")
             raise
@@ -80,10 +96,20 @@ class GreenhouseService(BaseService[GreenhouseModel, GreenhouseCreate, Greenhous
             logger.error(f"Erreur lors de la mise à jour de la serre: {e}")
             raise
 
-    async def delete(self, id: str) -> bool:
-        """Supprimer une serre"""
+    async def delete(self, id: str) -> Optional[Dict[str, Any]]:
+        """Supprimer une serre et programmer la suppression en tâche de fond de ses dépendants.
+
+        La tâche est enregistrée avant la suppression de la serre (qu'elle supprime aussi si le processus
+        s'arrête entre les deux) ; la serre disparaît immédiatement des lectures. Retourne la tâche de
+        suppression en cascade (None si la serre n'existe pas).
+        """
         try:
-            return await self.repository.delete(id)
+            greenhouse = await self.repository.get_by_id(id)
+            if not greenhouse:
+                return None
+            job = await self.cascade_delete_service.enqueue(id, greenhouse["user_id"])
+            await self.repository.delete(id)
+            return job
         except Exception as e:
             logger.error(f"Erreur lors de la suppression de la serre: {e}")
             raise
@@ -1,8 +1,9 @@
-from typing import Optional, List, Dict
-from app.services.base_service import BaseService
+from typing import Optional, List, Dict, Any, Union, Tuple
+from app.services.base_service import BaseService, build_model
 from app.models.history_model import HistoryModel
 from app.repositories.history_repository import HistoryRepository
 from app.services.greenhouse_service import GreenhouseService
+from app.services.rule_engine import RuleEngine
 from app.schemas.history_schema import HistoryCreate
 from fastapi import HTTPException
 import logging
@@ -13,10 +14,17 @@ logger = logging.getLogger(__name__)
 class HistoryService(BaseService[HistoryModel, HistoryCreate, None]):
     """Service pour gérer les opérations liées aux historiques des capteurs"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        repository: Optional[HistoryRepository] = None,
+        greenhouse_service: Optional[GreenhouseService] = None,
+        rule_engine: Optional[RuleEngine] = None
+    ):
         super().__init__()
-        self.repository = HistoryRepository()
-        self.greenhouse_service = GreenhouseService()
+        self.repository = repository or HistoryRepository()
+        self.greenhouse_service = greenhouse_service or GreenhouseService()
+        # Sans moteur de règles (None), les mesures ne pilotent pas les actionneurs
+        self.rule_engine = rule_engine
 
     async def create(self, data: HistoryCreate) -> HistoryModel:
         """Créer une nouvelle entrée historique"""
@@ -26,6 +34,8 @@ class HistoryService(BaseService[HistoryModel, HistoryCreate, None]):
             if not greenhouse:
                 raise HTTPException(status_code=400, detail="Serre non trouvée")
             result = await self.repository.create(data.model_dump())
+            if self.rule_engine is not None:
+                self.rule_engine.submit(result)
             return HistoryModel(**result)
         except HTTPException:
             raise
@@ -37,33 +47,74 @@ class HistoryService(BaseService[HistoryModel, HistoryCreate, None]):
         """Récupérer une entrée historique par son ID"""
         try:
             entity = await self.repository.get_by_id(id)
-            return HistoryModel(**entity) if entity else None
+            return build_model(HistoryModel, entity, trusted=True) if entity else None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de l'historique: {e}")
             raise
 
-    async def get_by_greenhouse_id(self, greenhouse_id: str, skip: int = 0, limit: int = 100) -> List[HistoryModel]:
-        """Récupérer l'historique d'une serre"""
+    async def get_by_greenhouse_id(
+        self,
+        greenhouse_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        raw: bool = False
+    ) -> Union[List[HistoryModel], List[Dict[str, Any]]]:
+        """Récupérer l'historique d'une serre (raw=True : documents bruts, sans validation)"""
         try:
-            entities = await self.repository.get_by_greenhouse_id(greenhouse_id, skip, limit)
-            return [HistoryModel(**entity) for entity in entities]
+            entities = await self.repository.get_by_greenhouse_id(greenhouse_id, skip, limit, fields)
+            if raw:
+                return entities
+            return [build_model(HistoryModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de l'historique par greenhouse_id: {e}")
             raise
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[HistoryModel]:
-        """Récupérer toutes les entrées historiques"""
+    async def get_latest_by_greenhouse_id(self, greenhouse_id: str, limit: int = 10) -> List[HistoryModel]:
+        """Récupérer les dernières mesures d'une serre"""
         try:
-            entities = await self.repository.get_all(skip=skip, limit=limit)
-            return [HistoryModel(**entity) for entity in entities]
+            entities = await self.repository.get_latest_by_greenhouse_id(greenhouse_id, limit)
+            return [build_model(HistoryModel, entity, trusted=True) for entity in entities]
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des dernières mesures: {e}")
+            raise
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        raw: bool = False
+    ) -> Union[List[HistoryModel], List[Dict[str, Any]]]:
+        """Récupérer toutes les entrées historiques (raw=True : documents bruts, sans validation)"""
+        try:
+            entities = await self.repository.get_all(skip=skip, limit=limit, fields=fields)
+            if raw:
+                return entities
+            return [build_model(HistoryModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des historiques: {e}")
             raise
 
-    async def count_by_greenhouse_id(self, greenhouse_id: str) -> int:
+    async def get_page_by_greenhouse_id(
+        self,
+        greenhouse_id: str,
+        limit: int = 100,
+        after: Optional[Tuple[str, int]] = None,
+        skip: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Récupérer une page de l'historique d'une serre avec le total (documents bruts)"""
+        try:
+            return await self.repository.get_page({"greenhouse_id": greenhouse_id}, limit, after, skip, fields)
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération paginée de l'historique: {e}")
+            raise
+
+    async def count_by_greenhouse_id(self, greenhouse_id: str, exact: bool = False) -> int:
         """Compter les entrées historiques pour une serre"""
         try:
-            return await self.repository.count_by_greenhouse_id(greenhouse_id)
+            return await self.repository.count_by_greenhouse_id(greenhouse_id, exact)
         except Exception as e:
             logger.error(f"Erreur lors du comptage des historiques: {e}")
             raise
@@ -76,18 +127,44 @@ class HistoryService(BaseService[HistoryModel, HistoryCreate, None]):
         temperature_min: Optional[float] = None,
         temperature_max: Optional[float] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[HistoryModel]:
-        """Rechercher des historiques par plage de dates ou valeurs de capteurs"""
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        raw: bool = False
+    ) -> Union[List[HistoryModel], List[Dict[str, Any]]]:
+        """Rechercher des historiques par plage de dates ou valeurs de capteurs (raw=True : documents bruts)"""
         try:
             entities = await self.repository.search(
-                greenhouse_id, start_date, end_date, temperature_min, temperature_max, skip, limit
+                greenhouse_id, start_date, end_date, temperature_min, temperature_max, skip, limit, fields
             )
-            return [HistoryModel(**entity) for entity in entities]
+            if raw:
+                return entities
+            return [build_model(HistoryModel, entity, fields, trusted=True) for entity in entities]
         except Exception as e:
             logger.error(f"Erreur lors de la recherche des historiques: {e}")
             raise
 
+    async def search_page(
+        self,
+        greenhouse_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        temperature_min: Optional[float] = None,
+        temperature_max: Optional[float] = None,
+        limit: int = 100,
+        after: Optional[Tuple[str, int]] = None,
+        skip: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Rechercher des historiques, par page avec le total (documents bruts)"""
+        try:
+            filter_query = self.repository.search_filter(
+                greenhouse_id, start_date, end_date, temperature_min, temperature_max
+            )
+            return await self.repository.get_page(filter_query, limit, after, skip, fields)
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche paginée des historiques: {e}")
+            raise
+
     async def update(self, id: str, data: None) -> Optional[HistoryModel]:
         """Mettre à jour une entrée historique (non implémenté)"""
         raise NotImplementedError("Les historiques ne peuvent pas être mis à jour")
@@ -0,0 +1,262 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from app.config.settings import settings
+from app.monitoring.metrics import metrics
+from app.schemas.actuator_schema import ActuatorCommand
+from app.services.actuator_service import ActuatorService
+from app.services.settings_service import SettingsService
+from app.utils.constants import AUTOMATION_RULES
+import numpy as np
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class CompiledRules:
+    """Règles compilées pour une version des paramètres : une matrice de seuils (serres x règles).
+
+    Les seuils absents des paramètres valent NaN : toute comparaison avec NaN est fausse, la règle
+    ne se déclenche donc pas pour cette serre (et n'est jamais relâchée).
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], version: int):
+        self.rules = rules
+        self.version = version
+        self.metrics = sorted({rule["metric"] for rule in rules})
+        self.metric_columns = np.array([self.metrics.index(rule["metric"]) for rule in rules])
+        self.greater = np.array([rule["operator"] == ">" for rule in rules])
+        self.hysteresis = np.array([rule.get("hysteresis", 0.0) for rule in rules], dtype=float)
+        self.rows: Dict[str, int] = {}
+        self.greenhouse_ids: List[str] = []
+        self._thresholds: List[List[float]] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, greenhouse_id: str, effective_settings: Optional[Dict[str, Any]]) -> None:
+        """Ajouter les seuils d'une serre (paramètres effectifs, None si elle n'en a aucun)"""
+        self.rows[greenhouse_id] = len(self._thresholds)
+        self.greenhouse_ids.append(greenhouse_id)
+        self._thresholds.append([
+            float(value) if (value := (effective_settings or {}).get(rule["threshold"])) is not None else np.nan
+            for rule in self.rules
+        ])
+        self._matrix = None
+
+    def has_threshold(self, greenhouse_id: str, index: int) -> bool:
+        """La serre a-t-elle le seuil de la règle d'indice index"""
+        return not np.isnan(self.thresholds[self.rows[greenhouse_id], index])
+
+    @property
+    def thresholds(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.array(self._thresholds, dtype=float).reshape(len(self._thresholds), len(self.rules))
+        return self._matrix
+
+    def evaluate(self, readings: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+        """Retourner les couples (serre, indice de règle) déclenchés par au moins une mesure du lot, puis les
+        couples relâchés : aucune mesure ne déclenche la règle et au moins une est revenue en deçà du seuil
+        d'au moins hysteresis (jamais si la serre n'a pas ce seuil)
+        """
+        greenhouse_ids = [reading["greenhouse_id"] for reading in readings]
+        rows = np.fromiter((self.rows[greenhouse_id] for greenhouse_id in greenhouse_ids), dtype=np.intp, count=len(readings))
+        values = np.array(
+            [[np.nan if reading.get(metric) is None else reading[metric] for metric in self.metrics] for reading in readings],
+            dtype=float
+        ).reshape(len(readings), len(self.metrics))[:, self.metric_columns]
+        thresholds = self.thresholds[rows]
+        fired = np.where(self.greater, values > thresholds, values < thresholds)
+        released = np.where(
+            self.greater, values < thresholds - self.hysteresis, values > thresholds + self.hysteresis
+        )
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        fired_by_greenhouse = np.zeros((len(unique_rows), len(self.rules)), dtype=bool)
+        released_by_greenhouse = np.zeros((len(unique_rows), len(self.rules)), dtype=bool)
+        np.logical_or.at(fired_by_greenhouse, inverse.ravel(), fired)
+        np.logical_or.at(released_by_greenhouse, inverse.ravel(), released)
+        released_by_greenhouse &= ~fired_by_greenhouse
+        return tuple(
+            [(self.greenhouse_ids[unique_rows[index]], int(rule)) for index, rule in zip(*np.nonzero(matrix))]
+            for matrix in (fired_by_greenhouse, released_by_greenhouse)
+        )
+
+class RuleEngine:
+    """Évaluer les mesures reçues par lots et piloter les actionneurs selon AUTOMATION_RULES.
+
+    Les mesures sont mises en attente par submit() et évaluées toutes les RULE_ENGINE_INTERVAL_SECONDS
+    secondes. Les règles sont compilées une fois par version des paramètres (voir SettingsService) ;
+    une règle déjà déclenchée pour une serre est ignorée pendant RULE_ENGINE_COOLDOWN_SECONDS pour
+    éviter les oscillations. Seuls les types d'actionneurs que le moteur a lui-même mis en marche (dans
+    ce processus) sont remis à 0 : quand toutes les règles qui les pilotent et dont la serre a le seuil
+    sont relâchées (hystérésis), et qu'aucune n'a été déclenchée depuis moins de RULE_ENGINE_COOLDOWN_SECONDS.
+    Les commandes manuelles ne sont donc jamais annulées. Les commandes d'une serre sont envoyées en une
+    seule écriture.
+    """
+
+    def __init__(
+        self,
+        settings_service: Optional[SettingsService] = None,
+        actuator_service: Optional[ActuatorService] = None,
+        rules: List[Dict[str, Any]] = AUTOMATION_RULES
+    ):
+        self.settings_service = settings_service or SettingsService()
+        self.actuator_service = actuator_service or ActuatorService()
+        self.rules = rules
+        self._rules_by_type: Dict[str, List[int]] = defaultdict(list)
+        for index, rule in enumerate(rules):
+            for actuator_type in rule["actions"]:
+                self._rules_by_type[actuator_type].append(index)
+        # Types d'actionneurs mis en marche par le moteur, par serre : les seuls qu'il remet à 0
+        self._engaged: Dict[str, set] = {}
+        self._compiled: Optional[CompiledRules] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._last_fired: Dict[Tuple[str, str], float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, reading: Dict[str, Any]) -> bool:
+        """Mettre une mesure en attente d'évaluation (False si elle est abandonnée, file pleine)"""
+        if len(self._pending) >= settings.RULE_ENGINE_MAX_PENDING:
+            metrics.increment("rules.dropped")
+            return False
+        self._pending.append(reading)
+        return True
+
+    async def _compile(self, greenhouse_ids: List[str]) -> CompiledRules:
+        """Règles compilées pour la version courante des paramètres, complétées des serres inconnues"""
+        version = await self.settings_service.get_version()
+        if self._compiled is None or self._compiled.version != version:
+            self._compiled = CompiledRules(self.rules, version)
+        compiled = self._compiled
+        missing = list(dict.fromkeys(greenhouse_id for greenhouse_id in greenhouse_ids if greenhouse_id not in compiled.rows))
+        if missing:
+            effective = await asyncio.gather(
+                *(self.settings_service.get_effective(greenhouse_id) for greenhouse_id in missing),
+                return_exceptions=True
+            )
+            for greenhouse_id, effective_settings in zip(missing, effective):
+                if isinstance(effective_settings, Exception):
+                    # Non compilée : ses mesures sont ignorées et la serre est réessayée au prochain lot
+                    metrics.increment("rules.settings_failed")
+                    logger.error(f"Paramètres de la serre {greenhouse_id} indisponibles pour les règles: {effective_settings}")
+                    continue
+                compiled.add(greenhouse_id, effective_settings)
+        return compiled
+
+    async def evaluate(self, readings: List[Dict[str, Any]]) -> Dict[str, List[ActuatorCommand]]:
+        """Évaluer un lot de mesures et appliquer les commandes ; retourne les commandes envoyées par serre"""
+        if not readings:
+            return {}
+        compiled = await self._compile([reading["greenhouse_id"] for reading in readings])
+        readings = [reading for reading in readings if reading["greenhouse_id"] in compiled.rows]
+        if not readings:
+            return {}
+        started = time.perf_counter()
+        fired, released = compiled.evaluate(readings)
+        metrics.observe("rules.evaluate_ms", (time.perf_counter() - started) * 1000)
+        metrics.increment("rules.readings", len(readings))
+
+        now = time.monotonic()
+        if len(self._last_fired) > settings.RULE_ENGINE_MAX_COOLDOWNS:
+            self._last_fired = {
+                key: fired_at for key, fired_at in self._last_fired.items()
+                if now - fired_at < settings.RULE_ENGINE_COOLDOWN_SECONDS
+            }
+        actions: Dict[str, Dict[str, float]] = defaultdict(dict)
+        origins: Dict[str, Dict[str, str]] = defaultdict(dict)
+        for greenhouse_id, index in fired:
+            rule = compiled.rules[index]
+            key = (greenhouse_id, rule["name"])
+            if now - self._last_fired.get(key, -np.inf) < settings.RULE_ENGINE_COOLDOWN_SECONDS:
+                continue
+            self._last_fired[key] = now
+            metrics.increment(f"rules.fired.{rule['name']}")
+            actions[greenhouse_id].update(rule["actions"])
+            origins[greenhouse_id].update(dict.fromkeys(rule["actions"], rule["name"]))
+
+        released_rules: Dict[str, set] = defaultdict(set)
+        for greenhouse_id, index in released:
+            if greenhouse_id in self._engaged:
+                released_rules[greenhouse_id].add(index)
+        for greenhouse_id, indexes in released_rules.items():
+            for actuator_type in list(self._engaged[greenhouse_id]):
+                driving = [
+                    index for index in self._rules_by_type[actuator_type]
+                    if compiled.has_threshold(greenhouse_id, index)
+                ]
+                if actuator_type in actions[greenhouse_id] or not driving or not indexes.issuperset(driving):
+                    continue
+                # Durée minimale de marche : pas d'arrêt pendant le délai d'une règle qui pilote ce type
+                if any(
+                    now - self._last_fired.get((greenhouse_id, compiled.rules[index]["name"]), -np.inf)
+                    < settings.RULE_ENGINE_COOLDOWN_SECONDS
+                    for index in driving
+                ):
+                    continue
+                actions[greenhouse_id][actuator_type] = 0
+                origins[greenhouse_id][actuator_type] = "release"
+        actions = {greenhouse_id: targets for greenhouse_id, targets in actions.items() if targets}
+
+        results = await asyncio.gather(
+            *(
+                self._apply(greenhouse_id, targets, origins[greenhouse_id])
+                for greenhouse_id, targets in actions.items()
+            ),
+            return_exceptions=True
+        )
+        sent = {}
+        for greenhouse_id, result in zip(actions, results):
+            if isinstance(result, Exception):
+                metrics.increment("rules.commands_failed")
+                logger.error(f"Erreur lors de l'application des règles à la serre {greenhouse_id}: {result}")
+            elif result:
+                sent[greenhouse_id] = result
+        return sent
+
+    async def _apply(self, greenhouse_id: str, targets: Dict[str, float], origins: Dict[str, str]) -> List[ActuatorCommand]:
+        actuators = await self.actuator_service.get_by_greenhouse_id(greenhouse_id, limit=0)
+        commands = [
+            ActuatorCommand(id=actuator.id, value=targets[actuator.type])
+            for actuator in actuators
+            if actuator.type in targets and actuator.value != targets[actuator.type]
+        ]
+        types = {actuator.id: actuator.type for actuator in actuators}
+        if commands:
+            source = f"rule:{','.join(dict.fromkeys(origins[types[command.id]] for command in commands))}"
+            await self.actuator_service.apply_commands(greenhouse_id, commands, source)
+            metrics.increment("rules.commands", len(commands))
+        engaged = self._engaged.setdefault(greenhouse_id, set())
+        engaged.update(types[command.id] for command in commands if command.value)
+        engaged.difference_update(actuator_type for actuator_type, value in targets.items() if not value)
+        if not engaged:
+            del self._engaged[greenhouse_id]
+        return commands
+
+    async def run_pending(self) -> int:
+        """Évaluer les mesures en attente et retourner leur nombre"""
+        readings, self._pending = self._pending, []
+        await self.evaluate(readings)
+        return len(readings)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RULE_ENGINE_INTERVAL_SECONDS)
+            try:
+                await self.run_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.increment("rules.failed")
+                logger.error(f"Erreur lors de l'évaluation des règles d'automatisation: {e}")
+
+    def start(self) -> None:
+        """Lancer l'évaluation périodique en tâche de fond"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -12,9 +12,9 @@ logger = logging.getLogger(__name__)
 class SessionService(BaseService[SessionModel, SessionCreate, SessionUpdate]):
     """Service pour gérer les sessions utilisateur"""
 
-    def __init__(self):
+    def __init__(self, repository: Optional[SessionRepository] = None):
         super().__init__()
-        self.repository = SessionRepository()
+        self.repository = repository or SessionRepository()
 
     async def create(self, data: SessionCreate) -> SessionModel:
         """Créer une nouvelle session"""
@@ -1,21 +1,168 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any, Tuple
 from app.services.base_service import BaseService
 from app.models.settings_model import SettingsModel
 from app.repositories.settings_repository import SettingsRepository
+from app.repositories.counter_repository import CounterRepository
 from app.services.user_service import UserService
+from app.services.greenhouse_service import GreenhouseService
 from app.schemas.settings_schema import SettingsCreate, SettingsUpdate
+from app.config.settings import settings
 from fastapi import HTTPException
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class SettingsService(BaseService[SettingsModel, SettingsCreate, SettingsUpdate]):
     """Service pour gérer les opérations liées aux paramètres"""
 
-    def __init__(self):
+    # Seuils et préférences fusionnés par get_effective (défaut < utilisateur < serre)
+    EFFECTIVE_FIELDS = [name for name in SettingsUpdate.model_fields if name != "is_default"]
+    # Compteur incrémenté à chaque modification de paramètres, partagé par tous les workers
+    VERSION_KEY = SettingsRepository.VERSION_KEY
+
+    def __init__(
+        self,
+        repository: Optional[SettingsRepository] = None,
+        user_service: Optional[UserService] = None,
+        greenhouse_service: Optional[GreenhouseService] = None,
+        counters: Optional[CounterRepository] = None
+    ):
         super().__init__()
-        self.repository = SettingsRepository()
-        self.user_service = UserService()
+        self.repository = repository or SettingsRepository()
+        self.user_service = user_service or UserService()
+        self.greenhouse_service = greenhouse_service or GreenhouseService(user_service=self.user_service)
+        self.counters = counters or CounterRepository()
+        self._effective: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+
+    async def _current_version(self) -> int:
+        """Version des paramètres, relue au plus toutes les SETTINGS_VERSION_CHECK_SECONDS secondes"""
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= settings.SETTINGS_VERSION_CHECK_SECONDS:
+            version = await self.counters.get_value(self.VERSION_KEY) or 0
+            if version != self._version:
+                # Paramètres modifiés (par ce worker ou un autre) : oublier les valeurs mémorisées
+                self._effective.clear()
+                self._version = version
+            self._version_checked_at = now
+        return self._version
+
+    async def get_version(self) -> int:
+        """Version courante des paramètres (change à chaque modification, dans tous les workers)"""
+        try:
+            return await self._current_version()
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture de la version des paramètres: {e}")
+            raise
+
+    async def _bump_version(self) -> None:
+        """Invalider les paramètres effectifs mémorisés par tous les workers"""
+        await self.counters.increment(self.VERSION_KEY, 1, upsert=True)
+        self._effective.clear()
+        self._version = None
+
+    def _merge(self, layers: Dict[str, Dict[str, Any]], user_id: str, greenhouse_id: str, version: int) -> Dict[str, Any]:
+        # Valeurs par défaut du schéma pour les champs absents de tous les niveaux
+        effective: Dict[str, Any] = {field: SettingsCreate.model_fields[field].default for field in self.EFFECTIVE_FIELDS}
+        sources: Dict[str, str] = {}
+        for layer in ("default", "user", "greenhouse"):
+            document = layers.get(layer)
+            if not document:
+                continue
+            for field in self.EFFECTIVE_FIELDS:
+                if document.get(field) is not None:
+                    effective[field] = document[field]
+                    sources[field] = layer
+        base = layers.get("greenhouse") or layers.get("user") or layers["default"]
+        effective.update({
+            "id": base["id"],
+            "user_id": user_id,
+            "greenhouse_id": greenhouse_id,
+            "is_default": base is layers.get("default"),
+            "created_at": base.get("created_at"),
+            "updated_at": base.get("updated_at"),
+            "sources": sources,
+            "version": version
+        })
+        return effective
+
+    def _remember(self, key: Tuple[str, str], effective: Dict[str, Any]) -> Dict[str, Any]:
+        """Mémoriser des paramètres effectifs ; l'appelant vérifie que la version n'a pas changé pendant leur lecture"""
+        if len(self._effective) >= settings.SETTINGS_EFFECTIVE_MAX_ENTRIES:
+            self._effective.clear()
+        self._effective[key] = effective
+        return effective
+
+    async def get_effective(self, greenhouse_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Paramètres effectifs d'une serre : défauts, puis paramètres de l'utilisateur, puis de la serre, champ par champ.
+
+        user_id est par défaut le propriétaire de la serre. Le résultat est mémorisé dans le processus
+        jusqu'au prochain changement de version (voir _current_version), sauf si la version a changé
+        pendant la lecture des paramètres. sources indique d'où vient chaque valeur.
+        """
+        try:
+            if user_id is None:
+                greenhouse = await self.greenhouse_service.get_by_id(greenhouse_id)
+                if not greenhouse:
+                    return None
+                user_id = greenhouse.user_id
+            version = await self._current_version()
+            key = (user_id, greenhouse_id)
+            effective = self._effective.get(key)
+            if effective is None:
+                layers = await self.repository.get_layers(user_id, greenhouse_id)
+                if not layers:
+                    return None
+                effective = self._merge(layers, user_id, greenhouse_id, version)
+                if self._version == version:
+                    self._remember(key, effective)
+            return {**effective, "sources": dict(effective["sources"])}
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul des paramètres effectifs: {e}")
+            raise
+
+    async def get_effective_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """Paramètres effectifs de toutes les serres d'un utilisateur.
+
+        Les serres absentes du cache sont résolues ensemble : une requête $in sur (user_id, greenhouse_id)
+        et une lecture des paramètres par défaut, quel que soit le nombre de serres.
+        """
+        try:
+            greenhouses = await self.greenhouse_service.get_by_user_id(user_id, limit=0, fields=["id"])
+            greenhouse_ids = [greenhouse.id for greenhouse in greenhouses]
+            version = await self._current_version()
+            # Copie locale : le cache peut être vidé pendant les lectures (changement de version, taille maximale)
+            found: Dict[str, Dict[str, Any]] = {}
+            for greenhouse_id in greenhouse_ids:
+                effective = self._effective.get((user_id, greenhouse_id))
+                if effective is not None:
+                    found[greenhouse_id] = effective
+            missing = [greenhouse_id for greenhouse_id in greenhouse_ids if greenhouse_id not in found]
+            if missing:
+                default = await self.repository.get_default()
+                documents = await self.repository.get_user_layers(user_id, missing)
+                user_layer = documents.get(None)
+                cache = self._version == version
+                for greenhouse_id in missing:
+                    layers = {
+                        layer: document
+                        for layer, document in (("default", default), ("user", user_layer), ("greenhouse", documents.get(greenhouse_id)))
+                        if document
+                    }
+                    if layers:
+                        found[greenhouse_id] = self._merge(layers, user_id, greenhouse_id, version)
+                        if cache:
+                            self._remember((user_id, greenhouse_id), found[greenhouse_id])
+            return [
+                {**found[greenhouse_id], "sources": dict(found[greenhouse_id]["sources"])}
+                for greenhouse_id in greenhouse_ids
+                if greenhouse_id in found
+            ]
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul des paramètres effectifs de l'utilisateur: {e}")
+            raise
 
     async def create(self, data: SettingsCreate) -> SettingsModel:
         """Créer de nouveaux paramètres"""
@@ -29,6 +176,7 @@ class SettingsService(BaseService[SettingsModel, SettingsCreate, SettingsUpdate]
             if existing_settings:
                 raise HTTPException(status_code=400, detail="Des paramètres existent déjà pour cet utilisateur")
             result = await self.repository.create(data.model_dump())
+            await self._bump_version()
             return SettingsModel(**result)
         except HTTPException:
             raise
@@ -72,10 +220,10 @@ class SettingsService(BaseService[SettingsModel, SettingsCreate, SettingsUpdate]
             logger.error(f"Erreur lors de la récupération des paramètres: {e}")
             raise
 
-    async def count_by_notify(self) -> Dict[str, int]:
+    async def count_by_notify(self, exact: bool = False) -> Dict[str, int]:
         """Compter les paramètres par préférence de notification"""
         try:
-            return await self.repository.count_by_notify()
+            return await self.repository.count_by_notify(exact)
         except Exception as e:
             logger.error(f"Erreur lors du comptage des paramètres: {e}")
             raise
@@ -96,6 +244,7 @@ class SettingsService(BaseService[SettingsModel, SettingsCreate, SettingsUpdate]
             if not update_data:
                 raise ValueError("Aucune donnée à mettre à jour")
             result = await self.repository.update(id, update_data)
+            await self._bump_version()
             return SettingsModel(**result) if result else None
         except Exception as e:
             logger.error(f"Erreur lors de la mise à jour des paramètres: {e}")
@@ -104,7 +253,9 @@ class SettingsService(BaseService[SettingsModel, SettingsCreate, SettingsUpdate]
     async def delete(self, id: str) -> bool:
         """Supprimer des paramètres"""
         try:
-            return await self.repository.delete(id)
+            result = await self.repository.delete(id)
+            await self._bump_version()
+            return result
         except Exception as e:
             logger.error(f"Erreur lors de la suppression des paramètres: {e}")
             raise
@@ -116,4 +267,17 @@ class SettingsService(BaseService[SettingsModel, SettingsCreate, SettingsUpdate]
             return entity if entity else None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des paramètres par défaut dans le service : {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def update_default(self, update_data: Dict[str, Any]) -> Optional[dict]:
+        """Mettre à jour les paramètres par défaut (None si aucun paramètre par défaut ou aucune modification)"""
+        try:
+            default_settings = await self.repository.get_default()
+            if not default_settings:
+                return None
+            result = await self.repository.update(default_settings["id"], update_data)
+            await self._bump_version()
+            return result
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour des paramètres par défaut: {str(e)}")
+            raise
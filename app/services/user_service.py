@@ -12,10 +12,10 @@ logger = logging.getLogger(__name__)
 class UserService(BaseService[UserModel, UserCreate, UserUpdate]):
     """Service pour gérer les opérations liées aux utilisateurs"""
 
-    def __init__(self):
+    def __init__(self, repository: Optional[UserRepository] = None, pwd_context: Optional[CryptContext] = None):
         super().__init__()
-        self.repository = UserRepository()
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.repository = repository or UserRepository()
+        self.pwd_context = pwd_context or CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     def hash_password(self, password: str) -> str:
         """Hacher un mot de passe"""
@@ -42,7 +42,7 @@ class UserService(BaseService[UserModel, UserCreate, UserUpdate]):
     async def get_by_id(self, id: str) -> Optional[UserModel]:
         """Récupérer un utilisateur par son ID"""
         try:
-            entity = await self.repository.get_by_id(id)
+            entity = await self.repository.load(id)
             return UserModel(**entity) if entity else None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de l'utilisateur: {e}")
@@ -66,10 +66,10 @@ class UserService(BaseService[UserModel, UserCreate, UserUpdate]):
             logger.error(f"Erreur lors de la récupération des utilisateurs: {e}")
             raise
 
-    async def count_by_role(self) -> Dict[str, int]:
+    async def count_by_role(self, exact: bool = False) -> Dict[str, int]:
         """Compter les utilisateurs par rôle"""
         try:
-            return await self.repository.count_by_role()
+            return await self.repository.count_by_role(exact)
         except Exception as e:
             logger.error(f"Erreur lors du comptage des utilisateurs: {e}")
             raise
@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.monitoring.metrics import metrics
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class BatchWriter:
+    """Insertions groupées en arrière-plan : les appelants ajoutent des documents sans attendre MongoDB.
+
+    add() peut être appelé depuis n'importe quel thread (ex. listeners pymongo). Les documents sont
+    écrits par lots (insert_many non ordonné) toutes les flush_interval secondes ; au-delà de
+    max_pending documents en attente, les nouveaux documents sont abandonnés. on_flush, s'il est
+    fourni, reçoit chaque lot après son insertion (ex. mise à jour d'une vue agrégée).
+    """
+
+    def __init__(self, name: str, max_batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 10000):
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._collection: Optional[AsyncIOMotorCollection] = None
+        self._on_flush: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(
+        self,
+        collection: AsyncIOMotorCollection,
+        on_flush: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ) -> None:
+        """Démarrer l'écriture périodique vers la collection (à appeler depuis la boucle asyncio)"""
+        self._collection = collection
+        self._on_flush = on_flush
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def add(self, document: Dict[str, Any]) -> bool:
+        """Mettre un document en attente d'écriture (False s'il est abandonné, file pleine)"""
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                metrics.increment(f"batch_writer.{self.name}.dropped")
+                return False
+            self._pending.append(document)
+        return True
+
+    async def flush(self) -> int:
+        """Écrire les documents en attente, retourne le nombre de documents insérés"""
+        if self._collection is None:
+            return 0
+        with self._lock:
+            documents: List[Dict[str, Any]] = list(self._pending)
+            self._pending.clear()
+        inserted = 0
+        for start in range(0, len(documents), self.max_batch_size):
+            batch = documents[start:start + self.max_batch_size]
+            try:
+                result = await self._collection.insert_many(batch, ordered=False)
+                inserted += len(result.inserted_ids)
+            except Exception as e:
+                metrics.increment(f"batch_writer.{self.name}.failed", len(batch))
+                logger.error(f"Erreur lors de l'écriture groupée ({self.name}): {str(e)}")
+                continue
+            if self._on_flush is not None:
+                try:
+                    await self._on_flush(batch)
+                except Exception as e:
+                    metrics.increment(f"batch_writer.{self.name}.on_flush_failed")
+                    logger.error(f"Erreur après l'écriture groupée ({self.name}): {str(e)}")
+        if inserted:
+            metrics.increment(f"batch_writer.{self.name}.written", inserted)
+        return inserted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def stop(self) -> None:
+        """Arrêter l'écriture périodique en écrivant les documents restants"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -10,4 +10,23 @@ VALID_ACTUATOR_TYPES = [
     "ventilation",
     "cameraAngle",
     "cameraZoom"
-]
\ No newline at end of file
+]
+
+# Règles d'automatisation : si la mesure dépasse le seuil des paramètres effectifs de la serre,
+# les actionneurs du type indiqué prennent la valeur indiquée. Ceux que le moteur a mis en marche sont
+# remis à 0 quand la mesure est revenue en deçà du seuil d'au moins hysteresis (unité de la mesure),
+# pour toutes les règles qui pilotent ce type (voir app/services/rule_engine.py)
+AUTOMATION_RULES = [
+    {"name": "temperature_high", "metric": "temperature", "operator": ">", "threshold": "temperature_max",
+     "hysteresis": 1.0, "actions": {"fan1": 1, "window": 1}},
+    {"name": "temperature_low", "metric": "temperature", "operator": "<", "threshold": "temperature_min",
+     "hysteresis": 1.0, "actions": {"heating": 1}},
+    {"name": "humidity_high", "metric": "humidity", "operator": ">", "threshold": "humidity_max",
+     "hysteresis": 5.0, "actions": {"ventilation": 1}},
+    {"name": "soil_moisture_low", "metric": "soil_moisture", "operator": "<", "threshold": "soil_moisture_min",
+     "hysteresis": 5.0, "actions": {"irrigation": 1}},
+    {"name": "light_level_low", "metric": "light_level", "operator": "<", "threshold": "light_level_min",
+     "hysteresis": 100.0, "actions": {"lighting": 1}},
+    {"name": "co2_level_high", "metric": "co2_level", "operator": ">", "threshold": "co2_level_max",
+     "hysteresis": 100.0, "actions": {"ventilation": 1}},
+]
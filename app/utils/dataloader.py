@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+class DataLoader:
+    """Regroupe les chargements par ID demandés pendant un même tour de boucle en un seul appel batch"""
+
+    def __init__(self, batch_load_fn: Callable[[List[str]], Awaitable[List[Optional[Dict[str, Any]]]]]):
+        self.batch_load_fn = batch_load_fn
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._queue: List[Tuple[str, asyncio.Future]] = []
+
+    async def load(self, id: str) -> Optional[Dict[str, Any]]:
+        """Charger un document (chaque appelant reçoit sa propre copie)"""
+        future = self._futures.get(id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[id] = future
+            if not self._queue:
+                # Laisser les autres coroutines du même tour enregistrer leurs IDs avant l'envoi
+                loop.call_soon(lambda: loop.create_task(self._dispatch()))
+            self._queue.append((id, future))
+        result = await future
+        return dict(result) if result is not None else None
+
+    async def load_many(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Charger plusieurs documents dans l'ordre demandé"""
+        return list(await asyncio.gather(*(self.load(id) for id in ids)))
+
+    def clear(self, id: str) -> None:
+        """Oublier un document chargé (après une écriture)"""
+        self._futures.pop(id, None)
+
+    async def _dispatch(self) -> None:
+        batch, self._queue = self._queue, []
+        try:
+            results = await self.batch_load_fn([id for id, _ in batch])
+        except Exception as e:
+            for id, future in batch:
+                # Ne pas garder l'échec en cache : un prochain appel relancera la requête
+                if self._futures.get(id) is future:
+                    self._futures.pop(id)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (id, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
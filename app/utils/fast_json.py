@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, get_args
+from pydantic import BaseModel
+from fastapi.responses import Response
+import json
+import orjson
+
+_MISSING = object()
+
+# (nom du champ, champ float, valeur par défaut du modèle source)
+FieldPlan = List[Tuple[str, bool, Any]]
+
+_plans: Dict[Tuple[type, Optional[type]], FieldPlan] = {}
+
+def _build_plan(response_model: Type[BaseModel], source_model: Optional[Type[BaseModel]]) -> FieldPlan:
+    """Préparer, une fois par couple de modèles, l'ordre des champs, les conversions et les valeurs par défaut"""
+    plan = []
+    for name, field in response_model.model_fields.items():
+        annotation = field.annotation
+        is_float = float in (get_args(annotation) or (annotation,))
+        default = _MISSING
+        source_field = source_model.model_fields.get(name) if source_model else None
+        if source_field is not None and not source_field.is_required():
+            if source_field.default_factory is not None:
+                default = source_field.default_factory
+            else:
+                default = (lambda value: lambda: value)(source_field.default)
+        plan.append((name, is_float, default))
+    return plan
+
+def _get_plan(response_model: Type[BaseModel], source_model: Optional[Type[BaseModel]]) -> FieldPlan:
+    key = (response_model, source_model)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = _build_plan(response_model, source_model)
+    return plan
+
+def _json_default(value: Any) -> Any:
+    """Sérialiser les dates comme Pydantic (suffixe Z pour UTC)"""
+    if isinstance(value, datetime):
+        iso = value.isoformat()
+        if value.utcoffset() == timedelta(0):
+            iso = iso[:-6] + "Z"
+        return iso
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+def dump_documents(
+    documents: Iterable[Any],
+    response_model: Type[BaseModel],
+    source_model: Optional[Type[BaseModel]] = None,
+    fields: Optional[List[str]] = None
+) -> bytes:
+    """Sérialiser des documents MongoDB de confiance en JSON, à l'identique de la réponse FastAPI/Pydantic.
+
+    Les champs suivent l'ordre du schéma de réponse, les valeurs absentes reçoivent le défaut du modèle
+    source et les entiers des champs float sont convertis comme le ferait la validation Pydantic.
+    """
+    plan = _get_plan(response_model, source_model)
+    include = set(fields) | {"id"} if fields else None
+    rows = []
+    # orjson et json.dumps n'écrivent pas les exposants de la même façon (1e16 / 1e+16)
+    orjson_safe = True
+    for document in documents:
+        if isinstance(document, BaseModel):
+            document = document.__dict__
+        row = {}
+        for name, is_float, default in plan:
+            if include is not None and name not in include:
+                continue
+            value = document.get(name, _MISSING)
+            if value is _MISSING:
+                if default is _MISSING:
+                    continue
+                value = default()
+            if is_float and value is not None:
+                value = float(value)
+                if value and not 1e-4 <= abs(value) < 1e16:
+                    orjson_safe = False
+            row[name] = value
+        rows.append(row)
+    if orjson_safe:
+        return orjson.dumps(rows, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        rows,
+        default=_json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def fast_json_response(
+    documents: Iterable[Any],
+    response_model: Type[BaseModel],
+    source_model: Optional[Type[BaseModel]] = None,
+    fields: Optional[List[str]] = None
+) -> Response:
+    """Construire directement la réponse JSON d'une liste, sans validation Pydantic par document"""
+    return Response(
+        content=dump_documents(documents, response_model, source_model, fields),
+        media_type="application/json"
+    )
+
+def fast_json_page_response(
+    page: Dict[str, Any],
+    response_model: Type[BaseModel],
+    source_model: Optional[Type[BaseModel]] = None,
+    fields: Optional[List[str]] = None
+) -> Response:
+    """Construire directement la réponse JSON d'une page {items, total, total_is_estimate, next_cursor}"""
+    meta = orjson.dumps({key: value for key, value in page.items() if key != "items"})
+    content = b'{"items":' + dump_documents(page["items"], response_model, source_model, fields) + b"," + meta[1:]
+    return Response(content=content, media_type="application/json")
+
+def response_fields(response_model: Type[BaseModel], fields: Optional[List[str]] = None) -> List[str]:
+    """Champs à lire en base pour le chemin rapide (projection demandée ou champs du schéma de réponse)"""
+    return fields or list(response_model.model_fields)
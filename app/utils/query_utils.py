@@ -0,0 +1,51 @@
+from typing import Any, List, Optional, Tuple, Type
+from bson import ObjectId
+from pydantic import BaseModel
+from fastapi import HTTPException
+import base64
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """Convertir le paramètre ?fields= (liste séparée par des virgules) en liste des champs demandés"""
+    if not fields:
+        return None
+    requested = []
+    for field in fields.split(","):
+        field = field.strip()
+        if field and field not in requested:
+            requested.append(field)
+    unknown = [field for field in requested if field not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Champs inconnus: {', '.join(unknown)}")
+    return requested or None
+
+def fetch_fields(fields: Optional[List[str]], required: List[str]) -> Optional[List[str]]:
+    """Champs à lire en base : champs demandés et champs toujours nécessaires (ex. contrôle d'accès).
+
+    Les champs ajoutés ne sont pas retournés : la réponse est construite avec les seuls champs demandés.
+    """
+    if not fields:
+        return None
+    return fields + [field for field in required if field not in fields]
+
+def project_items(items: List[BaseModel], fields: Optional[List[str]]) -> List[Any]:
+    """Restreindre les modèles aux champs demandés (sans projection, les modèles sont retournés tels quels)"""
+    if not fields:
+        return items
+    include = set(fields) | {"id"}
+    return [item.model_dump(include=include) for item in items]
+
+def encode_cursor(last_id: str, offset: int) -> str:
+    """Curseur de pagination opaque : dernier ID servi et nombre d'éléments déjà servis"""
+    return base64.urlsafe_b64encode(f"{last_id}:{offset}".encode()).decode()
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Décoder le paramètre ?cursor= (400 si le curseur est invalide)"""
+    if not cursor:
+        return None
+    try:
+        last_id, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        if not ObjectId.is_valid(last_id) or int(offset) < 0:
+            raise ValueError(cursor)
+        return last_id, int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
@@ -0,0 +1,31 @@
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+from app.utils.dataloader import DataLoader
+
+class RequestContext:
+    """Etat propre à une requête HTTP, partagé entre contrôleurs, services et repositories"""
+
+    def __init__(self, scope: Optional[Dict[str, Any]] = None):
+        self.scope = scope or {}
+        self.loaders: Dict[str, DataLoader] = {}
+
+    @property
+    def route(self) -> Optional[str]:
+        """Route FastAPI de la requête (ex. "GET /api/v1/greenhouses/{id}"), connue une fois le routage effectué"""
+        if not self.scope:
+            return None
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path")
+        return f"{self.scope.get('method')} {path}"
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+def get_request_context() -> Optional[RequestContext]:
+    """Retourner le contexte de la requête en cours (None hors requête HTTP)"""
+    return _request_context.get()
+
+def set_request_context(context: RequestContext) -> Token:
+    return _request_context.set(context)
+
+def reset_request_context(token: Token) -> None:
+    _request_context.reset(token)
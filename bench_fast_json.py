@@ -0,0 +1,126 @@
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+
+# Valeurs factices pour charger app.config.settings sans fichier .env
+for key, value in {
+    "MONGO_URL": "mongodb://localhost:27017", "MONGODB_DB_NAME": "bench", "APP_NAME": "bench",
+    "APP_VERSION": "bench", "PORT": "8000", "JWT_SECRET_KEY": "bench", "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30", "TIMEZONE": "Europe/Paris", "SESSION_INACTIVITY_TIMEOUT_MINUTES": "30",
+    "ALLOWED_ORIGINS": '["*"]'
+}.items():
+    os.environ.setdefault(key, value)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.models.history_model import HistoryModel
+from app.models.greenhouse_model import GreenhouseModel
+from app.schemas.history_schema import HistoryPartialResponse
+from app.schemas.greenhouse_schema import GreenhousePartialResponse
+from app.utils.fast_json import dump_documents
+
+ROWS = 10_000
+ROUNDS = 5
+
+def make_greenhouses(count: int) -> List[dict]:
+    """Documents tels que retournés par GreenhouseRepository"""
+    created_at = datetime(2025, 1, 1)
+    user_id = str(ObjectId())
+    return [
+        {
+            "id": str(ObjectId()),
+            "name": f"Serre {i}",
+            "location": "Lyon",
+            "user_id": user_id,
+            "temperature": round(random.uniform(10, 35), 2),
+            "humidity": random.randint(30, 90),
+            "temperature_threshold": 30.0,
+            "is_active": True,
+            "created_at": created_at,
+            "updated_at": created_at
+        }
+        for i in range(count)
+    ]
+
+def make_documents(count: int) -> List[dict]:
+    """Documents tels que retournés par HistoryRepository (champ id déjà converti)"""
+    start = datetime(2025, 1, 1)
+    greenhouse_id = str(ObjectId())
+    return [
+        {
+            "id": str(ObjectId()),
+            "greenhouse_id": greenhouse_id,
+            "temperature": round(random.uniform(10, 35), 2),
+            "humidity": round(random.uniform(30, 90), 1),
+            "light_level": random.randint(0, 80000),
+            "soil_moisture": round(random.uniform(10, 60), 1),
+            "ph_level": round(random.uniform(5, 8), 2),
+            "co2_level": random.choice([None, 412.0, 980.5]),
+            "recorded_at": start + timedelta(seconds=30 * i, milliseconds=i % 1000)
+        }
+        for i in range(count)
+    ]
+
+async def pydantic_path(documents: List[dict], field) -> bytes:
+    """Chemin actuel : HistoryModel par document, validation response_model puis JSONResponse"""
+    models = [HistoryModel(**document) for document in documents]
+    content = await serialize_response(field=field, response_content=models, exclude_unset=True)
+    return JSONResponse(content).body
+
+def fast_path(documents: List[dict]) -> bytes:
+    return dump_documents(documents, HistoryPartialResponse, HistoryModel)
+
+async def validated_greenhouses(documents: List[dict], field) -> bytes:
+    """Ancien chemin des serres : GreenhouseModel validé puis validation response_model"""
+    models = [GreenhouseModel(**document) for document in documents]
+    content = await serialize_response(field=field, response_content=models, exclude_unset=True)
+    return JSONResponse(content).body
+
+def trusted_greenhouses(documents: List[dict]) -> bytes:
+    """Lecture de confiance (model_construct) puis sérialisation directe"""
+    models = [GreenhouseModel.model_construct(**document) for document in documents]
+    return dump_documents(models, GreenhousePartialResponse, GreenhouseModel)
+
+def measure(paths: dict) -> None:
+    timings = {name: [] for name in paths}
+    for _ in range(ROUNDS):
+        for name, run in paths.items():
+            started = time.process_time()
+            run()
+            timings[name].append(time.process_time() - started)
+    for name, values in timings.items():
+        best = min(values)
+        print(f"{name:>10}: {best * 1000:8.1f} ms / {ROWS} lignes  ({best / ROWS * 1e6:6.2f} µs CPU par ligne)")
+    slow, fast = (min(values) for values in timings.values())
+    print(f"Réduction CPU par ligne : {(1 - fast / slow) * 100:.0f} %")
+
+def main():
+    loop = asyncio.new_event_loop()
+    history_field = create_model_field(name="Response_bench", type_=List[HistoryPartialResponse], mode="serialization")
+    greenhouse_field = create_model_field(name="Response_bench", type_=List[GreenhousePartialResponse], mode="serialization")
+    documents = make_documents(ROWS)
+    greenhouses = make_greenhouses(ROWS)
+
+    assert loop.run_until_complete(pydantic_path(documents, history_field)) == fast_path(documents), "Sorties différentes"
+    assert loop.run_until_complete(validated_greenhouses(greenhouses, greenhouse_field)) == trusted_greenhouses(greenhouses), \
+        "Sorties différentes"
+
+    print("Historique")
+    measure({
+        "pydantic": lambda: loop.run_until_complete(pydantic_path(documents, history_field)),
+        "fast": lambda: fast_path(documents)
+    })
+    print("Serres")
+    measure({
+        "validated": lambda: loop.run_until_complete(validated_greenhouses(greenhouses, greenhouse_field)),
+        "trusted": lambda: trusted_greenhouses(greenhouses)
+    })
+    loop.close()
+
+if __name__ == "__main__":
+    main()
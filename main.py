@@ -1,7 +1,9 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.settings import settings
 from app.config.database import Database
+from app.config.container import ServiceContainer
 from app.controllers.user_controller import router as user_router
 from app.controllers.greenhouse_controller import router as greenhouse_router
 from app.controllers.alert_controller import router as alert_router
@@ -10,6 +12,12 @@ from app.controllers.settings_controller import router as settings_router
 from app.controllers.auth_controller import router as auth_router
 from app.controllers.badges_controller import router as badge_router
 from app.controllers.actuator_controller import router as actuator_router
+from app.controllers.metrics_controller import router as metrics_router
+from app.middlewares.request_context_middleware import RequestContextMiddleware
+from app.monitoring.slow_query_log import slow_query_writer
+from app.repositories.actuator_audit_repository import actuator_audit_writer
+from app.repositories.badge_access_repository import badge_access_writer
+from app.repositories.index_reconciler import index_reconciler
 
 import logging
 import uvicorn
@@ -25,8 +33,46 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("Connexion à MongoDB établie")
     await Database.connect_to_database()
+    ServiceContainer.init()
+    if settings.INDEX_RECONCILE_ENABLED:
+        index_reconciler.start()
+    else:
+        index_reconciler.ready = True
+    if settings.SLOW_QUERY_ENABLED:
+        await ServiceContainer.slow_query_repository.ensure_collection()
+        slow_query_writer.start(ServiceContainer.slow_query_repository.collection)
+    if settings.ACTUATOR_AUDIT_ENABLED:
+        audit_repository = ServiceContainer.actuator_service.audit_repository
+        await audit_repository.ensure_collection()
+        actuator_audit_writer.start(audit_repository.collection)
+    await ServiceContainer.badge_service.load_index()
+    if settings.BADGE_ACCESS_LOG_ENABLED:
+        badge_service = ServiceContainer.badge_service
+        badge_access_writer.start(
+            badge_service.access_repository.collection,
+            on_flush=badge_service.presence_repository.apply_events
+        )
+    ServiceContainer.badge_service.start()
+    ServiceContainer.cascade_delete_service.start()
+    if settings.EMAIL_OUTBOX_ENABLED:
+        ServiceContainer.email_outbox_service.start()
+    if settings.ALERT_DIGEST_ENABLED:
+        ServiceContainer.alert_digest_service.start()
+    if settings.RULE_ENGINE_ENABLED:
+        ServiceContainer.rule_engine.start()
     yield
+    await ServiceContainer.rule_engine.stop()
+    await ServiceContainer.cascade_delete_service.stop()
+    # Le dernier récapitulatif est mis en file avant l'arrêt des workers d'envoi
+    await ServiceContainer.alert_digest_service.stop()
+    await ServiceContainer.email_outbox_service.stop()
+    await ServiceContainer.badge_service.stop()
+    await index_reconciler.stop()
+    await slow_query_writer.stop()
+    await actuator_audit_writer.stop()
+    await badge_access_writer.stop()
     logger.info("Connexion à MongoDB fermée")
+    ServiceContainer.reset()
     await Database.close_database_connection()
 
 app = FastAPI(
@@ -43,6 +89,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(RequestContextMiddleware)
 
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(user_router, prefix="/api/v1")
@@ -52,6 +99,7 @@ app.include_router(history_router, prefix="/api/v1")
 app.include_router(settings_router, prefix="/api/v1")
 app.include_router(badge_router, prefix="/api/v1")
 app.include_router(actuator_router, prefix="/api/v1")
+app.include_router(metrics_router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -71,6 +119,16 @@ async def health_check():
         "environment": settings.ENV
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Disponibilité de l'application : les index critiques doivent exister"""
+    if not index_reconciler.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "detail": index_reconciler.last_error or "Index critiques en cours de création"}
+        )
+    return {"status": "ready", "version": settings.APP_VERSION}
+
 # Point d'entrée pour l'exécution directe
 if __name__ == "__main__":
     port = settings.PORT
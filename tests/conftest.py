@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Variables requises par app.config.settings, pour importer l'application sans fichier .env
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "smart_greenhouse_test")
+os.environ.setdefault("APP_NAME", "SmartGreenhouse")
+os.environ.setdefault("APP_VERSION", "test")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("TIMEZONE", "Europe/Paris")
+os.environ.setdefault("SESSION_INACTIVITY_TIMEOUT_MINUTES", "30")
+os.environ.setdefault("ALLOWED_ORIGINS", '["*"]')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+import pytest
+from app.config.settings import settings
+from app.services.alert_digest_service import AlertDigestService
+
+class FailingOutbox:
+    """File d'envoi de substitution : échoue à partir du lot fail_at"""
+
+    def __init__(self, fail_at: int):
+        self.fail_at = fail_at
+        self.batches: List[List[Dict[str, str]]] = []
+
+    async def enqueue_many(self, messages: List[Dict[str, str]]) -> List[str]:
+        if len(self.batches) == self.fail_at:
+            raise ConnectionError("MongoDB indisponible")
+        self.batches.append(messages)
+        return [message["to"] for message in messages]
+
+class Recipients:
+    async def get_notification_recipients(self, greenhouse_ids: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {"id": id, "name": f"Serre {id}", "email": f"{id}@test", "username": id, "settings": [{"notify_by_email": True}]}
+            for id in greenhouse_ids
+        ]
+
+class DefaultSettings:
+    async def get_default(self) -> None:
+        return None
+
+def alert(greenhouse_id: str) -> Dict[str, Any]:
+    return {"greenhouse_id": greenhouse_id, "type": "temperature", "message": "Trop chaud", "value": 40, "created_at": datetime.now()}
+
+def test_failed_batch_requeues_only_unsent_alerts(monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DIGEST_ENQUEUE_BATCH_SIZE", 2)
+    outbox = FailingOutbox(fail_at=1)
+    service = AlertDigestService(outbox=outbox, greenhouse_repository=Recipients(), settings_repository=DefaultSettings())
+    alerts = [alert(id) for id in ("a", "b", "c", "d", "c")]
+    for item in alerts:
+        service.submit(item)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.run_pending())
+    assert [message["to"] for message in outbox.batches[0]] == ["a@test", "b@test"]
+    assert sorted(item["greenhouse_id"] for item in service._pending) == ["c", "c", "d"]
+
+    outbox.fail_at = None
+    assert asyncio.run(service.run_pending()) == 2
+    assert [message["to"] for message in outbox.batches[1]] == ["c@test", "d@test"]
+    assert service._pending == []
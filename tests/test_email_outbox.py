@@ -0,0 +1,120 @@
+import asyncio
+import smtplib
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+import pytest
+from app.config.settings import settings
+from app.services import email_service
+from app.services.email_service import EmailOutboxService, SmtpSender
+
+class StandInSMTP:
+    """Serveur SMTP de substitution : remplace smtplib.SMTP et garde les connexions ouvertes"""
+
+    connections: List["StandInSMTP"] = []
+    refused: set = set()
+    disconnect_after: Optional[int] = None
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.sent: List[str] = []
+        self.logged_in = False
+        StandInSMTP.connections.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, username: str, password: str):
+        self.logged_in = True
+
+    def sendmail(self, sender: str, recipients: List[str], message: str):
+        if self.disconnect_after is not None and len(self.sent) >= self.disconnect_after:
+            raise smtplib.SMTPServerDisconnected("Connexion fermée par le serveur")
+        if recipients[0] in self.refused:
+            raise smtplib.SMTPRecipientsRefused({recipients[0]: (550, b"Boite inconnue")})
+        self.sent.append(recipients[0])
+
+@pytest.fixture
+def smtp(monkeypatch):
+    StandInSMTP.connections = []
+    StandInSMTP.refused = set()
+    StandInSMTP.disconnect_after = None
+    monkeypatch.setattr(email_service.smtplib, "SMTP", StandInSMTP)
+    return StandInSMTP
+
+def make_messages(*recipients: str) -> List[Dict[str, Any]]:
+    return [{"to": to, "subject": "Sujet", "body": "Corps"} for to in recipients]
+
+def sender() -> SmtpSender:
+    return SmtpSender(host="localhost", port=2525, username="", password="", starttls=False, sender="serre@test")
+
+def test_send_batch_uses_one_connection(smtp):
+    results = sender().send_batch(make_messages("a@test", "b@test", "c@test"))
+    assert results == [None, None, None]
+    assert len(smtp.connections) == 1
+    assert smtp.connections[0].sent == ["a@test", "b@test", "c@test"]
+
+def test_send_batch_reports_refused_recipient(smtp):
+    smtp.refused = {"b@test"}
+    results = sender().send_batch(make_messages("a@test", "b@test", "c@test"))
+    assert results[0] is None and results[2] is None
+    assert "b@test" in results[1]
+    assert smtp.connections[0].sent == ["a@test", "c@test"]
+
+def test_send_batch_disconnect_fails_remaining_messages(smtp):
+    smtp.disconnect_after = 1
+    results = sender().send_batch(make_messages("a@test", "b@test", "c@test"))
+    assert results[0] is None
+    assert results[1] is not None and results[2] is not None
+    assert smtp.connections[0].sent == ["a@test"]
+
+class InMemoryOutbox:
+    """Repository de substitution : un lot pris, résultats enregistrés"""
+
+    def __init__(self, messages: List[Dict[str, Any]]):
+        self.token = ObjectId()
+        self.messages = [
+            {**message, "id": str(ObjectId()), "attempts": 1, "claimed_by": self.token} for message in messages
+        ]
+        self.claimed = False
+        self.results: Optional[Dict[str, Any]] = None
+
+    async def claim_batch(self, limit: int, lease_seconds: float, max_attempts: int):
+        if self.claimed:
+            return None, []
+        self.claimed = True
+        return self.token, self.messages[:limit]
+
+    async def record_results(self, token: ObjectId, sent: List[str], failed: List[Dict[str, Any]]) -> int:
+        assert token == self.token
+        self.results = {"sent": sent, "failed": failed}
+        return len(sent) + len(failed)
+
+def test_run_batch_records_sent_and_retried_messages(smtp):
+    smtp.refused = {"b@test"}
+    smtp.disconnect_after = 2
+    repository = InMemoryOutbox(make_messages("a@test", "b@test", "c@test", "d@test"))
+    outbox = EmailOutboxService(repository=repository, sender=sender())
+
+    assert asyncio.run(outbox.run_pending()) == 4
+    assert len(smtp.connections) == 1
+    ids = [message["id"] for message in repository.messages]
+    # a envoyé, b refusé, c envoyé, puis déconnexion avant d
+    assert repository.results["sent"] == [ids[0], ids[2]]
+    failed = {failure["id"]: failure for failure in repository.results["failed"]}
+    assert set(failed) == {ids[1], ids[3]}
+    assert all(failure["next_attempt_at"] is not None for failure in failed.values())
+
+def test_run_batch_abandons_message_after_max_attempts(smtp):
+    smtp.refused = {"a@test"}
+    repository = InMemoryOutbox(make_messages("a@test"))
+    repository.messages[0]["attempts"] = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    outbox = EmailOutboxService(repository=repository, sender=sender())
+
+    asyncio.run(outbox.run_batch())
+    assert repository.results["failed"][0]["next_attempt_at"] is None
@@ -0,0 +1,17 @@
+from app.schemas.greenhouse_schema import GreenhousePartialResponse
+from app.utils.fast_json import dump_documents
+from app.utils.query_utils import fetch_fields, parse_fields
+import orjson
+
+def test_required_fields_are_fetched_but_not_returned():
+    projection = parse_fields("name", GreenhousePartialResponse)
+    assert fetch_fields(projection, ["user_id"]) == ["name", "user_id"]
+    rows = orjson.loads(dump_documents([{"id": "1", "name": "Serre", "user_id": "u1"}], GreenhousePartialResponse, fields=projection))
+    assert rows == [{"name": "Serre", "id": "1"}]
+
+def test_requested_required_field_is_kept_once():
+    projection = parse_fields("user_id,name", GreenhousePartialResponse)
+    assert fetch_fields(projection, ["user_id"]) == ["user_id", "name"]
+
+def test_no_projection_fetches_full_documents():
+    assert fetch_fields(parse_fields(None, GreenhousePartialResponse), ["user_id"]) is None